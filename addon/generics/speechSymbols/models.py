@@ -1,6 +1,8 @@
 import codecs
 import collections
 import os
+import re
+from types import MappingProxyType
 
 import addonHandler
 import globalVars
@@ -40,6 +42,77 @@ class SpeechSymbol(object):
 		return "SpeechSymbol(%s)" % ", ".join(attrs)
 
 
+class CompiledSpeechSymbols(object):
+	"""
+	Read-only lookup structures derived from L{SpeechSymbols} for language detection.
+	Identifiers longer than one character are matched through L{phrasePattern},
+	a regular expression compiled from a trie of those identifiers.
+	"""
+	__slots__ = (
+		"characters", "forced", "languages", "primaryLanguages",
+		"replacements", "phrases", "phrasePattern",
+	)
+
+	def __init__(self, symbols):
+		characters = set()
+		forced = set()
+		languages = {}
+		primaryLanguages = {}
+		replacements = {}
+		phrases = {}
+		for identifier, symbol in symbols.items():
+			if len(identifier) == 1:
+				characters.add(identifier)
+				# Digits are never replaced, they are handled by the number pipeline.
+				if symbol.replacement and not "0" <= identifier <= "9":
+					replacements[ord(identifier)] = symbol.replacement
+			else:
+				phrases[identifier] = symbol.replacement or identifier
+			if symbol.mode == SYMMOD_FORCE and symbol.language:
+				forced.add(identifier)
+				languages[identifier] = symbol.language
+				primaryLanguages[identifier] = symbol.language.split("_")[0]
+		#: Single character identifiers.
+		self.characters = frozenset(characters)
+		#: Identifiers forcing their own language.
+		self.forced = frozenset(forced)
+		#: Language and primary language of the forced identifiers.
+		self.languages = MappingProxyType(languages)
+		self.primaryLanguages = MappingProxyType(primaryLanguages)
+		#: Replacements of single character identifiers, usable with str.translate.
+		self.replacements = MappingProxyType(replacements)
+		#: Replacement text of multi-character identifiers.
+		self.phrases = MappingProxyType(phrases)
+		self.phrasePattern = re.compile(self._triePattern(self._buildTrie(phrases))) if phrases else None
+
+	@staticmethod
+	def _buildTrie(identifiers):
+		trie = {}
+		for identifier in identifiers:
+			node = trie
+			for char in identifier:
+				node = node.setdefault(char, {})
+			# An empty key marks the end of an identifier.
+			node[""] = True
+		return trie
+
+	@classmethod
+	def _triePattern(cls, node):
+		"""Turn a trie into a pattern matching the longest identifier at a position."""
+		alternatives = [
+			re.escape(char) + cls._triePattern(child)
+			for char, child in sorted(node.items())
+			if char
+		]
+		if not alternatives:
+			return ""
+		if "" in node:
+			return "(?:%s)?" % "|".join(alternatives)
+		if len(alternatives) == 1:
+			return alternatives[0]
+		return "(?:%s)" % "|".join(alternatives)
+
+
 class SpeechSymbols(object):
 	"""
 	Contains raw information about the pronunciation of symbols.
@@ -53,6 +126,15 @@ class SpeechSymbols(object):
 		self.symbols = collections.OrderedDict()
 		self.fileName = None
 		self.localesToNames = dict(languageHandler.getAvailableLanguages())
+		self._compiled = None
+
+	def compile(self):
+		"""Return the read-only L{CompiledSpeechSymbols} view of the current symbols.
+		@rtype: L{CompiledSpeechSymbols}
+		"""
+		if self._compiled is None:
+			self._compiled = CompiledSpeechSymbols(self.symbols)
+		return self._compiled
 
 	def load(self, fileName):
 		"""Load symbol information from a file.
@@ -60,6 +142,7 @@ class SpeechSymbols(object):
 		@type fileName: str
 		@raise IOError: If the file cannot be read.
 		"""
+		self._compiled = None
 		self.fileName = os.path.join(base_path, fileName)
 		if not os.path.exists(self.fileName):
 			with codecs.open(self.fileName, 'w', encoding='utf-8') as f:
@@ -193,6 +276,8 @@ class SpeechSymbols(object):
 
 	def updateSymbol(self, symbol):
 		self.symbols[symbol.identifier] = symbol
+		self._compiled = None
 
 	def deleteSymbol(self, symbol):
 		del self.symbols[symbol.identifier]
+		self._compiled = None
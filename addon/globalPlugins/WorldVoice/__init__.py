@@ -16,11 +16,13 @@ from .speechSettingsDialog import WorldVoiceSettingsDialog
 from generics.speechSymbols.views import SpeechSymbolsDialog
 
 from synthDrivers.WorldVoice import WVStart, WVEnd
+from synthDrivers.WorldVoice.languageDetection import invalidate_detector_config
 from synthDrivers.WorldVoice.pipeline import pl
 from synthDrivers.WorldVoice.pipeline.settings import (
 	apply_global_pipeline_scope,
 	apply_pipeline_after_worldvoice_end,
 	clear_global_pipeline_scope,
+	invalidate_pipeline_settings,
 	load_pipeline_settings,
 )
 from synthDrivers.WorldVoice.sayAll import patch, unpatch
@@ -44,6 +46,8 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
 		WVStart.register(on_worldvoice_start)
 		WVEnd.register(on_worldvoice_end)
+		config.post_configProfileSwitch.register(invalidate_pipeline_settings)
+		config.post_configProfileSwitch.register(invalidate_detector_config)
 
 		patch()
 		if getSynth().name != "WorldVoice":
@@ -68,6 +72,8 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
 		WVStart.unregister(on_worldvoice_start)
 		WVEnd.unregister(on_worldvoice_end)
+		config.post_configProfileSwitch.unregister(invalidate_pipeline_settings)
+		config.post_configProfileSwitch.unregister(invalidate_detector_config)
 
 	def createMenu(self):
 		self.submenu_WorldVoice = wx.Menu()
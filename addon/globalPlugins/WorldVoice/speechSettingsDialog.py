@@ -6,7 +6,7 @@ import addonHandler
 import config
 import core
 import gui
-from gui import guiHelper
+from gui import guiHelper, nvdaControls
 from gui.settingsDialogs import MultiCategorySettingsDialog, SettingsPanel
 import languageHandler
 from logHandler import log
@@ -22,7 +22,7 @@ from synthDrivers.WorldVoice.pipeline.settings import (
 	load_pipeline_settings,
 	save_pipeline_settings,
 )
-from synthDrivers.WorldVoice.engine import EngineType, get_engine_enabled
+from synthDrivers.WorldVoice.engine import EngineType, READY_ENGINE_CLASS, get_engine_enabled, get_engine_label
 import tones
 
 from .utils import guard_errors
@@ -336,7 +336,8 @@ class SpeechRoleSettingsPanel(SettingsPanel):
 	@property
 	def voiceInstance(self):
 		voiceName = self._getSelectedVoiceName()
-		if not voiceName:
+		# A voice whose engine is still starting has no instance to set up yet.
+		if not voiceName or not self._manager.waitForVoice(voiceName):
 			return
 		voiceInstance = self._manager.getVoiceInstance(voiceName)
 		return voiceInstance
@@ -397,9 +398,8 @@ class SpeechRoleSettingsPanel(SettingsPanel):
 				self.onVoiceChange(None)
 
 	def _updateVariantsSelection(self):
-		voiceName = self._getSelectedVoiceName()
-		if voiceName:
-			voiceInstance = self._manager.getVoiceInstance(voiceName)
+		voiceInstance = self.voiceInstance
+		if voiceInstance:
 			variants = [i["id"] for i in voiceInstance.variants if i != '']
 			variants = ['default'] + variants
 			variant = voiceInstance.variant
@@ -422,7 +422,10 @@ class SpeechRoleSettingsPanel(SettingsPanel):
 		voiceName = self._getSelectedVoiceName()
 		if voiceName:
 			self._dataToPercist[locale]["voice"] = voiceName
-			voiceInstance = self._manager.getVoiceInstance(voiceName)
+		else:
+			self._dataToPercist[locale]["voice"] = self.NO_SELECT
+		voiceInstance = self.voiceInstance
+		if voiceInstance:
 			if self._keepParameterConsistentCheckBox.GetValue():
 				mainVoiceInstance = self._manager._defaultVoiceInstance
 				voiceInstance.rate = mainVoiceInstance.rate
@@ -435,17 +438,14 @@ class SpeechRoleSettingsPanel(SettingsPanel):
 			self._volumeSlider.SetValue(voiceInstance.volume)
 			self._inflectionSlider.SetValue(voiceInstance.inflection)
 			self._rateBoostCheckBox.SetValue(voiceInstance.rateBoost)
-		else:
-			self._dataToPercist[locale]["voice"] = self.NO_SELECT
 		self._updateVariantsSelection()
 		self.sliderDisable()
 		self.sliderEnable()
 
 	@guard_errors(callback=got_error_callback)
 	def onVariantChange(self, event):
-		voiceName = self._getSelectedVoiceName()
-		if voiceName:
-			voiceInstance = self._manager.getVoiceInstance(voiceName)
+		voiceInstance = self.voiceInstance
+		if voiceInstance:
 			voiceInstance.variant = self._variantsChoice.GetStringSelection()
 
 	@guard_errors(callback=got_error_callback)
@@ -598,6 +598,8 @@ class SpeechRoleSettingsPanel(SettingsPanel):
 					getSynth().voice = self._dataToPercist[locale]["voice"]
 				config.conf["speech"]["WorldVoice"]["voice"] = self._dataToPercist[locale]["voice"]
 
+		getSynth().invalidateSpeechPlans()
+
 
 class UnicodeDetectionSettingsPanel(SettingsPanel):
 	title = _("Unicode Detection")
@@ -719,6 +721,9 @@ class UnicodeDetectionSettingsPanel(SettingsPanel):
 			# trigger register/unregister language detector
 			getSynth().uwv = getSynth().uwv
 
+		languageDetection.invalidate_detector_config()
+		getSynth().invalidateSpeechPlans()
+
 
 class SpeechEngineSettingsPanel(BaseSettingsPanel):
 	# Translators: Title of a setting dialog.
@@ -750,6 +755,32 @@ class SpeechEngineSettingsPanel(BaseSettingsPanel):
 			if get_engine_enabled(eng.name, config.conf["WorldVoice"]["engine"])
 		])
 
+		self._dedicatedCoreSpins = {}
+		engines = [name for name, cls in READY_ENGINE_CLASS.items() if cls.supportsDedicatedCore]
+		if not engines or getSynth().name != 'WorldVoice':
+			return
+		group_sizer = wx.StaticBoxSizer(wx.StaticBox(self, label=_("Dedicated Cores")), wx.VERTICAL)
+		sizer.Add(group_sizer, proportion=1, flag=wx.EXPAND)
+		settingsSizerHelper = guiHelper.BoxSizerHelper(self, sizer=group_sizer)
+		for engine in engines:
+			self._dedicatedCoreSpins[engine] = settingsSizerHelper.addLabeledControl(
+				# Translators: How many voices of an engine may get a core of their own.
+				_("Voices of {engine} with a core of their own:").format(engine=get_engine_label(engine)),
+				nvdaControls.SelectOnFocusSpinCtrl,
+				min=0,
+				max=8,
+				initial=config.conf["WorldVoice"]["dedicatedCores"].get(engine, 0),
+			)
+		switchesSaved = getSynth()._voiceManager.dedicatedCoreStats()["switchesSaved"]
+		switchesCtrl = wx.TextCtrl(
+			self,
+			# Translators: How often dedicated cores spared an engine a voice switch this session.
+			value=_("Voice switches saved this session: {count}").format(count=switchesSaved),
+			style=wx.TE_READONLY | wx.BORDER_NONE
+		)
+		switchesCtrl.SetBackgroundColour(self.GetBackgroundColour())
+		settingsSizerHelper.addItem(switchesCtrl, flag=wx.EXPAND)
+
 	def isValid(self) -> bool:
 		self.activeEngine = set()
 		for k, v in self.settings.items():
@@ -781,6 +812,8 @@ class SpeechEngineSettingsPanel(BaseSettingsPanel):
 				gui.mainFrame.onSaveConfigurationCommand(None)
 				queueHandler.queueFunction(queueHandler.eventQueue, core.restart)
 			super().onSave()
+		for engine, spin in self._dedicatedCoreSpins.items():
+			config.conf["WorldVoice"]["dedicatedCores"][engine] = spin.GetValue()
 
 
 class LogSettingsPanel(BaseSettingsPanel):
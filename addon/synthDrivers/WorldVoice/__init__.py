@@ -20,10 +20,9 @@ from speech.extensions import filter_speechSequence
 from synthDriverHandler import SynthDriver, synthIndexReached, synthDoneSpeaking
 
 from . import languageDetection
+from .cache import LRUCache
 from .engine import READY_ENGINE_CLASS
 from .pipeline import (
-	ignore_comma_between_number,
-	item_wait_factor,
 	inject_langchange_reorder,
 	deduplicate_language_command,
 	lang_cmd_to_voice,
@@ -34,6 +33,8 @@ from .pipeline.settings import (
 	apply_worldvoice_pipeline,
 	clear_pipeline,
 	get_effective_pipeline_settings,
+	get_pipeline_settings_version,
+	invalidate_pipeline_settings,
 	save_pipeline_settings,
 )
 from ._speechcommand import SplitCommand
@@ -62,6 +63,8 @@ config.conf.spec["WorldVoice"] = {
 		"KeepMainLocaleVoiceConsistent": "boolean(default=true)",
 		"KeepMainLocaleParameterConsistent": "boolean(default=false)",
 		"KeepMainLocaleEngineConsistent": "boolean(default=true)",
+		"detectionCacheSize": "integer(default=1024,min=0,max=65536)",
+		"residentVoiceLimit": "integer(default=8,min=0,max=256)",
 	},
 	"pipeline": {
 		"scope": "string(default=WorldVoice)",
@@ -77,6 +80,10 @@ config.conf.spec["WorldVoice"] = {
 	"engine": {
 		"__many__": "boolean(default=false)"
 	},
+	# Voices of an engine that may get a core of their own, per engine.
+	"dedicatedCores": {
+		"__many__": "integer(default=0,min=0,max=8)"
+	},
 	"log": {
 		"enable": "boolean(default=false)",
 		"ignore_comma_between_number": "boolean(default=false)",
@@ -102,6 +109,75 @@ config.conf.spec["WorldVoice"] = {
 WVStart = extensionPoints.Action()
 WVEnd = extensionPoints.Action()
 
+# Bounds of the speech plan cache: entries, and summed characters of the cached utterances.
+SPEECH_PLAN_CACHE_SIZE = 512
+SPEECH_PLAN_CACHE_COST = 256 * 1024
+
+
+class _IndexSlot:
+	"""Stands for the n-th IndexCommand of an utterance inside a cached speech plan."""
+	__slots__ = ("ordinal",)
+
+	def __init__(self, ordinal):
+		self.ordinal = ordinal
+
+
+class _SpeechPlanKey:
+	"""
+	Builds the cache key of an utterance from its commands as they pass, and
+	numbers its IndexCommands. Index values change on every utterance, so they
+	are left out of the key and put back when the plan runs.
+	"""
+
+	def __init__(self):
+		self._skeleton = []
+		self._cacheable = True
+		self.indexes = []
+		# _IndexSlot of each IndexCommand, by id.
+		self.slots = {}
+
+	def add(self, command):
+		if isinstance(command, str):
+			self._skeleton.append(command)
+		elif isinstance(command, IndexCommand):
+			self._skeleton.append(IndexCommand)
+			self.slots[id(command)] = _IndexSlot(len(self.indexes))
+			self.indexes.append(command)
+		else:
+			commandKey = _commandKey(command)
+			self._cacheable = self._cacheable and commandKey is not None
+			self._skeleton.append(commandKey)
+
+	def track(self, speechSequence):
+		"""Pass the commands of speechSequence through, adding each to the key."""
+		for command in speechSequence:
+			self.add(command)
+			yield command
+
+	def key(self):
+		"""The key of the commands added so far, or None if a command can't be part of one."""
+		if not self._cacheable:
+			return None
+		key = (get_pipeline_settings_version(), tuple(self._skeleton))
+		try:
+			hash(key)
+		except TypeError:
+			# A command field holds a mutable value.
+			return None
+		return key
+
+
+def _commandKey(command):
+	"""
+	The class and fields of a speech command, which decide how it is spoken,
+	or None if they can't be read from the command.
+	"""
+	try:
+		fields = vars(command)
+	except TypeError:
+		return None
+	return command.__class__, tuple(sorted(fields.items()))
+
 
 class SynthDriver(SynthDriver):
 	name = "WorldVoice"
@@ -300,6 +376,9 @@ class SynthDriver(SynthDriver):
 		nvdaLog.debug("WorldVoice init timing: WVStart.notify %.3fs", time.perf_counter() - step_start)
 
 		self.order = 0
+		self._speechPlans = LRUCache(maxsize=SPEECH_PLAN_CACHE_SIZE, maxcost=SPEECH_PLAN_CACHE_COST)
+		# (count, total seconds, max seconds) to the first queued step, by plan source.
+		self._firstChunkTimes = {}
 
 		step_start = time.perf_counter()
 		apply_worldvoice_pipeline()
@@ -316,6 +395,7 @@ class SynthDriver(SynthDriver):
 
 		step_start = time.perf_counter()
 		self._voiceManager = VoiceManager(taskManager=self.taskManager)
+		self._voiceManager.catalogChanged.register(self._onVoiceCatalogChanged)
 		nvdaLog.debug("WorldVoice init timing: VoiceManager %.3fs", time.perf_counter() - step_start)
 
 		step_start = time.perf_counter()
@@ -333,7 +413,8 @@ class SynthDriver(SynthDriver):
 
 		step_start = time.perf_counter()
 		self._languageDetector = languageDetection.LanguageDetector(list(self._voiceManager.allLanguages), self.speechSymbols)
-		self.add_detected_language_commands = listable(self._languageDetector.add_detected_language_commands)
+		# Looked up per call, the detector is rebuilt when more engines come up.
+		self.add_detected_language_commands = listable(lambda speechSequence: self._languageDetector.add_detected_language_commands(speechSequence))
 		nvdaLog.debug("WorldVoice init timing: LanguageDetector %.3fs", time.perf_counter() - step_start)
 
 		self._voice = None
@@ -341,6 +422,8 @@ class SynthDriver(SynthDriver):
 
 	def terminate(self):
 		clear_pipeline()
+		invalidate_pipeline_settings()
+		languageDetection.invalidate_detector_config()
 
 		gui.settingsDialogs.VoiceSettingsPanel = self.OriginVoiceSettingsPanel
 
@@ -351,14 +434,35 @@ class SynthDriver(SynthDriver):
 		except BaseException:
 			nvdaLog.error("WorldVoice terminate", exc_info=True)
 
+		nvdaLog.debug("WorldVoice speech plan cache: %s", self._speechPlans.stats())
+		nvdaLog.debug("WorldVoice first chunk latency: %s", self.latency_stats())
+		self._speechPlans.clear()
+		nvdaLog.debug("WorldVoice language detection cache: %s", self._languageDetector.cache_stats())
+		nvdaLog.debug("WorldVoice inter-chunk gaps: %s", self.taskManager.gap_stats())
+		nvdaLog.debug("WorldVoice engine watchdog: %s", self.taskManager.engine_stats())
+		nvdaLog.debug("WorldVoice resident voices: %s", self._voiceManager.residentVoiceStats())
+		nvdaLog.debug("WorldVoice dedicated cores: %s", self._voiceManager.dedicatedCoreStats())
+		self._languageDetector.clear_cache()
+
+		self._voiceManager.catalogChanged.unregister(self._onVoiceCatalogChanged)
 		self._voiceManager.terminate()
 		self._voiceManager = None
 
 		WVEnd.notify()
 
+	def _onVoiceCatalogChanged(self):
+		"""Take in the voices of an engine that finished starting in the background."""
+		if not hasattr(self, "_languageDetector"):
+			# Still in __init__, the detector is built from the full catalog.
+			return
+		self._languageDetector = languageDetection.LanguageDetector(list(self._voiceManager.allLanguages), self.speechSymbols)
+		self.__dict__.pop("_availableVoices", None)
+		self.invalidateSpeechPlans()
+
 	def loadSettings(self, *args, **kwargs):
 		super().loadSettings(*args, **kwargs)
 		self._voiceManager.reload()
+		self.invalidateSpeechPlans()
 		save_pipeline_settings(get_effective_pipeline_settings(synth=self))
 
 	def saveSettings(self, *args, **kwargs):
@@ -367,8 +471,54 @@ class SynthDriver(SynthDriver):
 
 	def speak(self, speechSequence):
 		self.order = 0
+		start = time.perf_counter()
+		planKey = _SpeechPlanKey()
+		if isinstance(speechSequence, list):
+			# What NVDA passes: keying it is one cheap pass, which allows to replay a cached plan.
+			for command in speechSequence:
+				planKey.add(command)
+			key = planKey.key()
+			plan = self._speechPlans.get(key) if key is not None else None
+			if plan is not None:
+				self._runSpeechPlan(plan, planKey.indexes, start, "cached")
+				return
+		else:
+			# Keyed while it streams, so nothing is held back before the first chunk.
+			speechSequence = planKey.track(speechSequence)
+
+		# A plan resolved while an engine is still starting lacks its voices.
+		cacheable = self._voiceManager.enginesReady
+		# Steps are dispatched as soon as they are resolved, so the first chunk
+		# starts while the rest of the utterance is still being detected.
+		plan = []
+		self._runSpeechPlan(
+			self._iterSpeechPlan(speechSequence, planKey.slots, plan),
+			planKey.indexes,
+			start,
+			"streamed",
+		)
+		key = planKey.key()
+		if cacheable and key is not None:
+			self._speechPlans.put(key, plan, cost=sum(len(i) if isinstance(i, str) else 1 for i in key[1]))
+
+	def invalidateSpeechPlans(self):
+		"""Forget cached speech plans after a change to voices, roles or language detection."""
+		self._speechPlans.clear()
+		voiceManager = getattr(self, "_voiceManager", None)
+		if voiceManager:
+			voiceManager.invalidateLanguageVoices()
+
+	def _iterSpeechPlan(self, speechSequence, slots, plan):
+		"""
+		Resolve an utterance into (voice instance, chunks) speak steps and
+		(voice instance, seconds) break steps, yielding each step as soon as it
+		is complete. Every yielded step is also appended to *plan*. IndexCommands
+		are replaced by their _IndexSlot in *slots*, which may still be filled
+		while the utterance streams in.
+		"""
+
 		if self.uwv and config.conf["WorldVoice"]['autoLanguageSwitching']['DetectLanguageTiming'] == 'after':
-			speechSequence = self.add_detected_language_commands(speechSequence)
+			speechSequence = self._languageDetector.add_detected_language_commands(speechSequence)
 
 		speechSequence = inject_langchange_reorder(speechSequence)
 		speechSequence = deduplicate_language_command(speechSequence)
@@ -380,8 +530,6 @@ class SynthDriver(SynthDriver):
 		)
 
 		chunks = []
-		hasText = False
-		charMode = False
 
 		voiceInstance = self._voiceManager.defaultVoiceInstance
 
@@ -389,21 +537,63 @@ class SynthDriver(SynthDriver):
 			if voiceInstance.engine in READY_ENGINE_CLASS.keys():
 				if isinstance(command, Voice):
 					newInstance = command
+					if newInstance is voiceInstance:
+						continue
 					if chunks:
-						voiceInstance.speak(chunks)
+						plan.append((voiceInstance, chunks))
+						yield plan[-1]
 					chunks = []
 					voiceInstance = newInstance
+				elif isinstance(command, BreakCommand) and voiceInstance.nativeBreaks:
+					# Pauses go into the engine's own markup, so the voice keeps one speak call.
+					chunks.append(command)
 				elif isinstance(command, BreakCommand):
 					if chunks:
-						voiceInstance.speak(chunks)
+						plan.append((voiceInstance, chunks))
+						yield plan[-1]
 					chunks = []
-					voiceInstance.breaks(command.time / 1000)
+					plan.append((voiceInstance, command.time / 1000))
+					yield plan[-1]
+				elif isinstance(command, IndexCommand):
+					chunks.append(slots[id(command)])
 				else:
 					chunks.append(command)
 
 		if voiceInstance.engine in READY_ENGINE_CLASS.keys():
 			if chunks:
-				voiceInstance.speak(chunks)
+				plan.append((voiceInstance, chunks))
+				yield plan[-1]
+
+	def _runSpeechPlan(self, plan, indexes, start, source):
+		first = True
+		for voiceInstance, step in plan:
+			if isinstance(step, list):
+				self._voiceManager.useVoice(voiceInstance)
+				voiceInstance.speak([indexes[i.ordinal] if isinstance(i, _IndexSlot) else i for i in step])
+			else:
+				voiceInstance.breaks(step)
+			if first:
+				first = False
+				latency = time.perf_counter() - start
+				count, total, longest = self._firstChunkTimes.get(source, (0, 0.0, 0.0))
+				self._firstChunkTimes[source] = (count + 1, total + latency, max(longest, latency))
+				nvdaLog.debug(
+					"WorldVoice speak timing: first chunk dispatched %.3fms (%s, %d chunk items)",
+					latency * 1000,
+					source,
+					len(step) if isinstance(step, list) else 0,
+				)
+
+	def latency_stats(self):
+		"""Time from speak being called to the first step of the utterance being queued, by plan source."""
+		return {
+			source: {
+				"count": count,
+				"mean_ms": total / count * 1000,
+				"max_ms": longest * 1000,
+			}
+			for source, (count, total, longest) in self._firstChunkTimes.items()
+		}
 
 	def patchedSpeakSpelling(self, text, locale=None, useCharacterDescriptions=False, priority=None):
 		if self.uwv \
@@ -417,12 +607,7 @@ class SynthDriver(SynthDriver):
 		self._voiceManager.cancel()
 
 	def pause(self, switch):
-		if switch:
-			if self.taskManager._current_voice:
-				self.taskManager._current_voice.pause()
-		else:
-			if self.taskManager._current_voice:
-				self.taskManager._current_voice.resume()
+		self.taskManager.pause(switch)
 
 	def _get_volume(self):
 		return self._voiceManager.defaultVoiceInstance.volume
@@ -480,6 +665,7 @@ class SynthDriver(SynthDriver):
 		# See NVDA ticket #3540
 		self._voiceManager.defaultVoiceInstance.stop()
 		self._voiceManager.defaultVoiceName = voiceName
+		self.invalidateSpeechPlans()
 
 	def _get_availableVariants(self):
 		values = OrderedDict([("default", StringParameterInfo("default", _("default")))])
@@ -511,6 +697,7 @@ class SynthDriver(SynthDriver):
 	def _set_uwv(self, value):
 		self._uwv = value
 		self.detect_language_timing()
+		self.invalidateSpeechPlans()
 
 	def detect_language_timing(self):
 		if self.uwv and config.conf["WorldVoice"]['autoLanguageSwitching']['DetectLanguageTiming'] == 'before':
@@ -524,12 +711,8 @@ class SynthDriver(SynthDriver):
 
 	def _set_cni(self, value):
 		self._cni = value
-		if value:
-			filter_speechSequence.register(ignore_comma_between_number)
-			order_move_to_start_register()
-		else:
-			filter_speechSequence.unregister(ignore_comma_between_number)
 		config.conf["WorldVoice"]["pipeline"]["ignore_comma_between_number"] = self.cni
+		invalidate_pipeline_settings()
 
 	def _get_availableNumlans(self):
 		return dict(
@@ -537,7 +720,7 @@ class SynthDriver(SynthDriver):
 				"default": StringParameterInfo("default", _("default")),
 			},
 			**{
-				locale: StringParameterInfo(locale, name) for locale, name in zip(self._voiceManager.languages, list(map(self._getLocaleReadableName, self._voiceManager.languages)))
+				locale: StringParameterInfo(locale, self._getLocaleReadableName(locale)) for locale in self._voiceManager.languages
 			}
 		)
 
@@ -559,6 +742,7 @@ class SynthDriver(SynthDriver):
 	def _set_nummod(self, value):
 		self._nummod = value
 		config.conf["WorldVoice"]["pipeline"]["number_mode"] = self.nummod
+		invalidate_pipeline_settings()
 
 	def _get_globalwaitfactor(self):
 		return self._globalwaitfactor * 10
@@ -567,6 +751,7 @@ class SynthDriver(SynthDriver):
 		self._globalwaitfactor = value // 10
 		self._voiceManager.waitfactor = min(value // 10, 9)
 		config.conf["WorldVoice"]["pipeline"]["global_wait_factor"] = self.globalwaitfactor
+		invalidate_pipeline_settings()
 
 	def _get_numberwaitfactor(self):
 		return self._numberwaitfactor
@@ -574,18 +759,15 @@ class SynthDriver(SynthDriver):
 	def _set_numberwaitfactor(self, value):
 		self._numberwaitfactor = value
 		config.conf["WorldVoice"]["pipeline"]["number_wait_factor"] = self.numberwaitfactor
+		invalidate_pipeline_settings()
 
 	def _get_itemwaitfactor(self):
 		return self._itemwaitfactor
 
 	def _set_itemwaitfactor(self, value):
 		self._itemwaitfactor = value
-		if value > 0:
-			filter_speechSequence.register(item_wait_factor)
-			order_move_to_start_register()
-		else:
-			filter_speechSequence.unregister(item_wait_factor)
 		config.conf["WorldVoice"]["pipeline"]["item_wait_factor"] = self.itemwaitfactor
+		invalidate_pipeline_settings()
 
 	def _get_sayallwaitfactor(self):
 		return self._sayallwaitfactor
@@ -593,6 +775,7 @@ class SynthDriver(SynthDriver):
 	def _set_sayallwaitfactor(self, value):
 		self._sayallwaitfactor = value
 		config.conf["WorldVoice"]["pipeline"]["sayall_wait_factor"] = self.sayallwaitfactor
+		invalidate_pipeline_settings()
 
 	def _get_chinesespacewaitfactor(self):
 		return self._chinesespacewaitfactor
@@ -600,6 +783,7 @@ class SynthDriver(SynthDriver):
 	def _set_chinesespacewaitfactor(self, value):
 		self._chinesespacewaitfactor = value
 		config.conf["WorldVoice"]["pipeline"]["chinesespace_wait_factor"] = self.chinesespacewaitfactor
+		invalidate_pipeline_settings()
 
 	def patchedLengthSpeechSequence(self, speechSequence):
 		result = []
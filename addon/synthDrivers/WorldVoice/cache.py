@@ -0,0 +1,74 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Hashable
+
+
+class LRUCache:
+	"""
+	A bounded least-recently-used mapping with hit/miss statistics.
+
+	Entries are evicted when either the entry count exceeds *maxsize* or the
+	summed cost of the entries exceeds *maxcost*.
+	"""
+
+	def __init__(self, maxsize: int = 256, maxcost: int | None = None):
+		self.maxsize = maxsize
+		self.maxcost = maxcost
+		self._data: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+		self._lock = threading.Lock()
+		self._cost = 0
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self):
+		return len(self._data)
+
+	@property
+	def cost(self) -> int:
+		return self._cost
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			try:
+				value, _ = self._data[key]
+			except KeyError:
+				self.misses += 1
+				return default
+			self._data.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key: Hashable, value: Any, cost: int = 1) -> None:
+		if self.maxcost is not None and cost > self.maxcost:
+			return
+		with self._lock:
+			previous = self._data.pop(key, None)
+			if previous is not None:
+				self._cost -= previous[1]
+			self._data[key] = (value, cost)
+			self._cost += cost
+			while self._data and (
+				len(self._data) > self.maxsize
+				or (self.maxcost is not None and self._cost > self.maxcost)
+			):
+				_, (_, evicted_cost) = self._data.popitem(last=False)
+				self._cost -= evicted_cost
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+			self._cost = 0
+
+	def stats(self) -> dict[str, Any]:
+		return {
+			"entries": len(self._data),
+			"cost": self._cost,
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": self.hit_rate,
+		}
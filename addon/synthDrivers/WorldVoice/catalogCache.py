@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Iterable
+
+from logHandler import log
+
+
+# Bump when the stored voice metadata changes shape.
+CATALOG_CACHE_VERSION = 1
+
+
+def fingerprint(paths: Iterable[str]) -> str:
+	"""
+	Hash the names, sizes and modification times of everything below *paths*.
+	Installing, removing or updating voice data changes the result.
+	"""
+	digest = hashlib.sha1()
+	for root in sorted(set(paths)):
+		digest.update(root.encode("utf-8", "surrogatepass"))
+		if not os.path.isdir(root):
+			digest.update(b"\0missing")
+			continue
+		for dirpath, dirnames, filenames in os.walk(root):
+			dirnames.sort()
+			for name in sorted(filenames):
+				path = os.path.join(dirpath, name)
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				entry = "%s\0%d\0%d\n" % (os.path.relpath(path, root), st.st_size, st.st_mtime_ns)
+				digest.update(entry.encode("utf-8", "surrogatepass"))
+	return digest.hexdigest()
+
+
+class VoiceCatalogCache:
+	"""
+	The voice lists of the engines, stored as JSON next to the NVDA configuration.
+	Each engine entry is only valid for the resource fingerprint it was stored with.
+	"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._lock = threading.Lock()
+		self._engines: dict[str, dict[str, Any]] = {}
+		self._dirty = False
+
+	def load(self) -> None:
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+		except FileNotFoundError:
+			return
+		except (OSError, ValueError) as e:
+			log.warning("WorldVoice voice catalog cache unreadable: %s", e)
+			return
+		if not isinstance(data, dict) or data.get("version") != CATALOG_CACHE_VERSION:
+			return
+		engines = data.get("engines")
+		if isinstance(engines, dict):
+			self._engines = engines
+
+	def get(self, engine: str, fingerprint: str) -> list[dict[str, str]] | None:
+		with self._lock:
+			entry = self._engines.get(engine)
+		if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+			return None
+		voices = entry.get("voices")
+		return voices if isinstance(voices, list) else None
+
+	def put(self, engine: str, fingerprint: str, voices: list[dict[str, str]]) -> None:
+		entry = {"fingerprint": fingerprint, "voices": voices}
+		with self._lock:
+			if self._engines.get(engine) != entry:
+				self._engines[engine] = entry
+				self._dirty = True
+
+	def save(self) -> None:
+		with self._lock:
+			if not self._dirty:
+				return
+			data = {"version": CATALOG_CACHE_VERSION, "engines": dict(self._engines)}
+			self._dirty = False
+		tmp = self.path + ".tmp"
+		try:
+			with open(tmp, "w", encoding="utf-8") as f:
+				json.dump(data, f, ensure_ascii=False)
+			os.replace(tmp, self.path)
+		except OSError as e:
+			log.warning("WorldVoice voice catalog cache not saved: %s", e)
@@ -1,7 +1,7 @@
 import languageHandler
 import locale
 
-from .driver import SynthDriver
+from .driver import SynthDriver, getResourcePaths
 from .driver import TtsSetParamList
 from .driver import ttsapi
 from .driver.ttsapi.veTypes import VE_PARAM_LANGUAGE, VE_PARAM_VOICE_OPERATING_POINT, VeError
@@ -12,6 +12,7 @@ class Voice(Voice):
 	core = None
 	engine = "Cerence"
 	synth_driver_class = SynthDriver
+	nativeInstances = True
 
 	@property
 	def variant(self):
@@ -50,6 +51,13 @@ class Voice(Voice):
 		if self.core:
 			self.core.waitfactor = value
 
+	def release(self):
+		return bool(self.core) and self.core.closeVoiceInstance(self.id)
+
+	@classmethod
+	def resourcePaths(cls):
+		return getResourcePaths()
+
 	@classmethod
 	def voices(cls):
 		result = []
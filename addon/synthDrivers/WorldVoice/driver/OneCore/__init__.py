@@ -6,11 +6,18 @@ class Voice(Voice):
 	core = None
 	engine = "OneCore"
 	synth_driver_class = SynthDriver
+	# The synthesizer options outlive a voice change.
+	keepsParametersOnVoiceChange = True
+	supportsDedicatedCore = True
 
 	def __init__(self, id, name, taskManager, language=None):
 		super().__init__(id=id, name=name, taskManager=taskManager, language=language)
 		self.core.language = self.language
 
+	def openDedicatedCore(self, core=None):
+		super().openDedicatedCore(core)
+		self.core.language = self.language
+
 	@classmethod
 	def supportedSettings(cls):
 		return ['voice', 'rate', 'rateBoost', 'pitch', 'volume', 'useWasapi']
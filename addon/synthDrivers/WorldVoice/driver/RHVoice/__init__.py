@@ -1,4 +1,4 @@
-from .driver import SynthDriver
+from .driver import SynthDriver, config_path, get_resource_paths
 from synthDrivers.WorldVoice.driver import Voice
 
 
@@ -6,3 +6,10 @@ class Voice(Voice):
 	core = None
 	engine = "RHVoice"
 	synth_driver_class = SynthDriver
+	# Parameters are kept by the driver and applied per utterance.
+	keepsParametersOnVoiceChange = True
+
+	@classmethod
+	def resourcePaths(cls):
+		# Voice profiles are defined in the RHVoice configuration.
+		return [path.decode("utf-8") for path in get_resource_paths()] + [config_path]
@@ -39,6 +39,7 @@ from synthDriverHandler import (
     VoiceInfo
 )
 from speech.commands import (
+    BreakCommand,
     CharacterModeCommand,
     IndexCommand,
     LangChangeCommand,
@@ -60,6 +61,26 @@ config_path = os.path.join(globalVars.appArgs.configPath, "RHVoice-config")
 data_addon_name_pattern = re.compile("^RHVoice-.*(voice|language).*")
 
 
+def get_resource_paths():
+    user_folder = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))))))
+    VOICE_PATH = os.path.join(user_folder, "WorldVoice-workspace", "RHVoice", "voice")
+    workspaces = []
+    if os.path.isdir(VOICE_PATH):
+        workspaces = [os.path.join(addon_path, name).encode("utf-8")
+            for addon_name in sorted(os.listdir(VOICE_PATH))
+            if data_addon_name_pattern.match(addon_name)
+            for addon_path in [os.path.join(VOICE_PATH, addon_name)]
+            for name in ["data", "langdata", "lang2data"]
+            if os.path.isdir(os.path.join(addon_path, name))]
+
+    addons = [os.path.join(addon.path, name).encode("utf-8")
+        for addon in addonHandler.getRunningAddons()
+        if data_addon_name_pattern.match(addon.name)
+        for name in ["data", "langdata", "lang2data"]
+        if os.path.isdir(os.path.join(addon.path, name))]
+    return addons + workspaces
+
+
 class RHVoice_tts_engine_struct(Structure):
     pass
 
@@ -185,6 +206,7 @@ class AudioPlayer:
         self.__players = {}
         self.__lock = threading.Lock()
         self.__closed = False
+        self.__capture = None
 
     def do_get_player(self):
         if self.__closed:
@@ -223,7 +245,23 @@ class AudioPlayer:
         with self.__lock:
             self.__sample_rate = sr
 
+    @property
+    def capturing(self):
+        return self.__capture is not None
+
+    def start_capture(self):
+        self.__capture = []
+
+    def stop_capture(self):
+        """Return the captured sample rate and (data, index) segments."""
+        segments = self.__capture
+        self.__capture = None
+        return self.__sample_rate, segments
+
     def do_play(self, data, index=None):
+        if self.__capture is not None:
+            self.__capture.append((data, index))
+            return
         player = self.get_player()
         if player is not None and not self.__cancel_flag.is_set():
             if index is None:
@@ -345,6 +383,8 @@ class DoneCallback:
             if self.__cancel_flag.is_set():
                 return
             self.__player.on_done()
+            if self.__player.capturing:
+                return
             self.__player.idle()
             if self.__cancel_flag.is_set():
                 return
@@ -410,6 +450,43 @@ class SpeakText:
             self.__lib.RHVoice_delete_message(msg)
 
 
+class RenderText:
+    def __init__(self, task, player):
+        self.__task = task
+        self.__player = player
+        self.done = threading.Event()
+        self.result = None
+
+    def __call__(self):
+        self.__player.start_capture()
+        try:
+            self.__task()
+        finally:
+            self.result = self.__player.stop_capture()
+            self.done.set()
+
+
+class PlayRendered:
+    def __init__(self, synth, player, cancel_flag, sample_rate, segments):
+        self.__synth = synth
+        self.__player = player
+        self.__cancel_flag = cancel_flag
+        self.__sample_rate = sample_rate
+        self.__segments = segments
+
+    def __call__(self):
+        if self.__cancel_flag.is_set():
+            return
+        if self.__sample_rate:
+            self.__player.set_sample_rate(self.__sample_rate)
+        for data, index in self.__segments:
+            self.__player.do_play(data, index)
+        self.__player.idle()
+        if self.__cancel_flag.is_set():
+            return
+        synthDoneSpeaking.notify(synth=self.__synth)
+
+
 class TTSThread(threading.Thread):
     def __init__(self, tts_queue):
         self.__queue = tts_queue
@@ -474,7 +551,8 @@ class SynthDriver(SynthDriver):
         LangChangeCommand,
         PitchCommand,
         RateCommand,
-        VolumeCommand
+        VolumeCommand,
+        BreakCommand
 	}
     supportedNotifications = {synthIndexReached, synthDoneSpeaking}
 
@@ -494,23 +572,7 @@ class SynthDriver(SynthDriver):
         return (lang1[1] == lang2[1])
 
     def __get_resource_paths(self):
-        user_folder = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))))))
-        VOICE_PATH = os.path.join(user_folder, "WorldVoice-workspace", "RHVoice", "voice")
-        workspaces = []
-        if os.path.isdir(VOICE_PATH):
-            workspaces = [os.path.join(addon_path, name).encode("utf-8")
-                for addon_name in sorted(os.listdir(VOICE_PATH))
-                if data_addon_name_pattern.match(addon_name)
-                for addon_path in [os.path.join(VOICE_PATH, addon_name)]
-                for name in ["data", "langdata", "lang2data"]
-                if os.path.isdir(os.path.join(addon_path, name))]
-
-        addons = [os.path.join(addon.path, name).encode("utf-8")
-            for addon in addonHandler.getRunningAddons()
-            if data_addon_name_pattern.match(addon.name)
-            for name in ["data", "langdata", "lang2data"]
-            if os.path.isdir(os.path.join(addon.path, name))]
-        return addons + workspaces
+        return get_resource_paths()
 
     def __init__(self):
         self.__lib = load_tts_library()
@@ -588,7 +650,7 @@ class SynthDriver(SynthDriver):
         self.__lib.RHVoice_delete_tts_engine(self.__tts_engine)
         self.__tts_engine = None
 
-    def speak(self, speechSequence):
+    def __make_speak_task(self, speechSequence):
         conv = SsmlConverter(self, self.language)
         text = conv.convertToXml(speechSequence)
         task = SpeakText(self.__lib, self.__tts_engine, text, self.__cancel_flag, self.__player)
@@ -597,7 +659,31 @@ class SynthDriver(SynthDriver):
         task.set_pitch(self.__pitch)
         task.set_volume(self.__volume)
         task.configure_rate_boost(self.__rate_boost)
-        self.__tts_queue.put(task)
+        return task
+
+    def speak(self, speechSequence):
+        self.__tts_queue.put(self.__make_speak_task(speechSequence))
+
+    def render(self, speechSequence, token):
+        """
+        Synthesize speechSequence to memory on the tts thread.
+        Returns a callable that queues the result for playing like speak would, or None if token got cancelled.
+        """
+        task = RenderText(self.__make_speak_task(speechSequence), self.__player)
+        # Cancelling may take the task off the queue before it runs.
+        token.add_callback(self.cancel)
+        token.add_callback(task.done.set)
+        try:
+            self.__tts_queue.put(task)
+            task.done.wait()
+        finally:
+            token.remove_callback(self.cancel)
+            token.remove_callback(task.done.set)
+        if token.is_cancelled() or task.result is None:
+            return None
+        sample_rate, segments = task.result
+        play = PlayRendered(self, self.__player, self.__cancel_flag, sample_rate, segments)
+        return lambda: self.__tts_queue.put(play)
 
     def pause(self, switch):
         self.__player.pause(switch)
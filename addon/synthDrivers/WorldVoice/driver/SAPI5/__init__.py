@@ -6,3 +6,6 @@ class Voice(Voice):
 	core = None
 	engine = "SAPI5"
 	synth_driver_class = SynthDriver
+	# COM objects live in the apartment of the thread that creates them.
+	initOnMainThread = True
+	supportsDedicatedCore = True
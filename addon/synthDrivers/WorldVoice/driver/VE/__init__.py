@@ -2,7 +2,7 @@ import languageHandler
 import locale
 from synthDriverHandler import LanguageInfo
 
-from .driver import SynthDriver, TtsSetParamList
+from .driver import SynthDriver, TtsSetParamList, getResourcePaths
 from .driver import ve2
 from .driver.ve2.veTypes import VE_PARAM_LANGUAGE, VE_PARAM_VOICE_OPERATING_POINT, VeError
 from synthDrivers.WorldVoice.driver import Voice, getVoiceKey
@@ -12,6 +12,7 @@ class Voice(Voice):
 	core = None
 	engine = "VE"
 	synth_driver_class = SynthDriver
+	nativeInstances = True
 
 	@property
 	def variant(self):
@@ -45,6 +46,13 @@ class Voice(Voice):
 		if self.core:
 			self.core.waitfactor = value
 
+	def release(self):
+		return bool(self.core) and self.core.closeVoiceInstance(self.id)
+
+	@classmethod
+	def resourcePaths(cls):
+		return getResourcePaths()
+
 	@classmethod
 	def voices(cls):
 		result = []
@@ -2,11 +2,9 @@ import math
 import threading
 import unicodedata
 import os
-from io import BytesIO
 from collections import OrderedDict
 from ctypes import *
 
-import buildVersion
 import config
 import nvwave
 import languageHandler
@@ -20,6 +18,7 @@ from logHandler import log
 
 from . import ve2
 from .ve2.veTypes import *
+from synthDrivers.WorldVoice.driver.veAudio import DoneSpeaking, PCMCapture, PlayRendered, VEBuffers
 
 addonHandler.initTranslation()
 
@@ -74,56 +73,13 @@ def getAvailableResources():
 
 	return resources
 
-pcmBufLen = 8192 # 8 Kb
-markBufSize = 100
-
-class VECallback(object):
+class VECallback(VEBuffers):
+	markInfo = VE_MARKINFO
+	engineName = "VE64"
 
 	def __init__(self, player, isSilence, onIndexReached):
-		self._player = player
-		self._isSilence = isSilence
+		super().__init__(player, isSilence)
 		self._onIndexReached = onIndexReached
-		# allocate PCM and mark buffers
-		self._pcmBuf = (c_byte * pcmBufLen)()
-		self._markBuf = (VE_MARKINFO * markBufSize)()
-		self._feedBuf = BytesIO()
-		self._sampleRate = 22050
-		self._sonicInitTried = False
-		self._sonicEnabled = False
-		self._sonicSpeed = 1.0
-		self.sonicStream = None
-
-	def _ensureSonicStream(self):
-		if self._sonicEnabled:
-			return True
-		if self._sonicInitTried:
-			return False
-		self._sonicInitTried = True
-		try:
-			if buildVersion.version_year >= 2025:
-				from synthDrivers._sonic import SonicStream, initialize as sonicInitialize
-			else:
-				from synthDrivers.WorldVoice.driver.sonic._sonic import SonicStream, initialize as sonicInitialize
-			sonicInitialize()
-			self.sonicStream = SonicStream(self._sampleRate, 1)
-			self.sonicStream.speed = self._sonicSpeed
-			self._sonicEnabled = True
-			return True
-		except Exception:
-			log.warning("Sonic unavailable in VE64; using native speed path.", exc_info=True)
-			self.sonicStream = None
-			self._sonicEnabled = False
-			return False
-
-	def getSpeed(self):
-		if self._sonicEnabled and self.sonicStream is not None:
-			return float(self.sonicStream.speed)
-		return float(self._sonicSpeed)
-
-	def setSpeed(self, speed):
-		self._sonicSpeed = float(speed)
-		if self._sonicEnabled and self.sonicStream is not None:
-			self.sonicStream.speed = self._sonicSpeed
 
 	def __call__(self, instance, userData, message):
 		""" Callback to handle assynchronous requests and messages from the synthecizer. """
@@ -131,50 +87,33 @@ class VECallback(object):
 			outData = cast(message.contents.pParam, POINTER(VE_OUTDATA))
 			messageType = message.contents.eMessage
 			if self._isSilence.isSet() and messageType != VE_MSG_ENDPROCESS:
-				self._feedBuf = BytesIO()
+				self._feedLen = 0
 				return NUAN_E_TTS_USERSTOP
 			elif messageType == VE_MSG_OUTBUFREQ:
 				# Request for storage to put sound and mark data.
 				# Here we fill the pointers to our already allocated buffers (on initialize).
-				outData.contents.pOutPcmBuf = cast(self._pcmBuf, c_void_p)
-				outData.contents.cntPcmBufLen = c_size_t(pcmBufLen)
-				outData.contents.pMrkList = cast(self._markBuf, POINTER(VE_MARKINFO))
-				outData.contents.cntMrkListLen = c_size_t(markBufSize * sizeof(VE_MARKINFO))
+				pcmBuf, pcmLen, markBuf = self._requestBuffers()
+				outData.contents.pOutPcmBuf = cast(pcmBuf, c_void_p)
+				outData.contents.cntPcmBufLen = c_size_t(pcmLen)
+				outData.contents.pMrkList = cast(markBuf, POINTER(VE_MARKINFO))
+				outData.contents.cntMrkListLen = c_size_t(len(markBuf) * sizeof(VE_MARKINFO))
 			elif messageType == VE_MSG_OUTBUFDONE:
-				# Sound data and mark buffers were produced by vocalizer.
-				# Send wave data to be played:
-				if outData.contents.cntPcmBufLen > 0:
-					if self._ensureSonicStream():
-						self.sonicStream.writeShort(
-							outData.contents.pOutPcmBuf,
-							outData.contents.cntPcmBufLen // 2,
-						)
-						spedArr = self.sonicStream.readShort()
-						if spedArr:
-							self._feedBuf.write(bytes(spedArr))
-						if self._feedBuf.tell() >= pcmBufLen:
-							self._player.feed(self._feedBuf.getvalue())
-							self._feedBuf = BytesIO()
-					else:
-						data = string_at(outData.contents.pOutPcmBuf, outData.contents.cntPcmBufLen)
-						self._player.feed(data)
+				# Sound data and mark buffers were produced by the engine.
+				# Send wave data to be played, the player copies it out of our buffers:
+				produced = outData.contents.cntPcmBufLen
+				self._feedPcm(outData.contents.pOutPcmBuf, produced)
 				# Make sure that the speech is not interrupted by the user
 				if self._isSilence.isSet():
-					self._feedBuf = BytesIO()
+					self._feedLen = 0
 					return NUAN_E_TTS_USERSTOP
 				# And check for bookmarks
-				for i in range(int(outData.contents.cntMrkListLen)):
+				marks = int(outData.contents.cntMrkListLen)
+				for i in range(marks):
 					if outData.contents.pMrkList[i].eMrkType == VE_MRK_BOOKMARK:
 						self._onIndexReached(outData.contents.pMrkList[i].ulMrkId)
+				self._bufferDone(produced, marks)
 			elif messageType == VE_MSG_ENDPROCESS:
-				if self._sonicEnabled and self.sonicStream is not None:
-					self.sonicStream.flush()
-					tailArr = self.sonicStream.readShort()
-					if tailArr and not self._isSilence.isSet():
-						self._feedBuf.write(bytes(tailArr))
-				if self._feedBuf.tell() and not self._isSilence.isSet():
-					self._player.feed(self._feedBuf.getvalue())
-				self._feedBuf = BytesIO()
+				self._endProcess()
 		except:
 			log.error("Vocalizer callback", exc_info=True)
 		return NUAN_OK
@@ -205,16 +144,6 @@ class TtsSetParamList(object):
 	def __call__(self):
 		ve2.setParamList(self._instance, *self._idAndValues)
 
-class DoneSpeaking(object):
-
-	def __init__(self, player, onIndexReached):
-		self._player = player
-		self._onIndexReached = onIndexReached
-
-	def __call__(self):
-		self._player.idle()
-		self._onIndexReached(None)
-
 class SynthDriver(SynthDriver):
 	name = "vocalizer_expressive2"
 	description = "Nuance Vocalizer expressive 2.2"
@@ -255,6 +184,8 @@ class SynthDriver(SynthDriver):
 		ve2.initialize(resources)
 
 		self._instanceCache = {}
+		# Parameters of instances closed to save memory, applied again when they reopen.
+		self._closedParameters = {}
 
 		try:
 			# Audio device used since NVDA 2025.1
@@ -306,9 +237,27 @@ class SynthDriver(SynthDriver):
 		instance, name = ve2.open(voiceName, self._veCallback)
 		log.debug(f"Created synth instance for voice {name}")
 		self._onVoiceTuning(instance, name)
+		parameters = self._closedParameters.pop(name, None)
+		if parameters:
+			TtsSetParamList(instance, *parameters)()
 		self._instanceCache[name] = instance
 		return instance
 
+	def closeVoiceInstance(self, voiceName):
+		"""
+		Close the instance of a voice and free its speech databases.
+		Returns False if the voice had no open instance.
+		"""
+		instance = self._instanceCache.pop(voiceName, None)
+		if instance is None:
+			return False
+		ids = [paramId for paramId, _, _ in VOICE_PARAMETERS]
+		values = ve2.getParamList(instance, *[(paramId, type_) for paramId, _, type_ in VOICE_PARAMETERS])
+		self._closedParameters[voiceName] = tuple(zip(ids, values))
+		ve2.close(instance)
+		log.debug(f"Closed synth instance for voice {voiceName}")
+		return True
+
 	def terminate(self):
 		self.cancel()
 		try:
@@ -322,6 +271,43 @@ class SynthDriver(SynthDriver):
 		self._veCallback = None
 
 	def speak(self, speechSequence):
+		for voiceInstance, chunks in self._iterChunks(speechSequence):
+			self._speak(voiceInstance, chunks)
+		DoneSpeaking(self._player, self._onIndexReached)()
+
+	def render(self, speechSequence, token):
+		"""
+		Synthesize speechSequence to memory while the player may still be busy elsewhere.
+		Returns a callable that plays the result like speak would, or None if token got cancelled.
+		"""
+		capture = PCMCapture()
+		# The render has its own callback and silence event, live speech and
+		# cancel keep using the ones of the driver.
+		isSilence = threading.Event()
+		handler = VECallback(capture, isSilence, capture.mark)
+		handler.setSpeed(self._veCallbackHandler.getSpeed())
+		callback = VE_CBOUTNOTIFY(handler)
+		instances = []
+		token.add_callback(isSilence.set)
+		try:
+			for voiceInstance, chunks in self._iterChunks(speechSequence):
+				if token.is_cancelled():
+					return None
+				if voiceInstance not in instances:
+					ve2.setOutDevice(voiceInstance, callback)
+					instances.append(voiceInstance)
+				ProcessText2Speech(voiceInstance, "".join(chunks))()
+		finally:
+			for voiceInstance in instances:
+				ve2.setOutDevice(voiceInstance, self._veCallback)
+			token.remove_callback(isSilence.set)
+		if token.is_cancelled():
+			return None
+		capture.close()
+		return PlayRendered(self._player, self._isSilence, capture.segments, self._onIndexReached)
+
+	def _iterChunks(self, speechSequence):
+		""" Yields the voice instance and text chunks to synthesize for speechSequence, one voice switch at a time. """
 		currentInstance = defaultInstance = self.voiceInstance
 		currentLanguage = defaultLanguage = self.language
 		chunks = []
@@ -373,7 +359,7 @@ class SynthDriver(SynthDriver):
 					# Same voice, next command.
 					continue
 				if hasText: # We changed voice, send text we already have to vocalizer.
-					self._speak(currentInstance, chunks)
+					yield currentInstance, chunks
 					chunks = []
 					hasText = False
 				currentInstance = newInstance
@@ -406,8 +392,7 @@ class SynthDriver(SynthDriver):
 			else:
 				log.error(f"Unknown speech: {command}")
 		if chunks:
-			self._speak(currentInstance, chunks)
-		DoneSpeaking(self._player, self._onIndexReached)()
+			yield currentInstance, chunks
 
 	def _speak(self, voiceInstance, chunks):
 		text = "".join(chunks)
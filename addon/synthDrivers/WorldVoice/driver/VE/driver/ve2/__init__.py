@@ -136,10 +136,14 @@ def open(voice, callback):
 	)
 
 	# Set callback
+	setOutDevice(instance, callback)
+	return (instance, voice)
+
+def setOutDevice(instance, callback):
+	""" Sets the callback receiving the audio and marks of an instance. """
 	outDevInfo = VE_OUTDEVINFO()
 	outDevInfo.pfOutNotify  = callback
 	veDll.ve_ttsSetOutDevice(instance, byref(outDevInfo))
-	return (instance, voice)
 
 def close(instance):
 	""" Closes a tts instance."""
@@ -1,5 +1,11 @@
+import threading
+import time
+
 import config
+import core
 import languageHandler
+from logHandler import log
+from speech.commands import BreakCommand
 from synthDriverHandler import getSynth
 
 
@@ -27,22 +33,118 @@ VOICE_PARAMETERS = [
 ]
 
 
+# Parameters are written to the configuration once they stop changing for this long.
+COMMIT_DELAY = 0.5
+# Parameters kept equal across voices with KeepMainLocaleParameterConsistent.
+SHARED_PARAMETERS = ("rate", "pitch", "volume", "inflection", "rateBoost")
+
+
+class SharedParameters(object):
+	"""
+	Parameters of the main voice published to the other voices, which take them
+	on when they are next used, see Voice.syncSharedParameters.
+	"""
+
+	def __init__(self):
+		self.version = 0
+		self.values = {}
+
+	def publish(self, voice):
+		self.values = {p: getattr(voice, p) for p in SHARED_PARAMETERS}
+		self.version += 1
+		voice._sharedVersion = self.version
+
+
+sharedParameters = SharedParameters()
+
+
+class PendingCommits(object):
+	"""
+	Voices with committed parameters not yet in the configuration. They are
+	written in one batch when no commit came for COMMIT_DELAY.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._voices = {}
+		self._due = 0.0
+		self._scheduled = False
+
+	def add(self, voice):
+		with self._lock:
+			self._voices[voice.name] = voice
+			self._due = time.monotonic() + COMMIT_DELAY
+			if self._scheduled:
+				return
+			self._scheduled = True
+		core.callLater(int(COMMIT_DELAY * 1000), self._onTimer)
+
+	def _onTimer(self):
+		with self._lock:
+			remaining = self._due - time.monotonic()
+			if remaining > 0:
+				core.callLater(int(remaining * 1000) + 1, self._onTimer)
+				return
+			self._scheduled = False
+		self.flush()
+
+	def flush(self):
+		with self._lock:
+			voices = list(self._voices.values())
+		# Voices behind on the shared parameters take them on before they are written.
+		for voice in voices:
+			voice.syncSharedParameters()
+		with self._lock:
+			voices = list(self._voices.values())
+			self._voices.clear()
+		for voice in voices:
+			voice.persist()
+
+
+pendingCommits = PendingCommits()
+
+
+class CoreState(object):
+	"""
+	The voice parameters a core supports and the values last applied to it,
+	so switching voices only pushes what differs.
+	"""
+
+	def __init__(self, core):
+		ids = {i.id for i in core.supportedSettings}
+		self.parameters = tuple(p for p, _, _ in VOICE_PARAMETERS if p in ids and p != "variant")
+		self.applied = {}
+
+
+def coreState(core):
+	try:
+		return core.wvState
+	except AttributeError:
+		core.wvState = state = CoreState(core)
+		return state
+
+
 def percent_property(attr):
 	"""Return a property that keeps self._<attr> in sync with self.core.<attr>."""
 	private_name = f"_{attr}"
 
 	def getter(self):
+		# Read only: a voice behind on the shared parameters reports them, and
+		# takes them on in active() or when its commits are flushed.
+		if self._sharedVersion != sharedParameters.version and attr in sharedParameters.values:
+			return sharedParameters.values[attr]
 		return getattr(self, private_name)
 
 	def setter(self, percent):
+		# Take on the shared parameters first, or they would overwrite this value later.
+		self.syncSharedParameters()
 		setattr(self, private_name, percent)
 
-		if (
-			self.core
-			and getattr(self.core, "voice", None) == self.id
-			and attr in [i.id for i in self.core.supportedSettings]
-		):
-			setattr(self.core, attr, percent)
+		if self.core and getattr(self.core, "voice", None) == self.id:
+			state = coreState(self.core)
+			if attr in state.parameters and state.applied.get(attr) != percent:
+				setattr(self.core, attr, percent)
+				state.applied[attr] = percent
 
 	return property(getter, setter)
 
@@ -51,12 +153,23 @@ class Voice(object):
 	core = None
 	engine = ""
 	synth_driver_class = None
+	# Whether the engine opens a native instance per voice, see release.
+	nativeInstances = False
+	# Engines whose core is bound to the thread it is created on start on the calling thread.
+	initOnMainThread = False
+	# Whether the core keeps rate, pitch and the like when its voice changes.
+	keepsParametersOnVoiceChange = False
+	# Whether several cores of the engine can run side by side, see openDedicatedCore.
+	supportsDedicatedCore = False
 
 	def __init__(self, id, name, taskManager, language=None):
 		self.id = id
 		self.name = name
 		self.language = language or "unknown"
 		self.taskManager = taskManager
+		self._sharedVersion = sharedParameters.version
+		# Parameter values as last read from or written to the configuration.
+		self._persisted = {}
 
 		for p, t, d in VOICE_PARAMETERS:
 			setattr(self, p, t(d))
@@ -127,6 +240,14 @@ class Voice(object):
 
 		return result
 
+	@classmethod
+	def resourcePaths(cls):
+		"""
+		Directories whose content decides the voices of this engine, or None if
+		the voice list cannot be cached across sessions.
+		"""
+		return None
+
 	@classmethod
 	def supportedSettings(cls):
 		if cls.synth_driver_class:
@@ -137,19 +258,43 @@ class Voice(object):
 		else:
 			return []
 
+	@property
+	def nativeBreaks(self):
+		"""Whether the engine renders a BreakCommand within a speak call."""
+		return bool(self.core) and BreakCommand in self.core.supportedCommands
+
 	def index(self, index):
 		raise NotImplementedError
 
 	def active(self):
+		self.syncSharedParameters()
 		if self.core and self.core.voice != self.id:
 			self.setCoreParameter()
 
+	def syncSharedParameters(self):
+		"""Take on the parameters the main voice published since this voice last did."""
+		if self._sharedVersion == sharedParameters.version:
+			return
+		self._sharedVersion = sharedParameters.version
+		for p, value in sharedParameters.values.items():
+			setattr(self, p, value)
+		self.commit()
+
 	def speak(self, text):
 		def _speak():
 			self.active()
 			self.core.speak(text)
+
+		def _render(token):
+			self.active()
+			return self.core.render(text, token)
+
+		# Engines that can synthesize to memory get pre-rendered while the
+		# previous chunk still plays.
+		render = _render if hasattr(self.core, "render") else None
+		size = sum(len(i) for i in text if isinstance(i, str))
 		# self.taskManager.add_dispatch_task((self, _speak),)
-		self.taskManager.add_speak_task(self, _speak)
+		self.taskManager.add_speak_task(self, _speak, size=size, render=render)
 
 	def breaks(self, sec):
 		self.taskManager.add_break_task(self, sec)
@@ -164,7 +309,38 @@ class Voice(object):
 		self.core.pause(False)
 
 	def close(self):
-		pass
+		self.closeDedicatedCore()
+
+	@property
+	def hasDedicatedCore(self):
+		return "core" in self.__dict__
+
+	def newDedicatedCore(self):
+		"""Build a core for openDedicatedCore, on the main thread for engines with initOnMainThread."""
+		core = self.synth_driver_class()
+		core.wv = self.engine
+		return core
+
+	def openDedicatedCore(self, core=None):
+		"""
+		Give this voice a core of its own, so speaking it no longer switches the
+		voice of the core the engine's other voices share. A core built ahead
+		with newDedicatedCore is used as is.
+		"""
+		self.core = core if core is not None else self.newDedicatedCore()
+		self.setCoreParameter()
+
+	def closeDedicatedCore(self):
+		core = self.__dict__.pop("core", None)
+		if core:
+			core.terminate()
+
+	def release(self):
+		"""
+		Free the native instance of this voice while keeping its parameters,
+		the engine opens it again on next use. Returns whether anything was freed.
+		"""
+		return False
 
 	@classmethod
 	def ready(cls):
@@ -182,27 +358,55 @@ class Voice(object):
 			cls.core.terminate()
 			cls.core = None
 
+	def restartEngine(self):
+		"""
+		Replace a core that stopped responding with a new one and apply this voice to it.
+		Called on the main thread, which engines with initOnMainThread require.
+		"""
+		if self.hasDedicatedCore:
+			try:
+				self.closeDedicatedCore()
+			except Exception:
+				log.error("%s dedicated core terminate failed", self.engine, exc_info=True)
+			self.openDedicatedCore()
+			return
+		cls = type(self)
+		try:
+			cls.engineOff()
+		except Exception:
+			log.error("%s engine terminate failed", cls.engine, exc_info=True)
+			cls.core = None
+		cls.engineOn()
+		self.setCoreParameter()
+
 	def setCoreParameter(self):
 		if self.core:
-			self.core.voice = self.id
-			vp = [i[0] for i in VOICE_PARAMETERS]
-			ss = [i.id for i in self.core.supportedSettings]
-			for attr in list(set(ss) & set(vp) - set(["variant"])):
-				private_name = f"_{attr}"
-				percent = getattr(self, private_name)
-				setattr(self.core, attr, percent)
+			state = coreState(self.core)
+			if self.core.voice != self.id:
+				self.core.voice = self.id
+				if not self.keepsParametersOnVoiceChange:
+					state.applied.clear()
+			for attr in state.parameters:
+				percent = getattr(self, f"_{attr}")
+				if state.applied.get(attr) != percent:
+					setattr(self.core, attr, percent)
+					state.applied[attr] = percent
 
 	def loadParameter(self):
 		voiceName = self.name
+		self._persisted = {}
 		if voiceName in config.conf["WorldVoice"]["voices"]:
 			for p, t, _ in VOICE_PARAMETERS:
+				stored = config.conf["WorldVoice"]['voices'][voiceName].get(p, None)
+				if stored is not None:
+					self._persisted[p] = t(stored)
 				if config.conf["WorldVoice"]["autoLanguageSwitching"]["KeepMainLocaleParameterConsistent"]:
 					try:
 						value = config.conf["speech"][getSynth().name].get(p, None)
 					except BaseException:
-						value = config.conf["WorldVoice"]['voices'][voiceName].get(p, None)
+						value = stored
 				else:
-					value = config.conf["WorldVoice"]['voices'][voiceName].get(p, None)
+					value = stored
 				if value is None:
 					continue
 				setattr(self, p, t(value))
@@ -210,32 +414,42 @@ class Voice(object):
 			config.conf["WorldVoice"]["voices"][voiceName] = {}
 			for p, t, d in VOICE_PARAMETERS:
 				config.conf["WorldVoice"]['voices'][voiceName][p] = t(d)
+				self._persisted[p] = t(d)
 				setattr(self, p, t(d))
 
 		for p, t, _ in VOICE_PARAMETERS:
 			value = t(getattr(self, p))
 			setattr(self, "commit_" + p, value)
+		# The values just loaded are current.
+		self._sharedVersion = sharedParameters.version
 
 	def commit(self):
 		for p, t, _ in VOICE_PARAMETERS:
 			value = t(getattr(self, p))
 			setattr(self, "commit_" + p, value)
-
-		voiceName = self.name
-		if voiceName not in config.conf["WorldVoice"]["voices"]:
-			config.conf["WorldVoice"]["voices"][voiceName] = {}
-		for p, t, _ in VOICE_PARAMETERS:
-			value = t(getattr(self, p))
-			config.conf["WorldVoice"]["voices"][voiceName][p] = value
+		self._schedulePersist()
 
 	def rollback(self):
 		for p, t, _ in VOICE_PARAMETERS:
 			value = t(getattr(self, "commit_" + p))
 			setattr(self, p, value)
+		self._schedulePersist()
+
+	def _schedulePersist(self):
+		for p, _, _ in VOICE_PARAMETERS:
+			if self._persisted.get(p) != getattr(self, "commit_" + p):
+				pendingCommits.add(self)
+				return
 
+	def persist(self):
+		"""Write the committed parameters that differ from the configuration."""
 		voiceName = self.name
 		if voiceName not in config.conf["WorldVoice"]["voices"]:
 			config.conf["WorldVoice"]["voices"][voiceName] = {}
-		for p, t, _ in VOICE_PARAMETERS:
-			value = t(getattr(self, p))
-			config.conf["WorldVoice"]["voices"][voiceName][p] = value
+			self._persisted = {}
+		section = config.conf["WorldVoice"]["voices"][voiceName]
+		for p, _, _ in VOICE_PARAMETERS:
+			value = getattr(self, "commit_" + p)
+			if self._persisted.get(p) != value:
+				section[p] = value
+				self._persisted[p] = value
@@ -0,0 +1,205 @@
+"""
+Audio buffers of the VE and Cerence drivers, whose engines hand over their
+PCM through the same output buffer requests.
+"""
+
+import time
+from ctypes import addressof, c_byte, c_void_p, string_at
+from io import BytesIO
+
+import buildVersion
+from logHandler import log
+
+pcmBufLen = 8192 # 8 Kb
+markBufSize = 100
+# Upper bounds for the buffers handed to the engine, which grow towards them
+# while synthesis runs well ahead of playback, see VEBuffers._adapt.
+pcmBufMax = 65536 # 64 Kb
+markBufMax = 1600
+
+
+class VEBuffers(object):
+	"""
+	The PCM and mark buffers offered to the engine and the Sonic feed of a
+	driver's VECallback, which sets markInfo to the VE_MARKINFO of its engine.
+	"""
+	markInfo = None
+	engineName = ""
+
+	def __init__(self, player, isSilence):
+		self._player = player
+		self._isSilence = isSilence
+		# allocate PCM and mark buffers once; the engine is offered _pcmLen bytes
+		# and _markLen marks of them.
+		self._pcmBuf = (c_byte * pcmBufMax)()
+		self._pcmLen = pcmBufLen
+		self._markBuf = (self.markInfo * markBufSize)()
+		self._markLen = markBufSize
+		self._firstBuffer = True
+		self._requestTime = 0.0
+		# Sonic output collected until there is pcmBufLen to play.
+		self._feedBuf = (c_byte * pcmBufMax)()
+		self._feedLen = 0
+		self._sampleRate = 22050
+		self._sonicInitTried = False
+		self._sonicEnabled = False
+		self._sonicSpeed = 1.0
+		self._sonicLib = None
+		self.sonicStream = None
+
+	def _ensureSonicStream(self):
+		if self._sonicEnabled:
+			return True
+		if self._sonicInitTried:
+			return False
+		self._sonicInitTried = True
+		try:
+			if buildVersion.version_year >= 2025:
+				from synthDrivers import _sonic
+			else:
+				from synthDrivers.WorldVoice.driver.sonic import _sonic
+			_sonic.initialize()
+			self.sonicStream = _sonic.SonicStream(self._sampleRate, 1)
+			self.sonicStream.speed = self._sonicSpeed
+			self._sonicLib = _sonic.sonicLib
+			self._sonicEnabled = True
+			return True
+		except Exception:
+			log.warning("Sonic unavailable in %s; using native speed path.", self.engineName, exc_info=True)
+			self.sonicStream = None
+			self._sonicEnabled = False
+			return False
+
+	def getSpeed(self):
+		if self._sonicEnabled and self.sonicStream is not None:
+			return float(self.sonicStream.speed)
+		return float(self._sonicSpeed)
+
+	def setSpeed(self, speed):
+		self._sonicSpeed = float(speed)
+		if self._sonicEnabled and self.sonicStream is not None:
+			self.sonicStream.speed = self._sonicSpeed
+
+	def _requestBuffers(self):
+		""" Returns the PCM buffer, its offered length and the mark buffer for an output buffer request. """
+		self._requestTime = time.perf_counter()
+		# The first buffer of a text stays small so playback starts early.
+		return self._pcmBuf, pcmBufLen if self._firstBuffer else self._pcmLen, self._markBuf
+
+	def _feedPcm(self, pcm, produced):
+		""" Plays what the engine put in the PCM buffer, through Sonic when it is available. """
+		if produced <= 0:
+			return
+		if self._ensureSonicStream():
+			self.sonicStream.writeShort(pcm, produced // 2)
+			self._readSonic()
+			if self._feedLen >= pcmBufLen:
+				self._flushFeed()
+		else:
+			self._player.feed(pcm, size=produced)
+
+	def _bufferDone(self, produced, marks):
+		if not self._firstBuffer:
+			self._adapt(produced, marks)
+		self._firstBuffer = False
+
+	def _endProcess(self):
+		if self._sonicEnabled and self.sonicStream is not None:
+			self.sonicStream.flush()
+			if self._isSilence.isSet():
+				# Drop what Sonic still holds.
+				while self._sonicLib.sonicReadShortFromStream(self.sonicStream.stream, c_void_p(addressof(self._feedBuf)), pcmBufMax // 2) > 0:
+					pass
+			else:
+				self._readSonic()
+		if not self._isSilence.isSet():
+			self._flushFeed()
+		self._feedLen = 0
+		self._firstBuffer = True
+
+	def _adapt(self, produced, marks):
+		""" Size the next buffers from how fast the engine filled the last ones. """
+		if marks >= self._markLen and self._markLen < markBufMax:
+			self._markLen = min(self._markLen * 2, markBufMax)
+			self._markBuf = (self.markInfo * self._markLen)()
+		if produced < self._pcmLen:
+			# The text ended before the buffer filled, which says nothing about the pace.
+			return
+		elapsed = time.perf_counter() - self._requestTime
+		duration = produced / (2.0 * self._sampleRate)
+		if elapsed * 4 < duration:
+			self._pcmLen = min(self._pcmLen * 2, pcmBufMax)
+		elif elapsed * 2 > duration:
+			self._pcmLen = max(self._pcmLen // 2, pcmBufLen)
+
+	def _readSonic(self):
+		""" Read what Sonic has ready straight into the feed buffer. """
+		while True:
+			free = (pcmBufMax - self._feedLen) // 2
+			if not free:
+				self._flushFeed()
+				free = pcmBufMax // 2
+			# NVDA's own _sonic sets no argtypes, so the address goes as a pointer rather than an int.
+			read = self._sonicLib.sonicReadShortFromStream(self.sonicStream.stream, c_void_p(addressof(self._feedBuf) + self._feedLen), free)
+			if read <= 0:
+				return
+			self._feedLen += read * 2
+			if read < free:
+				return
+
+	def _flushFeed(self):
+		if self._feedLen:
+			self._player.feed(self._feedBuf, size=self._feedLen)
+			self._feedLen = 0
+
+
+class DoneSpeaking(object):
+
+	def __init__(self, player, onIndexReached):
+		self._player = player
+		self._onIndexReached = onIndexReached
+
+	def __call__(self):
+		self._player.idle()
+		self._onIndexReached(None)
+
+
+class PCMCapture(object):
+	""" Stands in for the player and the index callback to keep a synthesis in memory. """
+
+	def __init__(self):
+		self.segments = []
+		self._buf = BytesIO()
+
+	def feed(self, data, size=None):
+		self._buf.write(data if size is None else string_at(data, size))
+
+	def mark(self, index):
+		# Each segment is the audio to play before its index is reached.
+		self.segments.append((self._buf.getvalue(), index))
+		self._buf = BytesIO()
+
+	def close(self):
+		if self._buf.tell():
+			self.segments.append((self._buf.getvalue(), None))
+		self._buf = BytesIO()
+
+
+class PlayRendered(object):
+
+	def __init__(self, player, isSilence, segments, onIndexReached):
+		self._player = player
+		self._isSilence = isSilence
+		self._segments = segments
+		self._onIndexReached = onIndexReached
+
+	def __call__(self):
+		self._isSilence.clear()
+		for data, index in self._segments:
+			if self._isSilence.isSet():
+				break
+			if index is None:
+				self._player.feed(data)
+			else:
+				self._player.feed(data, onDone=lambda index=index: self._onIndexReached(index))
+		DoneSpeaking(self._player, self._onIndexReached)()
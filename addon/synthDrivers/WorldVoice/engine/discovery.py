@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import importlib
 import json
@@ -11,6 +12,8 @@ from typing import Any
 
 
 MANIFEST_FILENAME = "manifest.json"
+# Engines imported and checked at the same time.
+ENGINE_LOAD_WORKERS = 4
 
 
 @dataclass(frozen=True)
@@ -132,68 +135,76 @@ def discover_engine_specs(
 	return specs
 
 
-def load_enabled_engine_classes(
-	engine_specs: list[EngineSpec],
-	engine_config: dict[str, Any],
-	logger: Any = None,
-) -> dict[str, type]:
-	ready: dict[str, type] = {}
-	for spec in engine_specs:
-		if not get_engine_enabled(engine_config, spec):
-			continue
-		engine_start = time.perf_counter()
+def _load_engine_class(spec: EngineSpec, logger: Any = None) -> type | None:
+	engine_start = time.perf_counter()
+	try:
+		step_start = time.perf_counter()
 		try:
-			step_start = time.perf_counter()
-			try:
-				module = _load_module(spec.module_name, spec.import_root)
-			finally:
-				_log(
-					logger,
-					"debug",
-					"WorldVoice init timing: ready check %s module import %.3fs",
-					spec.name,
-					time.perf_counter() - step_start,
-				)
-			step_start = time.perf_counter()
-			voice = getattr(module, "Voice", None)
+			module = _load_module(spec.module_name, spec.import_root)
+		finally:
 			_log(
 				logger,
 				"debug",
-				"WorldVoice init timing: ready check %s Voice lookup %.3fs",
+				"WorldVoice init timing: ready check %s module import %.3fs",
 				spec.name,
 				time.perf_counter() - step_start,
 			)
-			if voice is None:
-				_log(logger, "warning", "Skipping %s engine candidate: Voice export missing", spec.name)
-				continue
-			voice_engine = getattr(voice, "engine", None)
-			if voice_engine is not None and voice_engine != spec.name:
-				_log(logger, "warning", "Skipping %s engine candidate: Voice.engine mismatch (%s)", spec.name, voice_engine)
-				continue
-			step_start = time.perf_counter()
-			try:
-				is_ready = voice.ready()
-			finally:
-				_log(
-					logger,
-					"debug",
-					"WorldVoice init timing: ready check %s voice.ready %.3fs",
-					spec.name,
-					time.perf_counter() - step_start,
-				)
-			if not is_ready:
-				continue
-			ready[spec.name] = voice
-		except Exception as error:  # noqa: BLE001
-			_log(logger, "error", "Failed to load ready state for %s: %s", spec.name, error)
+		step_start = time.perf_counter()
+		voice = getattr(module, "Voice", None)
+		_log(
+			logger,
+			"debug",
+			"WorldVoice init timing: ready check %s Voice lookup %.3fs",
+			spec.name,
+			time.perf_counter() - step_start,
+		)
+		if voice is None:
+			_log(logger, "warning", "Skipping %s engine candidate: Voice export missing", spec.name)
+			return None
+		voice_engine = getattr(voice, "engine", None)
+		if voice_engine is not None and voice_engine != spec.name:
+			_log(logger, "warning", "Skipping %s engine candidate: Voice.engine mismatch (%s)", spec.name, voice_engine)
+			return None
+		step_start = time.perf_counter()
+		try:
+			is_ready = voice.ready()
 		finally:
 			_log(
 				logger,
 				"debug",
-				"WorldVoice init timing: ready check %s total %.3fs",
+				"WorldVoice init timing: ready check %s voice.ready %.3fs",
 				spec.name,
-				time.perf_counter() - engine_start,
+				time.perf_counter() - step_start,
 			)
+		return voice if is_ready else None
+	except Exception as error:  # noqa: BLE001
+		_log(logger, "error", "Failed to load ready state for %s: %s", spec.name, error)
+		return None
+	finally:
+		_log(
+			logger,
+			"debug",
+			"WorldVoice init timing: ready check %s total %.3fs",
+			spec.name,
+			time.perf_counter() - engine_start,
+		)
+
+
+def load_enabled_engine_classes(
+		engine_specs: list[EngineSpec],
+		engine_config: dict[str, Any],
+		logger: Any = None,
+		max_workers: int = ENGINE_LOAD_WORKERS,
+) -> dict[str, type]:
+	enabled = [spec for spec in engine_specs if get_engine_enabled(engine_config, spec)]
+	if not enabled:
+		return {}
+	ready: dict[str, type] = {}
+	with ThreadPoolExecutor(max_workers=min(max_workers, len(enabled)), thread_name_prefix="WorldVoiceEngineLoad") as executor:
+		# Engines are checked concurrently, the result keeps the order of the specs.
+		for spec, voice in zip(enabled, executor.map(lambda spec: _load_engine_class(spec, logger), enabled)):
+			if voice is not None:
+				ready[spec.name] = voice
 	return ready
 
 
@@ -2,11 +2,14 @@
 
 from collections import defaultdict
 from io import StringIO
+import re
 
 import config
 from synthDriverHandler import getSynth
 
-from .blocks import BLOCKS, BLOCK_RSHIFT
+from .blockData import CLASS_CHARSET_BASE, CLASS_DIGIT, CLASS_PUNCT, CLASS_SPACE, CLASS_SYMBOL
+from .blocks import BLOCK_NAMES, BLOCK_RSHIFT, block_name, class_table
+from ..cache import LRUCache
 from .._speechcommand import WVLangChangeCommand
 
 BASIC_LATIN = [
@@ -52,6 +55,56 @@ for charset in ('Basic Latin', 'Extended Latin', 'Latin Extended-B'):
 	_configKeys[charset] = 'latinCharactersLanguage'
 
 
+class DetectorConfig(object):
+	""" Snapshot of the autoLanguageSwitching settings read while detecting languages.
+	Built once and shared until the configuration changes."""
+	def __init__(self, version):
+		conf = config.conf["WorldVoice"]['autoLanguageSwitching']
+		self.version = version
+		self.ignoreNumbers = conf['ignoreNumbersInLanguageDetection']
+		self.ignorePunctuation = conf['ignorePunctuationInLanguageDetection']
+		self.latinLanguage = conf['latinCharactersLanguage']
+		self.CJKLanguage = conf['CJKCharactersLanguage']
+		self.arabicLanguage = conf['arabicCharactersLanguage']
+		# Languages to revert to per charset, when in dobt
+		self.charsetLanguages = {charset: conf[key] for charset, key in _configKeys.items()}
+
+
+_detectorConfig = None
+_detectorConfigVersion = 0
+
+
+def get_detector_config():
+	global _detectorConfig, _detectorConfigVersion
+	detectorConfig = _detectorConfig
+	if detectorConfig is None:
+		_detectorConfigVersion += 1
+		detectorConfig = _detectorConfig = DetectorConfig(_detectorConfigVersion)
+	return detectorConfig
+
+
+def invalidate_detector_config():
+	"""Drop the snapshot so the next detection rebuilds it from config."""
+	global _detectorConfig
+	_detectorConfig = None
+
+
+# Upper bound of the summed length of the strings held by the detection cache.
+DETECTION_CACHE_COST = 256 * 1024
+
+_SYMBOL_CODE = chr(CLASS_SYMBOL)
+
+# Block name for each charset class id, the ids of BLOCK_NAMES shifted past the other classes.
+_CHARSETS = [None] * CLASS_CHARSET_BASE + list(BLOCK_NAMES)
+
+# Runs of characters sharing the same class. Whitespace never changes the
+# detector state, so it is folded into the run it follows.
+_RUN_RE = re.compile("|".join(
+	["{0}+".format(re.escape(chr(CLASS_SPACE)))]
+	+ ["{0}[{0}{1}]*".format(re.escape(chr(code)), re.escape(chr(CLASS_SPACE))) for code in range(1, len(_CHARSETS))]
+))
+
+
 class LanguageDetector(object):
 	""" Provides functionality to add guessed language commands to NVDA speech sequences.
 	Unicode ranges and user configuration are used to guess the language."""
@@ -97,9 +150,34 @@ class LanguageDetector(object):
 				blockLanguages[i].append(k)
 		self.blockLanguages = blockLanguages
 
+		self.symbols = speechSymbols.compile() if speechSymbols else None
+		# Speech symbols take precedence over any other class. They are matched
+		# over the text and laid over its classes, the class table is shared.
+		symbolPatterns = []
+		if self.symbols is not None:
+			if self.symbols.phrasePattern is not None:
+				symbolPatterns.append("(?:{0})".format(self.symbols.phrasePattern.pattern))
+			if self.symbols.characters:
+				symbolPatterns.append("[{0}]".format("".join(re.escape(c) for c in sorted(self.symbols.characters))))
+		self._symbolPattern = re.compile("|".join(symbolPatterns)) if symbolPatterns else None
+		self._classTable = class_table()
+
+		# Detection results per string. Speech symbols are fixed for the lifetime
+		# of a detector, the configuration version is part of each key.
+		self._cache = LRUCache(
+			maxsize=config.conf["WorldVoice"]['autoLanguageSwitching']['detectionCacheSize'],
+			maxcost=DETECTION_CACHE_COST,
+		)
+
+	def cache_stats(self):
+		return self._cache.stats()
+
+	def clear_cache(self):
+		self._cache.clear()
+
 	def add_detected_language_commands(self, speechSequence):
-		sb = StringIO()
 		charset = None
+		detectorConfig = get_detector_config()
 		defaultLang = getSynth().language
 		curLang = defaultLang
 		tmpLang = curLang.split("_")[0]
@@ -113,125 +191,176 @@ class LanguageDetector(object):
 				yield command
 				charset = None # Whatever will come, reset the charset.
 			elif isinstance(command, str):
-				sb = StringIO()
 				command = str(command)
-				prevInIgnore = False
-				rule = False
-				for c in command:
-					if self.speechSymbols and c in self.speechSymbols.symbols:
-						rule = True
-						block = ord(c) >> BLOCK_RSHIFT
-						try:
-							newCharset = BLOCKS[block]
-						except IndexError:
-							newCharset = None
-						charset = newCharset
-						symbol = self.speechSymbols.symbols[c]
-						c = symbol.replacement if symbol.replacement and c not in [str(i) for i in range(10)] else c
-						if symbol.mode == 1:
-							newLang = symbol.language
-						else:
-							newLang = tmpLang
-						newLangFirst = newLang.split("_")[0]
-						if newLangFirst == tmpLang:
-							# Same old...
-							sb.write(c)
-							continue
-						# Change language
-						# First yield the string we already have.
-						if sb.getvalue():
-							yield sb.getvalue()
-							sb = StringIO()
-						tmpLang = newLangFirst
-						charset = None
-						yield WVLangChangeCommand(newLang)
-						yield c
-						continue
+				key = ("speak", command, curLang, tmpLang, charset, detectorConfig.version)
+				result = self._cache.get(key)
+				if result is None:
+					result = self._detect_string(command, curLang, tmpLang, charset, detectorConfig)
+					self._cache.put(key, result, cost=len(command))
+				items, tmpLang, charset = result
+				for item in items:
+					# Hand out fresh commands, the cached ones are shared between utterances.
+					yield WVLangChangeCommand(item.lang) if isinstance(item, WVLangChangeCommand) else item
+			else:
+				yield command
 
-					# For non-alphanumeric characters, revert to  the currently set language if in the ASCII range
-					block = ord(c) >> BLOCK_RSHIFT
-					if c.isspace():
-						sb.write(c)
-						continue
-					if c.isdigit() or (not c.isalpha() and block <= 0x8):
-						if config.conf["WorldVoice"]['autoLanguageSwitching']['ignoreNumbersInLanguageDetection'] and c.isdigit():
-							sb.write(c)
-							continue
-						if config.conf["WorldVoice"]['autoLanguageSwitching']['ignorePunctuationInLanguageDetection'] and not c.isdigit():
-							sb.write(c)
-							continue
-						if prevInIgnore and not rule:
-							# Digits and ascii punctuation. We already calculated
-							sb.write(c)
-							continue
-						prevInIgnore = True
-						charset = None # Revert to default charset, we don't care here and  have to recheck later
-						if tmpLang != curLang.split("_")[0]:
-							if sb.getvalue():
-								yield sb.getvalue()
-								sb = StringIO()
-							yield WVLangChangeCommand(curLang)
-							tmpLang = curLang.split("_")[0]
-						sb.write(c)
+	def _detect_string(self, text, curLang, tmpLang, charset, detectorConfig):
+		"""
+		Detect the language runs of one string of a speech sequence.
+		Returns the yielded items, and the tmpLang and charset the next string starts from.
+		"""
+		items = []
+		sb = []
+		prevInIgnore = False
+		rule = False
+		codes = text.translate(self._classTable)
+		symbols = self.symbols
+		# Symbols are classified as symbols over their whole span.
+		phraseEnds = {}
+		if self._symbolPattern is not None:
+			pieces = []
+			last = 0
+			for match in self._symbolPattern.finditer(text):
+				start, end = match.span()
+				if end - start > 1:
+					phraseEnds[start] = end
+				pieces.append(codes[last:start])
+				pieces.append(_SYMBOL_CODE * (end - start))
+				last = end
+			if pieces:
+				pieces.append(codes[last:])
+				codes = "".join(pieces)
+		for run in _RUN_RE.finditer(codes):
+			start, end = run.span()
+			code = ord(codes[start])
+			if code == CLASS_SPACE:
+				sb.append(text[start:end])
+				continue
+			if code == CLASS_SYMBOL:
+				i = start
+				while i < end:
+					identifier = text[i]
+					if ord(codes[i]) == CLASS_SPACE:
+						sb.append(identifier)
+						i += 1
 						continue
-
-						# Process alphanumeric characters.
-					prevInIgnore = False
-					try:
-						newCharset = BLOCKS[block]
-					except IndexError:
-						newCharset = None
-					if not rule:
-						if newCharset == charset:
-							sb.write(c)
-							continue
-						charset = newCharset
-						if charset in self.languageBlocks[tmpLang]:
-							sb.write(c)
-							continue
+					if i in phraseEnds:
+						identifier = text[i:phraseEnds[i]]
+						c = symbols.phrases[identifier]
+						i = phraseEnds[i]
 					else:
-						charset = newCharset
-					rule = False
-					# Find the new language to use
-					newLang = self.find_language_for_charset(charset, curLang)
-					newLangFirst = newLang.split("_")[0]
+						c = symbols.replacements.get(ord(identifier), identifier)
+						i += 1
+					rule = True
+					charset = block_name(ord(text[i - 1]))
+					if identifier not in symbols.forced:
+						sb.append(c)
+						continue
+					newLangFirst = symbols.primaryLanguages[identifier]
 					if newLangFirst == tmpLang:
 						# Same old...
-						sb.write(c)
+						sb.append(c)
 						continue
 					# Change language
 					# First yield the string we already have.
-					if sb.getvalue():
-						yield sb.getvalue()
-						sb = StringIO()
+					if sb:
+						items.append("".join(sb))
+						sb = []
 					tmpLang = newLangFirst
-					if newLang == curLang:
-						yield WVLangChangeCommand(newLang)
-					else:
-						yield WVLangChangeCommand(tmpLang)
-					sb.write(c)
-				# Send the string, if we have one:
-				if sb.getvalue():
-					yield sb.getvalue()
+					charset = None
+					items.append(WVLangChangeCommand(symbols.languages[identifier]))
+					items.append(c)
+				continue
+
+			# All the characters of a run share the class of the first one,
+			# and once the first has been handled the rest leave the state as is.
+			if code == CLASS_DIGIT or code == CLASS_PUNCT:
+				# For non-alphanumeric characters, revert to  the currently set language if in the ASCII range
+				isDigit = code == CLASS_DIGIT
+				if detectorConfig.ignoreNumbers and isDigit:
+					sb.append(text[start:end])
+					continue
+				if detectorConfig.ignorePunctuation and not isDigit:
+					sb.append(text[start:end])
+					continue
+				if prevInIgnore and not rule:
+					# Digits and ascii punctuation. We already calculated
+					sb.append(text[start:end])
+					continue
+				prevInIgnore = True
+				charset = None # Revert to default charset, we don't care here and  have to recheck later
+				if tmpLang != curLang.split("_")[0]:
+					if sb:
+						items.append("".join(sb))
+						sb = []
+					items.append(WVLangChangeCommand(curLang))
+					tmpLang = curLang.split("_")[0]
+				sb.append(text[start:end])
+				continue
+
+			# Process alphanumeric characters.
+			prevInIgnore = False
+			newCharset = _CHARSETS[code]
+			if not rule:
+				if newCharset == charset:
+					sb.append(text[start:end])
+					continue
+				charset = newCharset
+				if charset in self.languageBlocks[tmpLang]:
+					sb.append(text[start:end])
+					continue
 			else:
-				yield command
+				charset = newCharset
+			rule = False
+			# Find the new language to use
+			newLang = self.find_language_for_charset(charset, curLang, detectorConfig)
+			newLangFirst = newLang.split("_")[0]
+			if newLangFirst == tmpLang:
+				# Same old...
+				sb.append(text[start:end])
+				continue
+			# Change language
+			# First yield the string we already have.
+			if sb:
+				items.append("".join(sb))
+				sb = []
+			tmpLang = newLangFirst
+			if newLang == curLang:
+				items.append(WVLangChangeCommand(newLang))
+			else:
+				items.append(WVLangChangeCommand(tmpLang))
+			sb.append(text[start:end])
+		# Send the string, if we have one:
+		if sb:
+			items.append("".join(sb))
+		return tuple(items), tmpLang, charset
 
-	def find_language_for_charset(self, charset, curLang):
+	def find_language_for_charset(self, charset, curLang, detectorConfig=None):
 		langs = self.blockLanguages[charset]
 		if not langs or curLang.split("_")[0] in langs:
 			return curLang
 		# See if we have any configured language for this charset.
-		if charset in _configKeys:
-			configKey = _configKeys[charset]
-			lang = config.conf["WorldVoice"]['autoLanguageSwitching'][configKey]
-			return lang
-		return langs[0]
+		if detectorConfig is None:
+			detectorConfig = get_detector_config()
+		try:
+			return detectorConfig.charsetLanguages[charset]
+		except KeyError:
+			return langs[0]
 
 	def process_for_spelling(self, text, locale=None):
 		if locale is None:
 			defaultLang = getSynth().language
 		else:
 			defaultLang = locale
+		detectorConfig = get_detector_config()
+		key = ("spelling", text, defaultLang, detectorConfig.version)
+		runs = self._cache.get(key)
+		if runs is None:
+			runs = tuple(self._spelling_runs(text, defaultLang, detectorConfig))
+			self._cache.put(key, runs, cost=len(text))
+		yield from runs
+
+	def _spelling_runs(self, text, defaultLang, detectorConfig):
 		curLang = defaultLang
 		charset = None
 		sb = StringIO()
@@ -248,16 +377,13 @@ class LanguageDetector(object):
 					sb = StringIO()
 					sb.write(c)
 				continue
-			try:
-				newCharset = BLOCKS[block]
-			except IndexError:
-				newCharset = None
+			newCharset = block_name(ord(c))
 			if charset is None or charset != newCharset:
 				tmpLang = curLang.split("_")[0]
 				if newCharset in self.languageBlocks[tmpLang]:
 					sb.write(c)
 					continue
-				lang = self.find_language_for_charset(newCharset, tmpLang)
+				lang = self.find_language_for_charset(newCharset, tmpLang, detectorConfig)
 				charset = newCharset
 				if lang == tmpLang:
 					sb.write(c)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Unicode block ranges used by language detection, and the builders of the
+lookup tables loaded by L{blocks}.
+
+The sconstruct build writes the tables to blocks.bin and classes.bin. This
+module only depends on the standard library so that the build can load it on
+its own.
+"""
+
+from array import array
+import struct
+import zlib
+
+# Inclusive codepoint ranges, as in the unicode Blocks.txt data file.
+# Some blocks are merged under one name when they are used by the same languages.
+# Kept by hand: unicodedata has no block property, and the merged names and the
+# blocks left out are choices of the detector rather than unicode data.
+BLOCK_RANGES = (
+	(0x0000, 0x007F, u"Basic Latin"),
+	(0x0080, 0x00FF, u"Extended Latin"),  # Latin-1 Supplement
+	(0x0100, 0x017F, u"Extended Latin"),  # Latin Extended-A
+	(0x0180, 0x024F, u"Latin Extended-B"),
+	(0x0250, 0x02AF, u"Extended Latin"),  # IPA Extensions
+	(0x02B0, 0x02FF, u"Spacing Modifier Letters"),
+	(0x0370, 0x03FF, u"Greek and Coptic"),
+	(0x0400, 0x04FF, u"Cyrillic"),
+	(0x0500, 0x052F, u"Cyrillic Supplement"),
+	(0x0530, 0x058F, u"Armenian"),
+	(0x0590, 0x05FF, u"Hebrew"),
+	(0x0600, 0x06FF, u"Arabic"),
+	(0x0700, 0x074F, u"Syriac"),
+	(0x0750, 0x077F, u"Arabic Supplement"),
+	(0x0780, 0x07BF, u"Thaana"),
+	(0x07C0, 0x07FF, u"NKo"),
+	(0x0800, 0x083F, u"Samaritan"),
+	(0x0840, 0x085F, u"Mandaic"),
+	(0x0900, 0x097F, u"Devanagari"),
+	(0x0980, 0x09FF, u"Bengali"),
+	(0x0A00, 0x0A7F, u"Gurmukhi"),
+	(0x0A80, 0x0AFF, u"Gujarati"),
+	(0x0B00, 0x0B7F, u"Oriya"),
+	(0x0B80, 0x0BFF, u"Tamil"),
+	(0x0C00, 0x0C7F, u"Telugu"),
+	(0x0C80, 0x0CFF, u"Kannada"),
+	(0x0D00, 0x0D7F, u"Malayalam"),
+	(0x0D80, 0x0DFF, u"Sinhala"),
+	(0x0E00, 0x0E7F, u"Thai"),
+	(0x0E80, 0x0EFF, u"Lao"),
+	(0x0F00, 0x0FFF, u"Tibetan"),
+	(0x1000, 0x109F, u"Myanmar"),
+	(0x10A0, 0x10FF, u"Georgian"),
+	(0x1100, 0x11FF, u"Hangul Jamo"),
+	(0x1200, 0x137F, u"Ethiopic"),
+	(0x1380, 0x139F, u"Ethiopic Supplement"),
+	(0x13A0, 0x13FF, u"Cherokee"),
+	(0x1400, 0x167F, u"Unified Canadian Aboriginal Syllabics"),
+	(0x1680, 0x169F, u"Ogham"),
+	(0x16A0, 0x16FF, u"Runic"),
+	(0x1700, 0x171F, u"Tagalog"),
+	(0x1720, 0x173F, u"Hanunoo"),
+	(0x1740, 0x175F, u"Buhid"),
+	(0x1760, 0x177F, u"Tagbanwa"),
+	(0x1780, 0x17FF, u"Khmer"),
+	(0x1800, 0x18AF, u"Mongolian"),
+	(0x18B0, 0x18FF, u"Unified Canadian Aboriginal Syllabics Extended"),
+	(0x1900, 0x194F, u"Limbu"),
+	(0x1950, 0x197F, u"Tai Le"),
+	(0x1980, 0x19DF, u"New Tai Lue"),
+	(0x1A00, 0x1A1F, u"Buginese"),
+	(0x1A20, 0x1AAF, u"Tai Tham"),
+	(0x1B00, 0x1B7F, u"Balinese"),
+	(0x1B80, 0x1BBF, u"Sundanese"),
+	(0x1BC0, 0x1BFF, u"Batak"),
+	(0x1C00, 0x1C4F, u"Lepcha"),
+	(0x1C50, 0x1C7F, u"Ol Chiki"),
+	(0x1CD0, 0x1CFF, u"Vedic Extensions"),
+	(0x1D00, 0x1D7F, u"Phonetic Extensions"),
+	(0x1D80, 0x1DBF, u"Phonetic Extensions Supplement"),
+	(0x1E00, 0x1EFF, u"Latin Extended Additional"),
+	(0x1F00, 0x1FFF, u"Greek Extended"),
+	(0x2070, 0x209F, u"Superscripts and Subscripts"),
+	(0x2100, 0x214F, u"Letterlike Symbols"),
+	(0x2150, 0x218F, u"Number Forms"),
+	(0x2C00, 0x2C5F, u"Glagolitic"),
+	(0x2C60, 0x2C7F, u"Latin Extended-C"),
+	(0x2C80, 0x2CFF, u"Coptic"),
+	(0x2D00, 0x2D2F, u"Georgian Supplement"),
+	(0x2D30, 0x2D7F, u"Tifinagh"),
+	(0x2D80, 0x2DDF, u"Ethiopic Extended"),
+	(0x2E00, 0x2E7F, u"Supplemental Punctuation"),
+	(0x3000, 0x303F, u"CJK Symbols and Punctuation"),
+	(0x3040, 0x309F, u"Kana"),  # Hiragana
+	(0x30A0, 0x30FF, u"Kana"),  # Katakana
+	(0x3100, 0x312F, u"Bopomofo"),
+	(0x3130, 0x318F, u"Hangul Compatibility Jamo"),
+	(0x31A0, 0x31BF, u"Bopomofo Extended"),
+	(0x31F0, 0x31FF, u"Kana"),  # Katakana Phonetic Extensions
+	(0x3400, 0x4DBF, u"CJK Unified Ideographs Extension A"),
+	(0x4E00, 0x9FFF, u"CJK Unified Ideographs"),
+	(0xA000, 0xA48F, u"Yi Syllables"),
+	(0xA4D0, 0xA4FF, u"Lisu"),
+	(0xA500, 0xA63F, u"Vai"),
+	(0xA640, 0xA69F, u"Cyrillic Extended-B"),
+	(0xA6A0, 0xA6FF, u"Bamum"),
+	(0xA700, 0xA71F, u"Modifier Tone Letters"),
+	(0xA720, 0xA7FF, u"Latin Extended-D"),
+	(0xA800, 0xA82F, u"Syloti Nagri"),
+	(0xA840, 0xA87F, u"Phags-pa"),
+	(0xA880, 0xA8DF, u"Saurashtra"),
+	(0xA8E0, 0xA8FF, u"Devanagari Extended"),
+	(0xA900, 0xA92F, u"Kayah Li"),
+	(0xA930, 0xA95F, u"Rejang"),
+	(0xA960, 0xA97F, u"Hangul Jamo Extended-A"),
+	(0xA980, 0xA9DF, u"Javanese"),
+	(0xAA00, 0xAA5F, u"Cham"),
+	(0xAA60, 0xAA7F, u"Myanmar Extended-A"),
+	(0xAA80, 0xAADF, u"Tai Viet"),
+	(0xAB00, 0xAB2F, u"Ethiopic Extended-A"),
+	(0xABC0, 0xABFF, u"Meetei Mayek"),
+	(0xAC00, 0xD7AF, u"Hangul Syllables"),
+	(0xD7B0, 0xD7FF, u"Hangul Jamo Extended-B"),
+	(0xF900, 0xFAFF, u"CJK Compatibility Ideographs"),
+	(0xFB00, 0xFB4F, u"Alphabetic Presentation Forms"),
+	(0xFB50, 0xFDFF, u"Arabic Presentation Forms-A"),
+	(0xFE70, 0xFEFF, u"Arabic Presentation Forms-B"),
+	(0xFF00, 0xFFEF, u"Halfwidth and Fullwidth Forms"),
+	(0x10000, 0x1007F, u"Linear B Syllabary"),
+	(0x10080, 0x100FF, u"Linear B Ideograms"),
+	(0x10280, 0x1029F, u"Lycian"),
+	(0x102A0, 0x102DF, u"Carian"),
+	(0x10300, 0x1032F, u"Old Italic"),
+	(0x10330, 0x1034F, u"Gothic"),
+	(0x10380, 0x1039F, u"Ugaritic"),
+	(0x103A0, 0x103DF, u"Old Persian"),
+	(0x10400, 0x1044F, u"Deseret"),
+	(0x10450, 0x1047F, u"Shavian"),
+	(0x10480, 0x104AF, u"Osmanya"),
+	(0x10800, 0x1083F, u"Cypriot Syllabary"),
+	(0x10840, 0x1085F, u"Imperial Aramaic"),
+	(0x10900, 0x1091F, u"Phoenician"),
+	(0x10920, 0x1093F, u"Lydian"),
+	(0x10A00, 0x10A5F, u"Kharoshthi"),
+	(0x10A60, 0x10A7F, u"Old South Arabian"),
+	(0x10B00, 0x10B3F, u"Avestan"),
+	(0x10B40, 0x10B5F, u"Inscriptional Parthian"),
+	(0x10B60, 0x10B7F, u"Inscriptional Pahlavi"),
+	(0x10C00, 0x10C4F, u"Old Turkic"),
+	(0x11000, 0x1107F, u"Brahmi"),
+	(0x11080, 0x110CF, u"Kaithi"),
+	(0x12000, 0x123FF, u"Cuneiform"),
+	(0x13000, 0x1342F, u"Egyptian Hieroglyphs"),
+	(0x16800, 0x16A3F, u"Bamum Supplement"),
+	(0x1B000, 0x1B0FF, u"Kana Supplement"),
+	(0x1D400, 0x1D7FF, u"Mathematical Alphanumeric Symbols"),
+	(0x20000, 0x2A6DF, u"CJK Unified Ideographs Extension B"),
+	(0x2A700, 0x2B73F, u"CJK Unified Ideographs Extension C"),
+	(0x2B740, 0x2B81F, u"CJK Unified Ideographs Extension D"),
+	(0x2F800, 0x2FA1F, u"CJK Compatibility Ideographs Supplement"),
+)
+
+# Codepoints are looked up in blocks of 1 << BLOCK_RSHIFT, and blocks in pages of
+# 1 << PAGE_SHIFT. Pages with the same content are stored once.
+BLOCK_RSHIFT = 4
+PAGE_SHIFT = 4
+UNICODE_BLOCK_COUNT = 0x110000 >> BLOCK_RSHIFT
+
+MAGIC = b"WVBT"
+VERSION = 1
+# magic, version, block shift, page shift, name count, page count, names length
+HEADER = struct.Struct("<4sBBBxHHI")
+
+# Script classes of the character class table. Every codepoint is mapped to
+# one byte: whitespace, digits, ASCII-range punctuation, speech symbols, or
+# CLASS_CHARSET_BASE plus the id of the unicode block name it belongs to.
+CLASS_SPACE = 0
+CLASS_DIGIT = 1
+CLASS_PUNCT = 2
+CLASS_SYMBOL = 3
+CLASS_CHARSET_BASE = 4
+
+CLASS_MAGIC = b"WVCT"
+CLASS_VERSION = 1
+# magic, version, block shift, followed by the zlib compressed table
+CLASS_HEADER = struct.Struct("<4sBBxx")
+
+
+def _block_ids(ranges):
+	"""The block names, name id 0 being no block, and the name id of every block."""
+	names = [""]
+	nameIds = {}
+	blockIds = bytearray(UNICODE_BLOCK_COUNT)
+	for first, last, name in ranges:
+		if name not in nameIds:
+			nameIds[name] = len(names)
+			names.append(name)
+		first >>= BLOCK_RSHIFT
+		last >>= BLOCK_RSHIFT
+		blockIds[first:last + 1] = bytes((nameIds[name],)) * (last - first + 1)
+	if len(names) + CLASS_CHARSET_BASE > 0x100:
+		raise ValueError("too many block names for a one byte id")
+	return names, blockIds
+
+
+def build_block_table(ranges=BLOCK_RANGES):
+	"""
+	Build the two-level block table covering all unicode planes:
+	the header, one uint16 page id per page, the block name ids of every
+	distinct page, and the newline separated block names. Name id 0 is no block.
+	"""
+	names, blockIds = _block_ids(ranges)
+
+	pageSize = 1 << PAGE_SHIFT
+	pageIds = {}
+	pageIndex = []
+	for start in range(0, UNICODE_BLOCK_COUNT, pageSize):
+		page = bytes(blockIds[start:start + pageSize])
+		pageIndex.append(pageIds.setdefault(page, len(pageIds)))
+	encodedNames = "\n".join(names).encode("utf-8")
+	return b"".join([
+		HEADER.pack(MAGIC, VERSION, BLOCK_RSHIFT, PAGE_SHIFT, len(names), len(pageIds), len(encodedNames)),
+		struct.pack("<%dH" % len(pageIndex), *pageIndex),
+		b"".join(pageIds),
+		encodedNames,
+	])
+
+
+def build_class_table(ranges=BLOCK_RANGES):
+	"""
+	Build the script class of every unicode codepoint, as a bytes table usable
+	directly with str.translate.
+	"""
+	_, blockIds = _block_ids(ranges)
+	blockSize = 1 << BLOCK_RSHIFT
+	toClass = bytes((CLASS_CHARSET_BASE + nameId) & 0xFF for nameId in range(0x100))
+	table = bytearray(b"".join(bytes((code,)) * blockSize for code in blockIds.translate(toClass)))
+	allChars = array("I", range(0x110000)).tobytes().decode("utf-32-le", "surrogatepass")
+	for c in filter(str.isdigit, allChars):
+		table[ord(c)] = CLASS_DIGIT
+	for c in filter(str.isspace, allChars):
+		table[ord(c)] = CLASS_SPACE
+	# Non-alphanumeric characters in the ASCII range are handled as punctuation.
+	for c in allChars[:0x9 << BLOCK_RSHIFT]:
+		if not c.isspace() and not c.isdigit() and not c.isalpha():
+			table[ord(c)] = CLASS_PUNCT
+	return bytes(table)
+
+
+def pack_class_table(table):
+	"""The header and the compressed class table, as written to classes.bin."""
+	return CLASS_HEADER.pack(CLASS_MAGIC, CLASS_VERSION, BLOCK_RSHIFT) + zlib.compress(table, 9)
@@ -14,7 +14,7 @@ from synthDriverHandler import getSynth
 
 from .._speechcommand import WVLangChangeCommand
 from ..log import PipelineLog
-from .settings import get_effective_pipeline_settings
+from .settings import get_pipeline_settings_snapshot
 
 SpeechCmd = Union[str, "BaseSpeechCommand"]
 pl = PipelineLog("pipeline.csv")
@@ -25,6 +25,7 @@ _NUMBER_RE = re.compile(r"[0-9\-\+]+[0-9.:]*[0-9]+|[0-9]")
 _CH_SPACE_RE = re.compile(r"(?<=[\u4e00-\u9fa5])\s+(?=[\u4e00-\u9fa5])")
 
 _SENTENCE_END_RE = re.compile(r"^[.:;,?!](?:\s|$)")
+_SENTENCE_END_AT_RE = re.compile(r"[.:;,?!](?:\s|$)")
 
 def with_order_log(label: str):
 	""" The order numbers are reversed because of recursion: the order number assigned earlier execution is greater than that of a later execution."""
@@ -47,26 +48,40 @@ def with_speech_sequence_log(label: str):
 	def decorator(func):
 		@wraps(func)
 		def wrapper(speechSequence):
-			_id = uuid.uuid4().hex
 			if (config.conf["general"]["loggingLevel"] == "DEBUG" or config.conf["WorldVoice"]["log"]["enable"]) and config.conf["WorldVoice"]["log"][label]:
-				speechSequence = list(speechSequence)
-				if config.conf["general"]["loggingLevel"] == "DEBUG":
-					log.debug(f"speech sequence before {label} pipeline: {speechSequence}")
-				if config.conf["WorldVoice"]["log"]["enable"]:
-					pl.write(_id, label, "before", speechSequence)
-				speechSequence = func(speechSequence)
-				speechSequence = list(speechSequence)
-				if config.conf["general"]["loggingLevel"] == "DEBUG":
-					log.debug(f"speech sequence after {label} pipeline: {speechSequence}")
-				if config.conf["WorldVoice"]["log"]["enable"]:
-					pl.write(_id, label, "after", speechSequence)
-			else:
-				speechSequence = func(speechSequence)
-			return speechSequence
+				return _logged_speech_sequence(label, func, speechSequence)
+			return func(speechSequence)
 		return wrapper
 	return decorator
 
 
+def _logged_speech_sequence(label, func, speechSequence):
+	"""
+	Run *func* lazily, recording the commands flowing in and out of it.
+	The before/after sequences are written once the stage is exhausted so
+	that logging does not force the whole utterance to be materialized.
+	"""
+	_id = uuid.uuid4().hex
+	before = []
+	after = []
+
+	def record(speechSequence):
+		for command in speechSequence:
+			before.append(command)
+			yield command
+
+	for command in func(record(speechSequence)):
+		after.append(command)
+		yield command
+
+	if config.conf["general"]["loggingLevel"] == "DEBUG":
+		log.debug(f"speech sequence before {label} pipeline: {before}")
+		log.debug(f"speech sequence after {label} pipeline: {after}")
+	if config.conf["WorldVoice"]["log"]["enable"]:
+		pl.write(_id, label, "before", before)
+		pl.write(_id, label, "after", after)
+
+
 def listable(func):
 	@wraps(func)
 	def wrapper(speechSequence):
@@ -78,12 +93,12 @@ def listable(func):
 
 
 def get_ignore_comma_between_number():
-	settings = get_effective_pipeline_settings()
+	settings = get_pipeline_settings_snapshot()
 	return settings.ignore_comma_between_number
 
 
 def get_number_mode():
-	settings = get_effective_pipeline_settings()
+	settings = get_pipeline_settings_snapshot()
 	return settings.number_mode
 
 
@@ -109,17 +124,17 @@ def get_translate_table():
 
 
 def get_item_wait_factor():
-	settings = get_effective_pipeline_settings()
+	settings = get_pipeline_settings_snapshot()
 	return settings.scaled_item_wait()
 
 
 def get_number_wait_factor():
-	settings = get_effective_pipeline_settings()
+	settings = get_pipeline_settings_snapshot()
 	return settings.scaled_number_wait()
 
 
 def get_chinesespace_wait_factor():
-	settings = get_effective_pipeline_settings()
+	settings = get_pipeline_settings_snapshot()
 	return settings.scaled_chinesespace_wait()
 
 
@@ -586,56 +601,265 @@ def inject_langchange_reorder(
 		yield from buffer
 
 
+class CompiledPipeline:
+	"""
+	Every enabled pipeline stage folded into a single pass.
+
+	The object is built once from the effective pipeline settings. Each
+	string goes through speech dictionaries, comma removal, number language,
+	number mode and Chinese space pauses with one number scan, and the item
+	and number wait breaks are laid down while the final command stream is
+	emitted. The output is the same as chaining the individual stages.
+	"""
+
+	def __init__(self, settings, synth=None):
+		self.ignore_comma = settings.ignore_comma_between_number
+		self.number_mode = settings.number_mode
+		self.translate_table = get_translate_table()
+
+		chinesespace_wait = settings.scaled_chinesespace_wait()
+		item_wait = settings.scaled_item_wait()
+		number_wait = settings.scaled_number_wait()
+		self.chinesespace_break = BreakCommand(chinesespace_wait) if chinesespace_wait > 0 else None
+		self.item_break = BreakCommand(item_wait) if item_wait > 0 else None
+		self.number_break = BreakCommand(number_wait) if number_wait > 0 else None
+
+		self.voice_manager = getattr(synth, "_voiceManager", None)
+		if self.voice_manager is not None:
+			self.number_language = synth._numlan
+			self.default_language = synth.language
+		else:
+			self.number_language = None
+			self.default_language = None
+
+	def __call__(self, speechSequence: Iterable[SpeechCmd]) -> Iterator[SpeechCmd]:
+		item_break = self.item_break
+		number_break = self.number_break
+		previous_raw_is_str = False
+		previous_out = None
+
+		for command in self._iter_commands(speechSequence):
+			# item_wait_factor: pause between two consecutive strings.
+			is_str = isinstance(command, str)
+			if item_break is not None and is_str and previous_raw_is_str:
+				previous_out = item_break
+				yield item_break
+			previous_raw_is_str = is_str
+
+			# number_wait_factor: strip, drop blanks, pause between two numbers.
+			if is_str:
+				command = command.strip()
+				if not command:
+					continue
+				if (
+					number_break is not None
+					and isinstance(previous_out, str)
+					and _NUMBER_RE.match(previous_out)
+					and _NUMBER_RE.match(command)
+				):
+					yield number_break
+			previous_out = command
+			yield command
+
+	def _iter_commands(self, speechSequence):
+		voice_manager = self.voice_manager
+		if voice_manager is None:
+			for command in speechSequence:
+				if isinstance(command, str):
+					yield from self._process_text(command, None, None)
+				elif not isinstance(command, WVLangChangeCommand):
+					yield command
+			return
+
+		resolved = {}
+		default_instance = voice_manager.defaultVoiceInstance
+
+		def resolve(lang):
+			try:
+				return resolved[lang]
+			except KeyError:
+				instance = resolved[lang] = voice_manager.getVoiceInstanceForLanguage(lang) or default_instance
+				return instance
+
+		current_lang = self.default_language
+		for command in speechSequence:
+			if isinstance(command, str):
+				yield from self._process_text(command, current_lang, resolve)
+			else:
+				yield command
+				if isinstance(command, (LangChangeCommand, WVLangChangeCommand)):
+					current_lang = command.lang or self.default_language
+
+	def _process_text(self, item, current_lang, resolve):
+		item = speechDictHandler.processText(item)
+		if self.ignore_comma:
+			item = _COMMA_NUMBER_RE.sub("", item)
+		if not item:
+			return
+
+		matches = [m.span() for m in _NUMBER_RE.finditer(item)]
+		if resolve is None or not matches:
+			pieces = [(0, len(item), matches)]
+		else:
+			pieces = self._split_number_language(item, matches, current_lang, resolve)
+
+		for piece in pieces:
+			if isinstance(piece, WVLangChangeCommand):
+				yield piece
+				continue
+			text = self._render_number_mode(item, *piece)
+			if self.chinesespace_break is None:
+				yield text
+				continue
+			pos = 0
+			for m in _CH_SPACE_RE.finditer(text):
+				start, end = m.span()
+				if start > pos:
+					yield text[pos:start]
+				pos = end
+				yield self.chinesespace_break
+			if pos < len(text):
+				yield text[pos:]
+
+	def _split_number_language(self, item, matches, current_lang, resolve):
+		"""
+		Cut *item* into text spans and the WVLangChangeCommands that survive
+		deduplication, the way inject_number_language followed by
+		deduplicate_language_command would.
+		"""
+		default_instance = self.voice_manager.defaultVoiceInstance
+		voice_instance = default_instance
+		active_lang = self.default_language
+		num_lang = self.number_language if self.number_language != "default" else current_lang
+
+		def switch(lang):
+			nonlocal voice_instance, active_lang
+			if lang == active_lang:
+				return False
+			if lang is None:
+				new_instance = default_instance
+				active_lang = self.default_language
+			else:
+				new_instance = resolve(lang)
+				active_lang = lang
+			if new_instance == voice_instance:
+				return False
+			voice_instance = new_instance
+			return True
+
+		pieces = []
+		pos = 0
+		pending = []
+		for span in matches:
+			start, end = span
+			if switch(num_lang):
+				if start > pos:
+					pieces.append((pos, start, pending))
+				pieces.append(WVLangChangeCommand(num_lang))
+				pending = []
+				pos = start
+			pending.append(span)
+			if switch(current_lang):
+				pieces.append((pos, end, pending))
+				pieces.append(WVLangChangeCommand(current_lang))
+				pending = []
+				pos = end
+		if pos < len(item):
+			pieces.append((pos, len(item), pending))
+		return pieces
+
+	def _render_number_mode(self, item, start, stop, matches):
+		"""Equivalent of iter_number_speech_segments_mode on item[start:stop]."""
+		mode = self.number_mode
+		table = self.translate_table
+		parts = []
+		pos = start
+		for m_start, m_end in matches:
+			prefix = item[pos:m_start]
+			if prefix:
+				parts.append(prefix)
+			effective_mode = mode
+			if mode == "value" and prefix.strip() == "." and not prefix.endswith(" "):
+				effective_mode = "number"
+			parts.extend(_translate_number(item[m_start:m_end], effective_mode, table))
+			if (
+				not _SENTENCE_END_AT_RE.match(item, m_end, stop)
+				and not (m_end < stop and item[m_end] in string.ascii_letters)
+			):
+				parts.append(" ")
+			pos = m_end
+		if pos < stop:
+			parts.append(item[pos:stop])
+		return "".join(parts)
+
+
+def compile_pipeline(synth=None) -> CompiledPipeline:
+	if synth is None:
+		try:
+			synth = getSynth()
+		except Exception:
+			synth = None
+	return CompiledPipeline(get_pipeline_settings_snapshot(synth=synth), synth=synth)
+
+
+STAGED_PIPELINE = (
+	apply_speech_dictionaries,
+	ignore_comma_between_number,
+	inject_number_language,
+	inject_number_mode,
+	inject_chinese_space_pause,
+	item_wait_factor,
+	number_wait_factor,
+)
+
+
+STAGE_LOG_LABELS = (
+	"apply_speech_dictionaries",
+	"ignore_comma_between_number",
+	"number_language",
+	"number_mode",
+	"chinesespace_wait_factor",
+	"item_wait_factor",
+	"number_wait_factor",
+	"speech_viewer",
+)
+
+
+def _stage_logging_enabled():
+	log_conf = config.conf["WorldVoice"]["log"]
+	if not (config.conf["general"]["loggingLevel"] == "DEBUG" or log_conf["enable"]):
+		return False
+	return any(log_conf[label] for label in STAGE_LOG_LABELS)
+
+
+def speech_pipeline(speechSequence):
+	"""
+	The single filter_speechSequence handler of WorldVoice.
+	When stage logging is on, the stages run one by one so that each of them
+	can record its own before/after sequence.
+	"""
+	if _stage_logging_enabled():
+		for stage in STAGED_PIPELINE:
+			speechSequence = stage(speechSequence)
+		return list(speech_viewer(speechSequence))
+	return list(compile_pipeline()(speechSequence))
+
+
 def order_move_to_start_register():
-	# stack: first in last out
-	filter_speechSequence.moveToEnd(speech_viewer, False)
-	filter_speechSequence.moveToEnd(number_wait_factor, False)
-	filter_speechSequence.moveToEnd(item_wait_factor, False)
-	filter_speechSequence.moveToEnd(inject_chinese_space_pause, False)
-	filter_speechSequence.moveToEnd(inject_number_mode, False)
-	filter_speechSequence.moveToEnd(inject_number_language, False)
-	filter_speechSequence.moveToEnd(ignore_comma_between_number, False)
-	filter_speechSequence.moveToEnd(apply_speech_dictionaries, False)
+	filter_speechSequence.moveToEnd(speech_pipeline, False)
 
 
 def order_move_to_end_register():
-	# queue: first in first out
-	filter_speechSequence.moveToEnd(apply_speech_dictionaries, True)
-	filter_speechSequence.moveToEnd(ignore_comma_between_number, True)
-	filter_speechSequence.moveToEnd(inject_number_language, True)
-	filter_speechSequence.moveToEnd(inject_number_mode, True)
-	filter_speechSequence.moveToEnd(inject_chinese_space_pause, True)
-	filter_speechSequence.moveToEnd(item_wait_factor, True)
-	filter_speechSequence.moveToEnd(number_wait_factor, True)
-	filter_speechSequence.moveToEnd(speech_viewer, True)
+	filter_speechSequence.moveToEnd(speech_pipeline, True)
 
 
 def static_register():
 	log.debug("static register")
 
-	filter_speechSequence.register(apply_speech_dictionaries)
-	filter_speechSequence.register(inject_chinese_space_pause)
-	filter_speechSequence.register(inject_number_language)
-	filter_speechSequence.register(inject_number_mode)
-	filter_speechSequence.register(number_wait_factor)
-	filter_speechSequence.register(speech_viewer)
-
-
-def dynamic_register():
-	log.debug("dynamic register")
-
-	filter_speechSequence.register(ignore_comma_between_number)
-	filter_speechSequence.register(item_wait_factor)
+	filter_speechSequence.register(speech_pipeline)
 
 
 def unregister():
 	log.debug("unregister")
 
-	filter_speechSequence.unregister(apply_speech_dictionaries)
-	filter_speechSequence.unregister(ignore_comma_between_number)
-	filter_speechSequence.unregister(inject_chinese_space_pause)
-	filter_speechSequence.unregister(inject_number_mode)
-	filter_speechSequence.unregister(inject_number_language)
-	filter_speechSequence.unregister(item_wait_factor)
-	filter_speechSequence.unregister(number_wait_factor)
-	filter_speechSequence.unregister(speech_viewer)
+	filter_speechSequence.unregister(speech_pipeline)
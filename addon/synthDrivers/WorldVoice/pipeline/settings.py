@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any, Callable
 
 import config
@@ -29,8 +29,12 @@ PIPELINE_CONFIG_KEYS = (
 
 _last_scope_application: tuple[str, str] | None = None
 
+_snapshot: "PipelineSettings | None" = None
+_snapshot_synth_name: str | None = None
+_snapshot_version = 0
 
-@dataclass
+
+@dataclass(frozen=True)
 class PipelineSettings:
 	scope: str
 	ignore_comma_between_number: bool
@@ -90,6 +94,7 @@ def save_pipeline_settings(settings: PipelineSettings, conf: Any = config.conf)
 	pipeline = _pipeline_section(conf)
 	for key in PIPELINE_CONFIG_KEYS:
 		pipeline[key] = getattr(settings, key)
+	invalidate_pipeline_settings()
 
 
 def _runtime_value(synth: Any, public_name: str, private_name: str, fallback: Any) -> Any:
@@ -110,16 +115,18 @@ def get_effective_pipeline_settings(synth: Any | None = None, conf: Any = config
 	settings = load_pipeline_settings(conf)
 	if getattr(synth, "name", None) != "WorldVoice":
 		if settings.scope != "all":
-			settings.ignore_comma_between_number = False
-			settings.number_wait_factor = 0
-			settings.item_wait_factor = 0
-			settings.sayall_wait_factor = 0
-			settings.chinesespace_wait_factor = 0
-			return settings
-		settings.ignore_comma_between_number = bool(
-			settings.global_factor_units * settings.ignore_comma_between_number
+			return replace(
+				settings,
+				ignore_comma_between_number=False,
+				number_wait_factor=0,
+				item_wait_factor=0,
+				sayall_wait_factor=0,
+				chinesespace_wait_factor=0,
+			)
+		return replace(
+			settings,
+			ignore_comma_between_number=bool(settings.global_factor_units * settings.ignore_comma_between_number),
 		)
-		return settings
 
 	return PipelineSettings(
 		scope=settings.scope,
@@ -148,6 +155,45 @@ def get_effective_pipeline_settings(synth: Any | None = None, conf: Any = config
 	)
 
 
+def get_pipeline_settings_snapshot(synth: Any | None = None) -> PipelineSettings:
+	"""
+	Return the effective pipeline settings shared by every stage.
+
+	The snapshot is built on first use and kept until
+	L{invalidate_pipeline_settings} is called or the synthesizer changes,
+	so reading it costs no config lookups.
+	"""
+	global _snapshot, _snapshot_synth_name, _snapshot_version
+
+	if synth is None:
+		try:
+			synth = getSynth()
+		except Exception:
+			synth = None
+
+	synth_name = getattr(synth, "name", None)
+	snapshot = _snapshot
+	if snapshot is None or synth_name != _snapshot_synth_name:
+		snapshot = get_effective_pipeline_settings(synth=synth)
+		_snapshot = snapshot
+		_snapshot_synth_name = synth_name
+		_snapshot_version += 1
+	return snapshot
+
+
+def get_pipeline_settings_version() -> int:
+	"""Version of the current snapshot; it increases every time the snapshot is rebuilt."""
+	get_pipeline_settings_snapshot()
+	return _snapshot_version
+
+
+def invalidate_pipeline_settings() -> None:
+	"""Drop the snapshot so the next reader rebuilds it from config and synth."""
+	global _snapshot
+
+	_snapshot = None
+
+
 def apply_pipeline_settings_to_synth(synth: Any, settings: PipelineSettings) -> None:
 	synth.cni = settings.ignore_comma_between_number
 	synth.nummod = settings.number_mode
@@ -170,9 +216,9 @@ def apply_pipeline_settings_to_speech_config(settings: PipelineSettings, conf: A
 
 
 def _load_scope_functions():
-	from . import dynamic_register, order_move_to_start_register, static_register, unregister
+	from . import order_move_to_start_register, static_register, unregister
 
-	return static_register, dynamic_register, order_move_to_start_register, unregister
+	return static_register, order_move_to_start_register, unregister
 
 
 def clear_pipeline(
@@ -202,7 +248,7 @@ def apply_worldvoice_pipeline(
 		order_move_to_start_register: Callable[[], None] | None = None,
 ) -> None:
 	if static_register is None or order_move_to_start_register is None:
-		default_static_register, _, default_order_move_to_start_register, _ = _load_scope_functions()
+		default_static_register, default_order_move_to_start_register, _ = _load_scope_functions()
 		static_register = static_register or default_static_register
 		order_move_to_start_register = order_move_to_start_register or default_order_move_to_start_register
 
@@ -214,7 +260,6 @@ def apply_global_pipeline_scope(
 		settings: PipelineSettings,
 		current_synth_name: str,
 		static_register: Callable[[], None] | None = None,
-		dynamic_register: Callable[[], None] | None = None,
 		order_move_to_start_register: Callable[[], None] | None = None,
 		unregister: Callable[[], None] | None = None,
 ) -> None:
@@ -223,15 +268,13 @@ def apply_global_pipeline_scope(
 	if current_synth_name == "WorldVoice":
 		return
 
-	if None in (static_register, dynamic_register, order_move_to_start_register, unregister):
+	if None in (static_register, order_move_to_start_register, unregister):
 		(
 			default_static_register,
-			default_dynamic_register,
 			default_order_move_to_start_register,
 			default_unregister,
 		) = _load_scope_functions()
 		static_register = static_register or default_static_register
-		dynamic_register = dynamic_register or default_dynamic_register
 		order_move_to_start_register = order_move_to_start_register or default_order_move_to_start_register
 		unregister = unregister or default_unregister
 
@@ -243,7 +286,6 @@ def apply_global_pipeline_scope(
 	if settings.scope == "all":
 		clear_pipeline(unregister=unregister, reset_scope_application=False)
 		static_register()
-		dynamic_register()
 		order_move_to_start_register()
 	elif settings.scope == "WorldVoice":
 		clear_pipeline(unregister=unregister, reset_scope_application=False)
@@ -252,24 +294,20 @@ def apply_global_pipeline_scope(
 def apply_pipeline_after_worldvoice_end(
 		settings: PipelineSettings,
 		static_register: Callable[[], None] | None = None,
-		dynamic_register: Callable[[], None] | None = None,
 		order_move_to_start_register: Callable[[], None] | None = None,
 		unregister: Callable[[], None] | None = None,
 ) -> None:
-	if None in (static_register, dynamic_register, order_move_to_start_register, unregister):
+	if None in (static_register, order_move_to_start_register, unregister):
 		(
 			default_static_register,
-			default_dynamic_register,
 			default_order_move_to_start_register,
 			default_unregister,
 		) = _load_scope_functions()
 		static_register = static_register or default_static_register
-		dynamic_register = dynamic_register or default_dynamic_register
 		order_move_to_start_register = order_move_to_start_register or default_order_move_to_start_register
 		unregister = unregister or default_unregister
 
 	if settings.scope == "all":
 		clear_pipeline(unregister=unregister)
 		static_register()
-		dynamic_register()
 		order_move_to_start_register()
@@ -1,9 +1,11 @@
 import queue
 import threading
 import time
-from dataclasses import dataclass
-from concurrent.futures import Future
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable
 
+import queueHandler
 from logHandler import log
 from synthDriverHandler import synthIndexReached, synthDoneSpeaking, getSynth
 
@@ -15,9 +17,33 @@ from synthDriverHandler import synthIndexReached, synthDoneSpeaking, getSynth
 class CancellationToken:
 	def __init__(self):
 		self._ev = threading.Event()
+		self._lock = threading.Lock()
+		self._callbacks = []
 
 	def cancel(self):
-		self._ev.set()
+		with self._lock:
+			if self._ev.is_set():
+				return
+			self._ev.set()
+			callbacks = self._callbacks
+			self._callbacks = []
+		for fn in callbacks:
+			fn()
+
+	def add_callback(self, fn):
+		"""Call fn on cancel, or right away if already cancelled."""
+		with self._lock:
+			if not self._ev.is_set():
+				self._callbacks.append(fn)
+				return
+		fn()
+
+	def remove_callback(self, fn):
+		with self._lock:
+			try:
+				self._callbacks.remove(fn)
+			except ValueError:
+				pass
 
 	def is_cancelled(self):
 		return self._ev.is_set()
@@ -57,6 +83,20 @@ class SpeechFuture(Future):
 		return next_fut
 
 
+class _Completion(threading.Event):
+	"""
+	Set once by whichever comes first of the engine's done signal, cancel or
+	shutdown, and remembers when that happened.
+	"""
+
+	time = None
+
+	def set(self):
+		if self.time is None:
+			self.time = time.perf_counter()
+		super().set()
+
+
 @dataclass
 class _Task:
 	voiceInstance: object
@@ -65,6 +105,43 @@ class _Task:
 	future: SpeechFuture
 	token: CancellationToken | None = None
 	timeout: float | None = None
+	# Characters of text, for the watchdog deadline.
+	size: int = 0
+	queued: float = field(default_factory=time.perf_counter)
+	# render(token) synthesizes the task to memory and returns a callable that
+	# plays the result, or None when the engine has no such path.
+	render: Callable | None = None
+	generation: int = 0
+	# Silence after the speech, from break tasks that were merged into this one.
+	pause: float = 0.0
+	taken: bool = False
+
+
+@dataclass
+class _Lookahead:
+	task: _Task
+	token: CancellationToken
+	future: Future
+
+
+# Watchdog deadline of a speech task without an explicit timeout:
+# WATCHDOG_MIN_SECONDS + characters * measured seconds per character * WATCHDOG_FACTOR.
+WATCHDOG_MIN_SECONDS = 5.0
+WATCHDOG_FACTOR = 3.0
+# Chunks an engine has to finish before its measured rate is trusted.
+WATCHDOG_MIN_SAMPLES = 3
+# Assumed until then: one character a second is slower than any speech rate,
+# so a healthy engine is not restarted on a guess.
+WATCHDOG_UNMEASURED_SECONDS_PER_CHAR = 1.0
+# Shorter chunks are dominated by engine latency and say little about the rate.
+WATCHDOG_MIN_SAMPLE_CHARS = 8
+# Longest the worker waits for the main thread to restart an engine.
+ENGINE_RESTART_TIMEOUT = 30.0
+
+# Longest wait for the pre-render of the next chunk to finish once it is due.
+# Rendering to memory runs well ahead of real time, so a render that is
+# nearly done is cheaper to wait for than to throw away and synthesize again.
+LOOKAHEAD_WAIT_SECONDS = 0.5
 
 
 def IndexReached_notify_forward(synth, index):
@@ -85,7 +162,27 @@ def DoneSpeaking_notify_forward(synth):
 class TaskManager:
 
 	def __init__(self):
+		# Tasks in the order they were added, None stops the worker.
+		# Speech priorities need no ordering of their own: NVDA's speech manager
+		# cancels the synth before it sends a more urgent utterance, and speaks
+		# the interrupted one again from its last index afterwards.
 		self._q: queue.Queue[_Task | None] = queue.Queue()
+		# Bumped by cancel, which leaves the queue alone: the worker cancels the
+		# tasks of older generations as it dequeues them, without running them.
+		self._generation = 0
+		self._last_put = None
+
+		self._paused = False
+		# Pauses and resumes so far.
+		self._pause_count = 0
+		# Smoothed seconds per character per engine and speech rate, see
+		# _rate_key, the chunks it was measured on, and restarts per engine.
+		self._engine_rates = {}
+		self._engine_samples = {}
+		self._engine_restarts = {}
+		# Set when the engine restart the worker waits for is done.
+		self._restarted = None
+
 		self._stop = threading.Event()
 		self._state_lock = threading.Lock()
 
@@ -93,6 +190,18 @@ class TaskManager:
 		self._current_token = None
 		self._current_done_event = None
 
+		# Time between a speech task completing and the next queued one starting.
+		self._last_completion = None
+		self._gap_count = 0
+		self._gap_total = 0.0
+		self._gap_max = 0.0
+
+		# Pre-rendering of the next queued chunk while the current one plays.
+		self._lookahead = None
+		self._lookahead_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="WorldVoiceLookahead")
+		self._lookahead_used = 0
+		self._lookahead_missed = 0
+
 		self._thread = threading.Thread(target=self._worker, daemon=True)
 
 		synthDoneSpeaking.register(DoneSpeaking_notify_forward)
@@ -107,10 +216,24 @@ class TaskManager:
 
 	def add_task(self, voiceInstance, fn, *, token: CancellationToken | None = None):
 		fut = SpeechFuture()
-		self._q.put(_Task(voiceInstance, fn, False, fut, token))
+		self._put(_Task(voiceInstance, fn, False, fut, token))
 		return fut
 
 	def add_break_task(self, voiceInstance, seconds: float):
+		# A break right behind a queued speech task of the same voice becomes
+		# its trailing pause, which costs no extra task.
+		with self._state_lock:
+			last = self._last_put
+			if (
+				last is not None
+				and last.wait_done
+				and not last.taken
+				and last.voiceInstance is voiceInstance
+				and last.generation == self._generation
+			):
+				last.pause += seconds
+				return last.future
+
 		token = CancellationToken()
 
 		def _break():
@@ -118,9 +241,11 @@ class TaskManager:
 
 		return self.add_task(voiceInstance, _break, token=token)
 
-	def add_speak_task(self, voiceInstance, speak_fn, *, token: CancellationToken | None = None, timeout=None):
+	def add_speak_task(self, voiceInstance, speak_fn, *, token: CancellationToken | None = None, timeout=None, size=0, render=None):
 		fut = SpeechFuture()
-		self._q.put(_Task(voiceInstance, speak_fn, True, fut, token, timeout))
+		self._put(_Task(voiceInstance, speak_fn, True, fut, token, timeout, size, render=render))
+		# The chunk may arrive after the current one started playing.
+		self._start_lookahead()
 		return fut
 
 	def cancel_current(self):
@@ -142,24 +267,73 @@ class TaskManager:
 			done.set()
 
 	def cancel(self):
+		# Everything queued so far is stale now.
+		with self._state_lock:
+			self._generation += 1
+
 		# cancel active
 		self.cancel_current()
 
-		# cancel pending queue
-		try:
-			while True:
-				item = self._q.get_nowait()
-				if isinstance(item, _Task):
-					item.future.cancel()
-				self._q.task_done()
-		except queue.Empty:
-			pass
+		# stop pre-rendering; the worker waits for it before using the engine again
+		with self._state_lock:
+			lookahead = self._lookahead
+		if lookahead:
+			lookahead.token.cancel()
+
+	def pause(self, switch):
+		with self._state_lock:
+			self._paused = switch
+			self._pause_count += 1
+			voice = self._current_voice
+		if voice:
+			if switch:
+				voice.pause()
+			else:
+				voice.resume()
+
+	def active_voices(self):
+		"""The voices the worker or the look-ahead render are using right now."""
+		with self._state_lock:
+			voices = {self._current_voice}
+			if self._lookahead is not None:
+				voices.add(self._lookahead.task.voiceInstance)
+		voices.discard(None)
+		return voices
+
+	def engine_stats(self):
+		return {
+			"seconds_per_char": dict(self._engine_rates),
+			"restarts": dict(self._engine_restarts),
+		}
+
+	def gap_stats(self):
+		return {
+			"count": self._gap_count,
+			"mean_ms": self._gap_total / self._gap_count * 1000 if self._gap_count else 0.0,
+			"max_ms": self._gap_max * 1000,
+			"prerendered": self._lookahead_used,
+			"prerender_missed": self._lookahead_missed,
+		}
 
 	def shutdown(self):
-		self.cancel()
+		# Stop first, so that the worker woken by cancel sees it.
 		self._stop.set()
+		with self._state_lock:
+			restarted = self._restarted
+		if restarted:
+			restarted.set()
+		self.cancel()
 		self._q.put(None)
 		self._thread.join()
+		self._lookahead_executor.shutdown(wait=True)
+
+		try:
+			while True:
+				task = self._q.get_nowait()
+				if task is not None:
+					task.future.cancel()
+		except queue.Empty:
+			pass
 
 		try:
 			synthIndexReached.unregister(IndexReached_notify_forward)
@@ -189,6 +363,12 @@ class TaskManager:
 		if done:
 			done.set()
 
+	def _put(self, task: _Task):
+		with self._state_lock:
+			task.generation = self._generation
+			self._last_put = task
+		self._q.put(task)
+
 	def _worker(self):
 		while not self._stop.is_set():
 			task = self._q.get()
@@ -199,7 +379,134 @@ class TaskManager:
 			finally:
 				self._q.task_done()
 
+	def _record_gap(self, task: _Task):
+		last = self._last_completion
+		self._last_completion = None
+		# Only a task that was already waiting when the previous one completed
+		# measures the hand-over, and not idle time.
+		if last is None or task.queued > last:
+			return
+		gap = time.perf_counter() - last
+		self._gap_count += 1
+		self._gap_total += gap
+		self._gap_max = max(self._gap_max, gap)
+
+	@staticmethod
+	def _rate_key(voice):
+		"""Rates are measured per speech rate setting, a lower one takes longer per character."""
+		return voice.engine, getattr(voice, "rate", None), getattr(voice, "rateBoost", None)
+
+	def _deadline(self, task: _Task):
+		if task.timeout is not None:
+			return task.timeout
+		key = self._rate_key(task.voiceInstance)
+		if self._engine_samples.get(key, 0) < WATCHDOG_MIN_SAMPLES:
+			rate = WATCHDOG_UNMEASURED_SECONDS_PER_CHAR
+		else:
+			rate = self._engine_rates[key]
+		return WATCHDOG_MIN_SECONDS + task.size * rate * WATCHDOG_FACTOR
+
+	def _record_rate(self, task: _Task, elapsed):
+		if task.size < WATCHDOG_MIN_SAMPLE_CHARS:
+			return
+		key = self._rate_key(task.voiceInstance)
+		sample = elapsed / task.size
+		rate = self._engine_rates.get(key)
+		self._engine_rates[key] = sample if rate is None else rate * 0.8 + sample * 0.2
+		self._engine_samples[key] = self._engine_samples.get(key, 0) + 1
+
+	def _restart_engine(self, task: _Task):
+		voice = task.voiceInstance
+		engine = voice.engine
+		self._engine_restarts[engine] = self._engine_restarts.get(engine, 0) + 1
+		log.warning("WorldVoice: %s engine did not finish speaking in time, restarting it", engine)
+		# Some engines can only be created on the main thread, and settings
+		# change the cores from there, so the core is swapped on that thread.
+		# The worker waits, so no chunk runs on a core that is being replaced.
+		restarted = threading.Event()
+
+		def _restart():
+			try:
+				if not self._stop.is_set():
+					voice.restartEngine()
+			except Exception:
+				log.error("WorldVoice: restarting %s engine failed", engine, exc_info=True)
+			finally:
+				restarted.set()
+
+		with self._state_lock:
+			self._restarted = restarted
+		queueHandler.queueFunction(queueHandler.eventQueue, _restart)
+		if not restarted.wait(ENGINE_RESTART_TIMEOUT):
+			log.error("WorldVoice: %s engine restart did not finish in %.0fs", engine, ENGINE_RESTART_TIMEOUT)
+		with self._state_lock:
+			self._restarted = None
+
+	def _start_lookahead(self):
+		"""
+		Pre-render the next queued speech task while the current one plays, if
+		it goes to another engine. A chunk for the engine in use can't be
+		rendered before that engine is done with the current one.
+		"""
+		with self._state_lock:
+			current = self._current_voice
+			if current is None or self._lookahead is not None or self._stop.is_set():
+				return
+			with self._q.mutex:
+				task = self._q.queue[0] if self._q.queue else None
+			if (
+				task is None
+				or task.render is None
+				or task.generation != self._generation
+				or task.future.cancelled()
+				or getattr(task.voiceInstance, "core", None) is getattr(current, "core", None)
+			):
+				return
+			token = CancellationToken()
+			self._lookahead = _Lookahead(task, token, self._lookahead_executor.submit(task.render, token))
+
+	def _take_lookahead(self, task: _Task):
+		"""
+		Return the player of the pre-rendered task, or None to synthesize it
+		live. A render of the task still running is given up to
+		LOOKAHEAD_WAIT_SECONDS to finish. A render that is stale or still
+		running after that is cancelled and awaited, so the engine is free again
+		on return.
+		"""
+		with self._state_lock:
+			lookahead = self._lookahead
+			self._lookahead = None
+		if lookahead is None:
+			return None
+
+		if lookahead.task is task and task.generation == self._generation and not lookahead.token.is_cancelled():
+			wait((lookahead.future,), timeout=LOOKAHEAD_WAIT_SECONDS)
+		if lookahead.task is not task or not lookahead.future.done():
+			if lookahead.task is task and not lookahead.token.is_cancelled():
+				self._lookahead_missed += 1
+			lookahead.token.cancel()
+		try:
+			play = lookahead.future.result()
+		except Exception:
+			log.debugWarning("Pre-rendering speech failed", exc_info=True)
+			return None
+		if lookahead.task is not task or lookahead.token.is_cancelled():
+			return None
+		if play is not None:
+			self._lookahead_used += 1
+		return play
+
 	def _run_one(self, task: _Task):
+		with self._state_lock:
+			task.taken = True
+			if self._last_put is task:
+				self._last_put = None
+
+		play = self._take_lookahead(task)
+
+		if task.generation != self._generation:
+			task.future.cancel()
+			return
 
 		if task.future.cancelled():
 			return
@@ -212,42 +519,80 @@ class TaskManager:
 			self._current_voice = task.voiceInstance
 			self._current_token = task.token
 
+		self._start_lookahead()
+
 		try:
 			# ---------------- normal task ----------------
 
 			if not task.wait_done:
+				self._last_completion = None
 				result = task.run()
 				task.future.set_result(result)
 				return
 
 			# ---------------- speech task ----------------
 
-			done = threading.Event()
+			# The engine's done signal, cancel and shutdown all set the same
+			# event, so the worker wakes exactly once per task.
+			done = _Completion()
 
 			with self._state_lock:
 				self._current_done_event = done
 
-			task.run()
+			if task.token:
+				task.token.add_callback(done.set)
+			try:
+				self._record_gap(task)
+				started = time.perf_counter()
+				pauses = self._pause_count
+				if play is not None:
+					play()
+				else:
+					task.run()
+				deadline = self._deadline(task)
+				seen = pauses
+				finished = done.wait(deadline)
+				# Paused speech is not a hung engine, and speech paused during
+				# a wait gets another full deadline after it resumed.
+				while not finished and (self._paused or self._pause_count != seen):
+					seen = self._pause_count
+					finished = done.wait(deadline)
+			finally:
+				if task.token:
+					task.token.remove_callback(done.set)
 
-			start = time.monotonic()
+			# Cancelled while speaking, which also ends the wait early.
+			if self._stop.is_set() or task.generation != self._generation or (task.token and task.token.is_cancelled()):
+				task.future.cancel()
+				return
 
-			while True:
-				if self._stop.is_set():
-					task.future.cancel()
-					return
+			if not finished:
+				self._restart_engine(task)
+				task.future.set_exception(TimeoutError("Speech timeout"))
+				return
 
-				if task.token and task.token.is_cancelled():
+			if pauses == self._pause_count:
+				self._record_rate(task, done.time - started)
+
+			if task.pause:
+				# Engines report done once their player has drained, so this wait
+				# is heard as silence of the same length, and cancel wakes it like
+				# the done wait. Engines without native breaks have no common
+				# player that zeroed samples could be fed to.
+				done = _Completion()
+				with self._state_lock:
+					self._current_done_event = done
+				if task.generation == self._generation:
+					done.wait(task.pause)
+				# Stamps the end of the pause for the next hand-over gap.
+				done.set()
+				if self._stop.is_set() or task.generation != self._generation:
 					task.future.cancel()
 					return
 
-				if task.timeout is not None:
-					if time.monotonic() - start > task.timeout:
-						task.future.set_exception(TimeoutError("Speech timeout"))
-						return
-
-				if done.wait(0.05):
-					task.future.set_result(True)
-					return
+			self._last_completion = done.time
+			task.future.set_result(True)
+			return
 
 		except Exception as e:
 			task.future.set_exception(e)
@@ -1,17 +1,35 @@
 from collections import OrderedDict, defaultdict
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from dataclasses import asdict, dataclass
 from operator import attrgetter
-from typing import Callable, TypeVar, Dict, List
+from types import MappingProxyType
+from typing import Callable, TypeVar, Dict, List, Mapping
+import os
 import re
+import threading
 import time
 
 import config
+import extensionPoints
+import globalVars
 import languageHandler
+import queueHandler
 from logHandler import log
 from synthDriverHandler import VoiceInfo
 
+from .catalogCache import VoiceCatalogCache, fingerprint
+from .driver import pendingCommits, sharedParameters
 from .engine import EngineType, READY_ENGINE_CLASS, get_engine_enabled, refresh_ready_engine_classes
 
+# How long speech and settings wait for the engine of a voice still starting in
+# the background, before they fall back to the default voice for now.
+ENGINE_READY_WAIT = 0.15
+VOICE_CATALOG_CACHE_FILE = "WorldVoice-voiceCatalog.json"
+# Switches of its engine's shared core a voice causes before it may get a dedicated core.
+DEDICATED_CORE_SWITCHES = 3
+# Engines started and enumerated at the same time.
+ENGINE_INIT_WORKERS = 4
+
 T = TypeVar("T")
 K = TypeVar("K")
 V = TypeVar("V")
@@ -56,6 +74,73 @@ class VoiceMeta:
 	locale: str
 
 
+class VoiceCatalogView(object):
+	"""
+	The locale groupings of a set of voices, either all of them or those of one engine.
+	"""
+
+	def __init__(self, voices: tuple[VoiceMeta, ...]):
+		self.voices = voices
+		self.localeToVoices: Mapping[str, tuple[str, ...]] = MappingProxyType({
+			locale: tuple(names) for locale, names in groupVoicesByPrimaryLocale(voices).items()
+		})
+		self.languages: tuple[str, ...] = tuple(sorted(self.localeToVoices))
+		self._localesToNames = None
+
+	@property
+	def localesToNames(self) -> Mapping[str, str]:
+		# Built on first use, since language descriptions are only needed by the settings dialogs.
+		if self._localesToNames is None:
+			self._localesToNames = MappingProxyType({
+				locale: getLocaleReadableName(locale) for locale in self.localeToVoices
+			})
+		return self._localesToNames
+
+
+class VoiceCatalog(object):
+	"""
+	An immutable, indexed voice table, built once from the voices of the installed engines.
+	"""
+
+	def __init__(self, voices: List[VoiceMeta]):
+		self.voices: tuple[VoiceMeta, ...] = tuple(sorted(voices, key=attrgetter("engine", "language", "name")))
+		self.byName: Mapping[str, VoiceMeta] = MappingProxyType({v.name: v for v in self.voices})
+
+		def index(field: str, applyKey: Callable[[str], str]) -> Mapping[str, tuple[VoiceMeta, ...]]:
+			groups = groupByField(self.voices, field, applyKey, lambda v: v)
+			return MappingProxyType({key: tuple(items) for key, items in groups.items()})
+
+		self.byEngine = index("engine", lambda engine: engine)
+		self.byLanguage = index("language", lambda language: language)
+		self.byLocale = index("locale", lambda locale: locale)
+		self.byPrimaryLocale = index("locale", getPrimaryLocale)
+
+		self.allVoices = VoiceCatalogView(self.voices)
+		self._engineViews = MappingProxyType({
+			engine: VoiceCatalogView(voices) for engine, voices in self.byEngine.items()
+		})
+
+	def __len__(self):
+		return len(self.voices)
+
+	def __iter__(self):
+		return iter(self.voices)
+
+	def view(self, engine: str | None = None) -> VoiceCatalogView:
+		"""Return the view of the voices of engine, or of all voices if engine is None."""
+		if engine is None:
+			return self.allVoices
+		try:
+			return self._engineViews[engine]
+		except KeyError:
+			return VoiceCatalogView(())
+
+
+def getLocaleReadableName(locale_: str) -> str:
+	description = languageHandler.getLanguageDescription(locale_)
+	return "%s - %s" % (description, locale_) if description else locale_
+
+
 class VoiceManager(object):
 	@classmethod
 	def ready(cls):
@@ -63,6 +148,8 @@ class VoiceManager(object):
 
 	def __init__(self, taskManager):
 		init_start = time.perf_counter()
+		# Voice instance for each language seen in speech, see getVoiceInstanceForLanguage.
+		self._languageVoices = {}
 		self.keepMainLocaleEngineConsistent = config.conf["WorldVoice"]["autoLanguageSwitching"]["KeepMainLocaleEngineConsistent"]
 		self.taskManager = taskManager
 
@@ -81,39 +168,113 @@ class VoiceManager(object):
 			", ".join(eng.name for eng in enabled),
 		)
 
-		step_start = time.perf_counter()
-		self.installEngine = []
+		# Notified with no arguments, on the main thread, when voices of an engine started in
+		# the background arrive or can speak, and when the default voice waiting for one is applied.
+		self.catalogChanged = extensionPoints.Action()
+		self._catalogLock = threading.Lock()
+		self._engineVoices = {}
+		self._engineReady = {}
+		# Default voice asked for while its engine was starting, switched to once it is up.
+		self._pendingDefaultVoiceName = None
+		self._warmUpThread = None
+		self._catalogCache = VoiceCatalogCache(os.path.join(globalVars.appArgs.configPath, VOICE_CATALOG_CACHE_FILE))
+		self._catalogCache.load()
+		self._engineFingerprints = {}
+
+		readyEngines = []
 		for eng in enabled:
 			try:
-				cls = READY_ENGINE_CLASS[eng.name]
+				readyEngines.append(READY_ENGINE_CLASS[eng.name])
 			except KeyError:
 				log.debug("WorldVoice init timing: VoiceManager engine %s not ready", eng.name)
+		self._enginePool = ThreadPoolExecutor(max_workers=ENGINE_INIT_WORKERS, thread_name_prefix="WorldVoiceEngineInit")
+
+		# Results of the pool are merged in the order the engines are enabled.
+		step_start = time.perf_counter()
+		cached = set()
+		for cls, (fp, voices) in zip(readyEngines, self._enginePool.map(self._readCachedVoices, readyEngines)):
+			if fp is not None:
+				self._engineFingerprints[cls.engine] = fp
+			if voices is not None:
+				self._engineVoices[cls.engine] = voices
+				cached.add(cls.engine)
+		log.debug("WorldVoice init timing: VoiceManager catalog cache lookup %.3fs", time.perf_counter() - step_start)
+
+		# Only the engine of the configured voice is needed to speak right away.
+		defaultEngine = self._getConfiguredDefaultEngine()
+		if defaultEngine not in {eng.name for eng in enabled}:
+			defaultEngine = None
+		step_start = time.perf_counter()
+		self.installEngine = []
+		eager = []
+		pending = []
+		for cls in readyEngines:
+			if defaultEngine is None or cls.engine == defaultEngine or cls.initOnMainThread:
+				eager.append(cls)
+			else:
+				self._engineReady[cls.engine] = Future()
+				pending.append(cls)
+		started = {
+			cls: self._enginePool.submit(self._startEngine, cls, "eager", cls.engine not in cached)
+			for cls in eager
+			if not cls.initOnMainThread
+		}
+		for cls in eager:
+			if cls.initOnMainThread:
+				on, voices = self._startEngine(cls, "eager", cls.engine not in cached)
+			else:
+				on, voices = started[cls].result()
+			if not on:
+				self._engineVoices.pop(cls.engine, None)
 				continue
-			try:
-				engine_start = time.perf_counter()
-				cls.engineOn()
-				log.debug(
-					"WorldVoice init timing: VoiceManager eager engineOn %s %.3fs",
-					eng.name,
-					time.perf_counter() - engine_start,
-				)
-				self.installEngine.append(cls)
-			except Exception as e:
-				log.error("engine %s on error: %s", eng.name, e)
+			self.installEngine.append(cls)
+			if voices is not None:
+				self._engineVoices[cls.engine] = voices
 		log.debug(
-			"WorldVoice init timing: VoiceManager installEngine build %.3fs (%s)",
+			"WorldVoice init timing: VoiceManager installEngine build %.3fs (%s, pending %s)",
 			time.perf_counter() - step_start,
 			", ".join(cls.engine for cls in self.installEngine),
+			", ".join(cls.engine for cls in pending),
 		)
 
 		step_start = time.perf_counter()
 		self._setVoiceDatas()
 		log.debug("WorldVoice init timing: VoiceManager _setVoiceDatas total %.3fs", time.perf_counter() - step_start)
-		if not self.table:
-			raise RuntimeError("No WorldVoice voices are available from enabled speech engines.")
+
 		self._instanceCache = {}
+		config.pre_configSave.register(pendingCommits.flush)
+		# Voices whose engine holds a native instance for them, least recently used first.
+		self._residentVoices = OrderedDict()
+		self._residentLock = threading.Lock()
+		self._releasedVoices = set()
+		self._releaseFuture = None
+		self.evictions = 0
+		self.reopens = 0
+		# The voice that last spoke per engine and per core, to account core switches.
+		self._lastVoiceOfEngine = {}
+		self._lastVoiceOfCore = {}
+		self._coreSwitches = defaultdict(int)
+		self._dedicatedCores = defaultdict(list)
+		# Dedicated cores not in use yet per voice, and the tasks that swap them in.
+		self._pendingCores = {}
+		self._coreSwaps = {}
+		self.switchesSaved = 0
 		self.waitfactor = 0
 
+		# Voices served from the cache are checked against the engines once they are up.
+		revalidate = [cls for cls in self.installEngine if cls.engine in cached]
+		for cls in self.installEngine:
+			if cls.engine not in cached:
+				self._storeCachedVoices(cls)
+		running = {cls.engine for cls in self.installEngine}
+		if pending and not any(voiceMeta.engine in running for voiceMeta in self.catalog.voices):
+			# The configured engine has no voices; wait for the others rather than fail,
+			# the default voice has to be one that can speak.
+			self._warmUpEngines(revalidate, pending)
+			revalidate = pending = []
+		if not self.catalog:
+			raise RuntimeError("No WorldVoice voices are available from enabled speech engines.")
+
 		step_start = time.perf_counter()
 		default_meta: VoiceMeta = self._getDefaultVoiceMeta()
 		log.debug(
@@ -131,12 +292,191 @@ class VoiceManager(object):
 		self._defaultVoiceInstance.loadParameter()
 		log.debug("WorldVoice init timing: VoiceManager default loadParameter %.3fs", time.perf_counter() - step_start)
 		log.debug("Created voiceManager instance. Default voice is %s", default_meta.name)
+
+		# Started last: engines that come up report to a manager that is all set up.
+		if pending or revalidate:
+			self._warmUpThread = threading.Thread(target=self._warmUpEngines, args=(revalidate, pending), daemon=True)
+			self._warmUpThread.start()
+		else:
+			self._catalogCache.save()
 		log.debug("WorldVoice init timing: VoiceManager total %.3fs", time.perf_counter() - init_start)
 
+	def _getConfiguredDefaultEngine(self):
+		try:
+			voiceName = config.conf["speech"]["WorldVoice"]["voice"]
+		except KeyError:
+			return None
+		if not voiceName or ":" not in voiceName:
+			return None
+		return voiceName.split(":", 1)[0]
+
+	def _engineOn(self, cls, mode):
+		try:
+			engine_start = time.perf_counter()
+			cls.engineOn()
+			log.debug(
+				"WorldVoice init timing: VoiceManager %s engineOn %s %.3fs",
+				mode,
+				cls.engine,
+				time.perf_counter() - engine_start,
+			)
+			return True
+		except Exception as e:
+			log.error("engine %s on error: %s", cls.engine, e)
+			return False
+
+	def _startEngine(self, cls, mode, listVoices):
+		"""Bring an engine up and list its voices if asked. Returns (started, voices or None)."""
+		if not self._engineOn(cls, mode):
+			return False, None
+		return True, self._loadEngineVoices(cls) if listVoices else None
+
+	def _readCachedVoices(self, cls):
+		"""
+		Return the resource fingerprint of an engine and its cached voices, None
+		for either if it is not cacheable or its resources changed.
+		"""
+		step_start = time.perf_counter()
+		try:
+			paths = cls.resourcePaths()
+			if paths is None:
+				return None, None
+			fp = fingerprint(paths)
+		except Exception:
+			log.error("WorldVoice: %s resource fingerprint failed", cls.engine, exc_info=True)
+			return None, None
+		data = self._catalogCache.get(cls.engine, fp)
+		if data is None:
+			return fp, None
+		try:
+			voices = [VoiceMeta(**v) for v in data]
+		except TypeError:
+			return fp, None
+		log.debug(
+			"WorldVoice init timing: voices from cache %s %.3fs (%d voices)",
+			cls.engine,
+			time.perf_counter() - step_start,
+			len(data),
+		)
+		return fp, voices
+
+	def _storeCachedVoices(self, cls):
+		fp = self._engineFingerprints.get(cls.engine)
+		voices = self._engineVoices.get(cls.engine)
+		if fp is not None and voices is not None:
+			self._catalogCache.put(cls.engine, fp, [asdict(v) for v in voices])
+
+	def _updateEngineVoices(self, cls, voices):
+		"""Replace the voices of an engine, None removes them, and announce a change. Returns whether they changed."""
+		with self._catalogLock:
+			if self._engineVoices.get(cls.engine) == voices:
+				return False
+			if voices is None:
+				del self._engineVoices[cls.engine]
+			else:
+				self._engineVoices[cls.engine] = voices
+			self._setVoiceDatas()
+			# Queued under the lock, so listeners see the updates of concurrent engines in order.
+			self.invalidateLanguageVoices()
+			self._notifyCatalogChanged()
+		return True
+
+	def _notifyCatalogChanged(self):
+		queueHandler.queueFunction(queueHandler.eventQueue, self.catalogChanged.notify)
+
+	def _revalidateEngine(self, cls):
+		self._updateEngineVoices(cls, self._loadEngineVoices(cls))
+		self._storeCachedVoices(cls)
+
+	def _warmUpEngine(self, cls):
+		ready = self._engineReady[cls.engine]
+		try:
+			on, voices = self._startEngine(cls, "background", True)
+			if on:
+				with self._catalogLock:
+					self.installEngine = self.installEngine + [cls]
+				if not self._updateEngineVoices(cls, voices):
+					# The cached voices were listed already, and can speak now: the
+					# languages that fell back to the default voice use them again.
+					with self._catalogLock:
+						self.invalidateLanguageVoices()
+						self._notifyCatalogChanged()
+				self._storeCachedVoices(cls)
+			else:
+				self._updateEngineVoices(cls, None)
+		finally:
+			ready.set_result(cls.core is not None)
+			pending = self._pendingDefaultVoiceName
+			if pending is not None and self._voiceEngine(pending) == cls.engine:
+				queueHandler.queueFunction(queueHandler.eventQueue, self._applyPendingDefaultVoice, pending)
+
+	def _warmUpEngines(self, revalidate, pending):
+		futures = [self._enginePool.submit(self._revalidateEngine, cls) for cls in revalidate]
+		futures += [self._enginePool.submit(self._warmUpEngine, cls) for cls in pending]
+		for future in wait(futures).done:
+			if future.exception() is not None:
+				log.error("WorldVoice engine warm-up failed", exc_info=future.exception())
+		self._catalogCache.save()
+
+	@property
+	def enginesReady(self):
+		"""Whether every enabled engine is up, or failed to come up."""
+		return all(ready.done() for ready in self._engineReady.values())
+
+	def waitForEngine(self, engine, timeout=ENGINE_READY_WAIT):
+		"""
+		Block until an engine that is starting in the background is ready.
+		Returns False if the engine is not enabled, failed to start or timed out.
+		"""
+		ready = self._engineReady.get(engine)
+		if ready is None:
+			return False
+		try:
+			return ready.result(timeout)
+		except FutureTimeoutError:
+			log.debug("WorldVoice: %s engine is not ready after %.2fs", engine, timeout)
+			return False
+
+	def _voiceEngine(self, voiceName):
+		voiceMeta = self.catalog.byName.get(voiceName)
+		if voiceMeta is not None:
+			return voiceMeta.engine
+		if ":" in voiceName:
+			return voiceName.split(":", 1)[0]
+		return None
+
+	def waitForVoice(self, voiceName):
+		"""
+		Whether voiceName can speak now. Its engine is given ENGINE_READY_WAIT if it
+		is still starting, the caller falls back to another voice after that.
+		"""
+		engine = self._voiceEngine(voiceName)
+		if engine in self._engineReady and not self.waitForEngine(engine):
+			return False
+		return voiceName in self._voiceInfos
+
+	def _applyPendingDefaultVoice(self, voiceName):
+		"""Switch to the default voice asked for while its engine was starting, on the main thread."""
+		if self._pendingDefaultVoiceName != voiceName:
+			return
+		self.defaultVoiceName = voiceName
+		# Speech plans resolved with the previous default voice are stale.
+		self.catalogChanged.notify()
+
 	def terminate(self):
+		if self._warmUpThread:
+			self._warmUpThread.join()
+		self._enginePool.shutdown()
+		for future in list(self._pendingCores.values()):
+			if future.cancel() or future.exception():
+				continue
+			future.result().terminate()
+		self._pendingCores.clear()
 		for voiceName, instance in self._instanceCache.items():
 			instance.commit()
 			instance.close()
+		config.pre_configSave.unregister(pendingCommits.flush)
+		pendingCommits.flush()
 
 		for item in READY_ENGINE_CLASS.values():
 			item.engineOff()
@@ -147,18 +487,38 @@ class VoiceManager(object):
 	def defaultVoiceInstance(self):
 		return self._defaultVoiceInstance
 
+	@property
+	def keepMainLocaleEngineConsistent(self):
+		return self._keepMainLocaleEngineConsistent
+
+	@keepMainLocaleEngineConsistent.setter
+	def keepMainLocaleEngineConsistent(self, value):
+		self._keepMainLocaleEngineConsistent = value
+		self.invalidateLanguageVoices()
+
+	def invalidateLanguageVoices(self):
+		"""Forget resolved language voices after a change to the roles or the default voice."""
+		self._languageVoices = {}
+
 	@property
 	def defaultVoiceName(self):
 		return self._defaultVoiceInstance.name
 
 	@defaultVoiceName.setter
 	def defaultVoiceName(self, name):
-		if name not in self._voiceInfos:
-			log.debugWarning("Voice not available, using default voice.")
+		if not self.waitForVoice(name):
+			ready = self._engineReady.get(self._voiceEngine(name))
+			if ready is not None and not ready.done():
+				self._pendingDefaultVoiceName = name
+				log.debug("WorldVoice: %s is used once its engine is up", name)
+			else:
+				log.debugWarning("Voice not available, using default voice.")
 			return
+		self._pendingDefaultVoiceName = None
 		self._defaultVoiceInstance = self.getVoiceInstance(name)
 		self.onKeepEngineConsistent()
 		self.onKeepMainLocaleVoiceConsistent()
+		self.invalidateLanguageVoices()
 
 	@property
 	def waitfactor(self):
@@ -173,10 +533,12 @@ class VoiceManager(object):
 
 	def _getDefaultVoiceMeta(self) -> VoiceMeta:
 		lang = languageHandler.getLanguage()
-		try:
-			return next(v for v in self.table if v.language == lang)
-		except StopIteration:
-			return self.table[0]
+		# Voices listed from the catalog cache may belong to an engine still starting.
+		running = {cls.engine for cls in self.installEngine}
+		for voiceMeta in self.catalog.byLanguage.get(lang, ()) + self.catalog.voices:
+			if voiceMeta.engine in running:
+				return voiceMeta
+		return self.catalog.voices[0]
 
 	def getVoiceInstance(self, voiceName):
 		try:
@@ -186,8 +548,13 @@ class VoiceManager(object):
 		return instance
 
 	def _createVoiceInstance(self, voiceName: str):
-		voiceMeta = next(v for v in self.table if v.name == voiceName)
+		voiceMeta = self.catalog.byName[voiceName]
 		cls = READY_ENGINE_CLASS[voiceMeta.engine]
+		if cls.core is None and not self.waitForEngine(cls.engine):
+			# Listed from the catalog cache, its engine is still starting or failed
+			# to: the default voice stands in, and the voice is built once it is up.
+			log.debug("WorldVoice: %s is not ready, using the default voice", voiceName)
+			return self._defaultVoiceInstance
 		step_start = time.perf_counter()
 		voiceInstance = cls(
 			id=voiceMeta.id,
@@ -212,16 +579,13 @@ class VoiceManager(object):
 		voiceInstance.waitfactor = self.waitfactor
 
 		self._instanceCache[voiceInstance.name] = voiceInstance
+		# Applying its parameters opened the native instance.
+		self._markResident(voiceInstance)
 		return voiceInstance
 
 	def onVoiceParameterConsistent(self, baseInstance):
-		for voiceName, instance in self._instanceCache.items():
-			instance.rate = baseInstance.rate
-			instance.pitch = baseInstance.pitch
-			instance.volume = baseInstance.volume
-			instance.inflection = baseInstance.inflection
-			instance.rateBoost = baseInstance.rateBoost
-			instance.commit()
+		# Other voices take the parameters on when they are next used.
+		sharedParameters.publish(baseInstance)
 
 	def onKeepEngineConsistent(self):
 		temp = defaultdict(lambda: {})
@@ -234,9 +598,10 @@ class VoiceManager(object):
 			else:
 				temp[key] = config.conf["WorldVoice"]["role"][key]
 
+		localeToVoices = self.localeToVoicesMap
 		for localelo, data in config.conf["WorldVoice"]["role"].items():
 			if isinstance(data, config.AggregatedSection):
-				if (localelo not in self.localeToVoicesMap) or ('voice' in data and data['voice'] not in self.localeToVoicesMap[localelo]):
+				if (localelo not in localeToVoices) or ('voice' in data and data['voice'] not in localeToVoices[localelo]):
 					try:
 						del temp[localelo]
 					except KeyError:
@@ -244,6 +609,7 @@ class VoiceManager(object):
 					# log.info(f"locale {localelo} voice {data['voice']} not available")
 
 		config.conf["WorldVoice"]["role"] = temp
+		self.invalidateLanguageVoices()
 
 	def onKeepMainLocaleVoiceConsistent(self):
 		if config.conf["WorldVoice"]["autoLanguageSwitching"]["KeepMainLocaleVoiceConsistent"]:
@@ -255,8 +621,11 @@ class VoiceManager(object):
 			if locale not in config.conf["WorldVoice"]["role"]:
 				config.conf["WorldVoice"]["role"][locale] = {}
 			config.conf["WorldVoice"]["role"][locale]['voice'] = self.defaultVoiceInstance.name
+			self.invalidateLanguageVoices()
 
 	def reload(self):
+		self.invalidateLanguageVoices()
+		pendingCommits.flush()
 		for voiceName, instance in self._instanceCache.items():
 			instance.loadParameter()
 
@@ -267,43 +636,202 @@ class VoiceManager(object):
 			for voiceName, instance in self._instanceCache.items():
 				instance.stop()
 
+	def _loadEngineVoices(self, cls) -> List[VoiceMeta]:
+		voices: List[VoiceMeta] = []
+		step_start = time.perf_counter()
+		voice_count = 0
+		try:
+			engineVoices = cls.voices()
+		except Exception:
+			log.error("WorldVoice: listing %s voices failed", cls.engine, exc_info=True)
+			engineVoices = []
+		for v in engineVoices:
+			voice_count += 1
+			try:
+				engine = v["engine"]
+				voiceId = v["id"]
+				voices.append(VoiceMeta(
+					id=voiceId,
+					name=getVoiceKey(engine, voiceId),
+					description=v.get("description", ""),
+					language=v["language"],
+					engine=engine,
+					locale=v.get("locale", v["language"]),
+				))
+			except KeyError as e:
+				log.error("Invalid voice data: missing %s", e)
+		log.debug(
+			"WorldVoice init timing: voices discovery %s %.3fs (%d voices)",
+			cls.engine,
+			time.perf_counter() - step_start,
+			voice_count,
+		)
+		return voices
+
+	def useVoice(self, voiceInstance):
+		"""Account a chunk of speech about to be sent to a voice."""
+		self._useDedicatedCore(voiceInstance)
+		self._trackCoreSwitch(voiceInstance)
+		self._markResident(voiceInstance)
+
+	def _trackCoreSwitch(self, voiceInstance):
+		"""
+		Count the voice switches dedicated cores saved, and give a voice that
+		keeps switching its engine's shared core a core of its own while the
+		engine's dedicatedCores allow.
+		"""
+		engine = voiceInstance.engine
+		if self._lastVoiceOfEngine.get(engine) is voiceInstance:
+			return
+		self._lastVoiceOfEngine[engine] = voiceInstance
+		# With one core per engine this would be a switch.
+		if self._lastVoiceOfCore.get(voiceInstance.core) is voiceInstance:
+			self.switchesSaved += 1
+		self._lastVoiceOfCore[voiceInstance.core] = voiceInstance
+		if not voiceInstance.supportsDedicatedCore or voiceInstance.hasDedicatedCore or voiceInstance in self._pendingCores:
+			return
+		self._coreSwitches[voiceInstance.name] += 1
+		if self._coreSwitches[voiceInstance.name] < DEDICATED_CORE_SWITCHES:
+			return
+		try:
+			limit = config.conf["WorldVoice"]["dedicatedCores"][engine]
+		except KeyError:
+			return
+		if len(self._dedicatedCores[engine]) >= limit:
+			return
+		# The voice keeps the shared core until its own is built.
+		self._dedicatedCores[engine].append(voiceInstance)
+		self._pendingCores[voiceInstance] = self._buildDedicatedCore(voiceInstance)
+
+	def _buildDedicatedCore(self, voiceInstance):
+		"""
+		Build a dedicated core away from speech: on the engine pool, or on the
+		main thread once it is idle for engines with initOnMainThread.
+		"""
+		if not voiceInstance.initOnMainThread:
+			return self._enginePool.submit(voiceInstance.newDedicatedCore)
+		future = Future()
+
+		def _build():
+			if not future.set_running_or_notify_cancel():
+				return
+			try:
+				future.set_result(voiceInstance.newDedicatedCore())
+			except Exception as e:
+				future.set_exception(e)
+
+		queueHandler.queueFunction(queueHandler.eventQueue, _build)
+		return future
+
+	def _useDedicatedCore(self, voiceInstance):
+		"""
+		Move a voice to its dedicated core once it is built. The core is swapped
+		on the speech worker after the chunks already queued for the shared
+		core, so stop and pause reach the core that is speaking.
+		"""
+		future = self._pendingCores.get(voiceInstance)
+		if future is None or not future.done() or voiceInstance in self._coreSwaps:
+			return
+		if future.exception() is not None:
+			log.error("WorldVoice: opening a dedicated core for %s failed", voiceInstance.name, exc_info=future.exception())
+			self._dropDedicatedCore(voiceInstance)
+			return
+		swap = self.taskManager.add_task(voiceInstance, lambda: voiceInstance.openDedicatedCore(future.result()))
+		self._coreSwaps[voiceInstance] = swap
+		swap.add_done_callback(lambda swap: self._coreSwapped(voiceInstance, swap))
+
+	def _coreSwapped(self, voiceInstance, swap):
+		del self._coreSwaps[voiceInstance]
+		if swap.cancelled():
+			# Dropped by a cancel of speech, swapped in with the next chunk.
+			return
+		if swap.exception() is not None:
+			log.error("WorldVoice: opening a dedicated core for %s failed", voiceInstance.name, exc_info=swap.exception())
+			self._dropDedicatedCore(voiceInstance)
+			return
+		del self._pendingCores[voiceInstance]
+		self._lastVoiceOfCore[voiceInstance.core] = voiceInstance
+		log.debug("WorldVoice: %s speaks on a dedicated core", voiceInstance.name)
+
+	def _dropDedicatedCore(self, voiceInstance):
+		self._pendingCores.pop(voiceInstance, None)
+		self._dedicatedCores[voiceInstance.engine].remove(voiceInstance)
+		# Tried again only after as many switches again.
+		self._coreSwitches[voiceInstance.name] = 0
+
+	def dedicatedCoreStats(self):
+		return {
+			"cores": {engine: [v.name for v in voices] for engine, voices in self._dedicatedCores.items()},
+			"switchesSaved": self.switchesSaved,
+		}
+
+	def _markResident(self, voiceInstance):
+		"""
+		Mark a voice as the most recently used one. Native instances beyond
+		residentVoiceLimit are released, least recently used first.
+		"""
+		if not voiceInstance.nativeInstances:
+			return
+		name = voiceInstance.name
+		with self._residentLock:
+			if name in self._residentVoices:
+				self._residentVoices.move_to_end(name)
+				return
+			if name in self._releasedVoices:
+				self._releasedVoices.discard(name)
+				self.reopens += 1
+			self._residentVoices[name] = voiceInstance
+			limit = config.conf["WorldVoice"]["autoLanguageSwitching"]["residentVoiceLimit"]
+			if not limit or len(self._residentVoices) <= limit:
+				return
+			if self._releaseFuture is not None and not self._releaseFuture.done():
+				return
+			# Released on the speech worker, between tasks, so no engine call is in flight.
+			self._releaseFuture = self.taskManager.add_task(self._defaultVoiceInstance, self._releaseVoices)
+
+	def _releaseVoices(self):
+		limit = config.conf["WorldVoice"]["autoLanguageSwitching"]["residentVoiceLimit"]
+		keep = self.taskManager.active_voices()
+		keep.add(self._defaultVoiceInstance)
+		with self._residentLock:
+			excess = len(self._residentVoices) - limit if limit else 0
+			# The most recently used voice is about to speak.
+			candidates = list(self._residentVoices.values())[:-1]
+			victims = [voice for voice in candidates if voice not in keep][:max(excess, 0)]
+			for voice in victims:
+				del self._residentVoices[voice.name]
+				self._releasedVoices.add(voice.name)
+		for voice in victims:
+			try:
+				if voice.release():
+					self.evictions += 1
+			except Exception:
+				log.error("WorldVoice: releasing %s failed", voice.name, exc_info=True)
+
+	def residentVoiceStats(self):
+		return {
+			"resident": len(self._residentVoices),
+			"limit": config.conf["WorldVoice"]["autoLanguageSwitching"]["residentVoiceLimit"],
+			"evictions": self.evictions,
+			"reopens": self.reopens,
+		}
+
 	def _setVoiceDatas(self):
-		self.table: List[VoiceMeta] = []
 		for cls in self.installEngine:
-			step_start = time.perf_counter()
-			voice_count = 0
-			for v in cls.voices():
-				voice_count += 1
-				try:
-					engine = v["engine"]
-					voiceId = v["id"]
-					self.table.append(VoiceMeta(
-						id=voiceId,
-						name=getVoiceKey(engine, voiceId),
-						description=v.get("description", ""),
-						language=v["language"],
-						engine=engine,
-						locale=v.get("locale", v["language"]),
-					))
-				except KeyError as e:
-					log.error("Invalid voice data: missing %s", e)
-			log.debug(
-				"WorldVoice init timing: voices discovery %s %.3fs (%d voices)",
-				cls.engine,
-				time.perf_counter() - step_start,
-				voice_count,
-			)
+			if cls.engine not in self._engineVoices:
+				self._engineVoices[cls.engine] = self._loadEngineVoices(cls)
+		table: List[VoiceMeta] = [v for voices in self._engineVoices.values() for v in voices]
 
 		step_start = time.perf_counter()
-		self.table.sort(key=attrgetter("engine", "language", "name"))
+		self.catalog = VoiceCatalog(table)
 		log.debug(
-			"WorldVoice init timing: voice table sort %.3fs (%d total voices)",
+			"WorldVoice init timing: voice catalog build %.3fs (%d total voices)",
 			time.perf_counter() - step_start,
-			len(self.table),
+			len(self.catalog),
 		)
 
 		step_start = time.perf_counter()
-		voiceInfos = [VoiceInfo(v.name, v.description, v.language) for v in self.table]
+		voiceInfos = [VoiceInfo(v.name, v.description, v.language) for v in self.catalog]
 		self._voiceInfos = OrderedDict((v.id, v) for v in voiceInfos)
 		log.debug("WorldVoice init timing: voiceInfos build %.3fs", time.perf_counter() - step_start)
 
@@ -311,49 +839,50 @@ class VoiceManager(object):
 	def voiceInfos(self):
 		return self._voiceInfos
 
+	@property
+	def table(self):
+		return self.catalog.voices
+
+	@property
+	def catalogView(self) -> VoiceCatalogView:
+		"""The voices offered for language roles: those of the main engine if it is kept consistent, otherwise all."""
+		if self.keepMainLocaleEngineConsistent:
+			return self.catalog.view(self._defaultVoiceInstance.engine)
+		return self.catalog.allVoices
+
 	@property
 	def allLanguages(self):
-		table = [v for v in self.table]
-		_localesToVoices = groupVoicesByPrimaryLocale(table)
-		return sorted([l for l in _localesToVoices if len(_localesToVoices[l]) > 0])
+		return list(self.catalog.allVoices.languages)
 
 	@property
 	def languages(self):
-		if self.keepMainLocaleEngineConsistent:
-			table = [v for v in self.table if v.engine == self._defaultVoiceInstance.engine]
-		else:
-			table = [v for v in self.table]
-		_localesToVoices = groupVoicesByPrimaryLocale(table)
-		return sorted([l for l in _localesToVoices if len(_localesToVoices[l]) > 0])
+		return list(self.catalogView.languages)
 
 	@property
 	def localeToVoicesMap(self):
-		if self.keepMainLocaleEngineConsistent:
-			table = [v for v in self.table if v.engine == self._defaultVoiceInstance.engine]
-		else:
-			table = [v for v in self.table]
-		return groupVoicesByPrimaryLocale(table)
+		return self.catalogView.localeToVoices
 
 	@property
 	def localesToNamesMap(self):
-		if self.keepMainLocaleEngineConsistent:
-			table = [v for v in self.table if v.engine == self._defaultVoiceInstance.engine]
-		else:
-			table = [v for v in self.table]
-		_localesToVoices = groupVoicesByPrimaryLocale(table)
-		return {item: self._getLocaleReadableName(item) for item in _localesToVoices}
+		return self.catalogView.localesToNames
 
 	def getVoiceNameForLanguage(self, language):
 		configured = self._getConfiguredVoiceNameForLanguage(language)
-		if configured is not None and configured in self.voiceInfos:
+		if configured is not None and self.waitForVoice(configured):
 			return configured
 		return self.defaultVoiceName
 
 	def getVoiceInstanceForLanguage(self, language):
+		# An invalidation while resolving replaces the memo, so the answer does not outlive it.
+		languageVoices = self._languageVoices
+		try:
+			return languageVoices[language]
+		except KeyError:
+			pass
 		voiceName = self.getVoiceNameForLanguage(language)
-		if voiceName:
-			return self.getVoiceInstance(voiceName)
-		return None
+		instance = self.getVoiceInstance(voiceName) if voiceName else None
+		languageVoices[language] = instance
+		return instance
 
 	def _getConfiguredVoiceNameForLanguage(self, language):
 		voice = None
@@ -374,5 +903,4 @@ class VoiceManager(object):
 		return voice
 
 	def _getLocaleReadableName(self, locale_):
-		description = languageHandler.getLanguageDescription(locale_)
-		return "%s - %s" % (description, locale_) if description else locale_
+		return getLocaleReadableName(locale_)
@@ -0,0 +1,21 @@
+"""
+Tests run outside NVDA: the modules under stubs stand in for the NVDA modules
+WorldVoice imports, and only implement what the tests touch.
+"""
+
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, "stubs"))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "addon"))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _resetConfig():
+	config.conf.reset()
+	yield
@@ -0,0 +1,12 @@
+import builtins
+
+
+def initTranslation():
+	builtins._ = lambda text: text
+
+
+def getRunningAddons():
+	return []
+
+
+initTranslation()
@@ -0,0 +1,19 @@
+class DriverSetting:
+	def __init__(self, id, displayNameWithAccelerator="", availableInSettingsRing=False, defaultVal=None, displayName=None, **kwargs):
+		self.id = id
+		self.displayNameWithAccelerator = displayNameWithAccelerator
+		self.displayName = displayName or displayNameWithAccelerator
+		self.availableInSettingsRing = availableInSettingsRing
+		self.defaultVal = defaultVal
+
+
+class BooleanDriverSetting(DriverSetting):
+	pass
+
+
+class NumericDriverSetting(DriverSetting):
+	def __init__(self, id, displayNameWithAccelerator="", availableInSettingsRing=False, defaultVal=50, minVal=0, maxVal=100, minStep=1, **kwargs):
+		super().__init__(id, displayNameWithAccelerator, availableInSettingsRing, defaultVal, **kwargs)
+		self.minVal = minVal
+		self.maxVal = maxVal
+		self.minStep = minStep
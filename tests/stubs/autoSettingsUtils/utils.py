@@ -0,0 +1,4 @@
+class StringParameterInfo:
+	def __init__(self, id, displayName):
+		self.id = id
+		self.displayName = displayName
@@ -0,0 +1,2 @@
+version_year = 2025
+version_major = 1
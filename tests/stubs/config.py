@@ -0,0 +1,70 @@
+"""A dict backed configuration whose spec assignments fill in their defaults."""
+
+import re
+
+import extensionPoints
+
+pre_configSave = extensionPoints.Action()
+post_configProfileSwitch = extensionPoints.Action()
+
+_DEFAULT_RE = re.compile(r"^(\w+)\((?:.*?default=([^,)]*))?.*\)$")
+
+
+class AggregatedSection(dict):
+	pass
+
+
+def _convert(kind, value):
+	if value is None or value == "None":
+		return None
+	if kind == "boolean":
+		return value.lower() == "true"
+	if kind == "integer":
+		return int(value)
+	if kind == "float":
+		return float(value)
+	return value
+
+
+def defaults(spec):
+	section = AggregatedSection()
+	for key, value in spec.items():
+		if key == "__many__":
+			continue
+		if isinstance(value, dict):
+			section[key] = defaults(value)
+			continue
+		match = _DEFAULT_RE.match(value)
+		section[key] = _convert(match.group(1), match.group(2)) if match else None
+	return section
+
+
+class _Spec(dict):
+	def __init__(self, conf):
+		super().__init__()
+		self._conf = conf
+
+	def __setitem__(self, key, value):
+		super().__setitem__(key, value)
+		self._conf[key] = defaults(value)
+
+
+class _Conf(dict):
+	def __init__(self):
+		super().__init__()
+		self.spec = _Spec(self)
+
+	def reset(self):
+		"""Restore the defaults of every section set through spec, and the NVDA sections."""
+		self.clear()
+		self.update({
+			"general": {"loggingLevel": "INFO"},
+			"speech": {"trustVoiceLanguage": True, "outputDevice": "default"},
+			"audio": {"outputDevice": "default"},
+		})
+		for key, value in self.spec.items():
+			self[key] = defaults(value)
+
+
+conf = _Conf()
+conf.reset()
@@ -0,0 +1,8 @@
+import threading
+
+
+def callLater(delay, callable, *args, **kwargs):
+	timer = threading.Timer(delay / 1000, callable, args, kwargs)
+	timer.daemon = True
+	timer.start()
+	return timer
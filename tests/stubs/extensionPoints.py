@@ -0,0 +1,24 @@
+class Action:
+	def __init__(self):
+		self._handlers = []
+
+	def register(self, handler):
+		if handler not in self._handlers:
+			self._handlers.append(handler)
+
+	def unregister(self, handler):
+		try:
+			self._handlers.remove(handler)
+		except ValueError:
+			pass
+
+	def notify(self, **kwargs):
+		for handler in list(self._handlers):
+			handler(**kwargs)
+
+
+class Filter(Action):
+	def apply(self, value, **kwargs):
+		for handler in list(self._handlers):
+			value = handler(value, **kwargs)
+		return value
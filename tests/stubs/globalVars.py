@@ -0,0 +1,5 @@
+import tempfile
+import types
+
+appArgs = types.SimpleNamespace(configPath=tempfile.mkdtemp(prefix="WorldVoiceTests"))
+appDir = appArgs.configPath
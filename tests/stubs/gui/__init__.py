@@ -0,0 +1,7 @@
+from . import settingsDialogs  # noqa: F401
+
+mainFrame = None
+
+
+def _isDebug():
+	return False
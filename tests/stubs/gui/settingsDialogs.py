@@ -0,0 +1,6 @@
+class SettingsPanel:
+	pass
+
+
+class VoiceSettingsPanel(SettingsPanel):
+	pass
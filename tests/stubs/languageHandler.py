@@ -0,0 +1,10 @@
+def getLanguage():
+	return "en"
+
+
+def getLanguageDescription(language):
+	return None
+
+
+def getAvailableLanguages(presentational=False):
+	return [("en", "English")]
@@ -0,0 +1,9 @@
+import logging
+
+
+class _Logger(logging.Logger):
+	def debugWarning(self, msg, *args, **kwargs):
+		self.debug(msg, *args, **kwargs)
+
+
+log = _Logger("nvda")
@@ -0,0 +1,5 @@
+eventQueue = object()
+
+
+def queueFunction(queue, func, *args, **kwargs):
+	func(*args, **kwargs)
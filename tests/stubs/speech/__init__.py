@@ -0,0 +1,3 @@
+from . import commands, extensions, priorities, speech  # noqa: F401
+
+CHUNK_SEPARATOR = "  "
@@ -0,0 +1,80 @@
+class SpeechCommand:
+	pass
+
+
+class SynthCommand(SpeechCommand):
+	pass
+
+
+class SynthParamCommand(SynthCommand):
+	isDefault = False
+
+
+class IndexCommand(SynthCommand):
+	def __init__(self, index):
+		self.index = index
+
+	def __repr__(self):
+		return "IndexCommand(%r)" % self.index
+
+
+class CharacterModeCommand(SynthParamCommand):
+	def __init__(self, state):
+		self.state = state
+		self.isDefault = not state
+
+	def __repr__(self):
+		return "CharacterModeCommand(%r)" % self.state
+
+
+class LangChangeCommand(SynthParamCommand):
+	def __init__(self, lang):
+		self.lang = lang
+		self.isDefault = not lang
+
+	def __repr__(self):
+		return "LangChangeCommand (%r)" % self.lang
+
+
+class BreakCommand(SynthCommand):
+	def __init__(self, time=0):
+		self.time = time
+
+	def __repr__(self):
+		return "BreakCommand(time=%d)" % self.time
+
+
+class _ProsodyCommand(SynthParamCommand):
+	def __init__(self, offset=0, multiplier=1):
+		self._offset = offset
+		self._multiplier = multiplier
+		self.isDefault = not offset and multiplier == 1
+
+	@property
+	def offset(self):
+		return self._offset
+
+	@property
+	def multiplier(self):
+		return self._multiplier
+
+	@property
+	def newValue(self):
+		return 50 + self._offset
+
+	def __repr__(self):
+		if self._offset:
+			return "%s(offset=%d)" % (type(self).__name__, self._offset)
+		return "%s(multiplier=%g)" % (type(self).__name__, self._multiplier)
+
+
+class PitchCommand(_ProsodyCommand):
+	pass
+
+
+class RateCommand(_ProsodyCommand):
+	pass
+
+
+class VolumeCommand(_ProsodyCommand):
+	pass
@@ -0,0 +1,5 @@
+import extensionPoints
+
+filter_speechSequence = extensionPoints.Filter()
+speechCanceled = extensionPoints.Action()
+pre_speech = extensionPoints.Action()
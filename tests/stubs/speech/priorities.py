@@ -0,0 +1,10 @@
+from enum import IntEnum
+
+
+class SpeechPriority(IntEnum):
+	NORMAL = 0
+	NEXT = 1
+	NOW = 2
+
+
+Spri = SpeechPriority
@@ -0,0 +1,2 @@
+def speakSpelling(text, locale=None, useCharacterDescriptions=False, priority=None):
+	pass
@@ -0,0 +1,2 @@
+def processText(text):
+	return text
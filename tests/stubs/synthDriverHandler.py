@@ -0,0 +1,93 @@
+import types
+
+import extensionPoints
+from autoSettingsUtils.driverSetting import BooleanDriverSetting, DriverSetting, NumericDriverSetting
+
+synthIndexReached = extensionPoints.Action()
+synthDoneSpeaking = extensionPoints.Action()
+synthChanged = extensionPoints.Action()
+
+_synth = types.SimpleNamespace(name="WorldVoice", language="en")
+
+
+def getSynth():
+	return _synth
+
+
+def setSynth(synth):
+	global _synth
+	_synth = synth
+
+
+class VoiceInfo:
+	def __init__(self, id, displayName, language=None):
+		self.id = id
+		self.displayName = displayName
+		self.language = language
+
+
+class LanguageInfo(VoiceInfo):
+	def __init__(self, id):
+		super().__init__(id, id, id)
+
+
+class SynthDriver:
+	name = ""
+	description = ""
+	supportedSettings = ()
+	supportedCommands = frozenset()
+	supportedNotifications = frozenset()
+
+	@classmethod
+	def VoiceSetting(cls):
+		return DriverSetting("voice", "&Voice")
+
+	@classmethod
+	def VariantSetting(cls):
+		return DriverSetting("variant", "V&ariant")
+
+	@classmethod
+	def RateSetting(cls, minStep=1):
+		return NumericDriverSetting("rate", "&Rate", minStep=minStep)
+
+	@classmethod
+	def RateBoostSetting(cls):
+		return BooleanDriverSetting("rateBoost", "Rate boos&t")
+
+	@classmethod
+	def PitchSetting(cls, minStep=1):
+		return NumericDriverSetting("pitch", "&Pitch", minStep=minStep)
+
+	@classmethod
+	def InflectionSetting(cls, minStep=1):
+		return NumericDriverSetting("inflection", "&Inflection", minStep=minStep)
+
+	@classmethod
+	def VolumeSetting(cls, minStep=1):
+		return NumericDriverSetting("volume", "V&olume", minStep=minStep)
+
+	def __getattr__(self, name):
+		# The auto properties of NVDA's AutoPropertyObject.
+		if name.startswith("_"):
+			raise AttributeError(name)
+		try:
+			getter = object.__getattribute__(self, "_get_" + name)
+		except AttributeError:
+			raise AttributeError(name) from None
+		return getter()
+
+	def __setattr__(self, name, value):
+		setter = getattr(type(self), "_set_" + name, None)
+		if setter is not None and not name.startswith("_"):
+			setter(self, value)
+		else:
+			object.__setattr__(self, name, value)
+
+	def loadSettings(self, onlyChanged=False):
+		pass
+
+	def saveSettings(self):
+		pass
+
+	def terminate(self):
+		pass
@@ -0,0 +1,5 @@
+FD_SAVE = FD_OVERWRITE_PROMPT = ID_OK = OK = ICON_INFORMATION = 0
+
+
+def CallAfter(func, *args, **kwargs):
+	func(*args, **kwargs)
@@ -0,0 +1,49 @@
+from synthDrivers.WorldVoice.cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+	cache = LRUCache(maxsize=2)
+	cache.put("a", 1)
+	cache.put("b", 2)
+	assert cache.get("a") == 1
+	cache.put("c", 3)
+	assert cache.get("b") is None
+	assert cache.get("a") == 1
+	assert cache.get("c") == 3
+
+
+def test_evicts_by_cost():
+	cache = LRUCache(maxsize=10, maxcost=5)
+	cache.put("a", 1, cost=3)
+	cache.put("b", 2, cost=2)
+	assert cache.cost == 5
+	cache.put("c", 3, cost=1)
+	assert cache.get("a") is None
+	assert cache.cost == 3
+
+
+def test_skips_entry_above_maxcost():
+	cache = LRUCache(maxsize=10, maxcost=5)
+	cache.put("a", 1, cost=6)
+	assert len(cache) == 0
+	assert cache.cost == 0
+
+
+def test_replacing_entry_replaces_cost():
+	cache = LRUCache(maxsize=10, maxcost=10)
+	cache.put("a", 1, cost=4)
+	cache.put("a", 2, cost=1)
+	assert cache.get("a") == 2
+	assert cache.cost == 1
+
+
+def test_stats():
+	cache = LRUCache(maxsize=2)
+	cache.put("a", 1)
+	cache.get("a")
+	cache.get("b")
+	stats = cache.stats()
+	assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+	assert cache.hit_rate == 0.5
+	cache.clear()
+	assert len(cache) == 0 and cache.cost == 0
@@ -0,0 +1,68 @@
+import os
+
+from synthDrivers.WorldVoice.catalogCache import CATALOG_CACHE_VERSION, VoiceCatalogCache, fingerprint
+
+VOICES = [{"id": "v1", "name": "E:v1", "description": "", "language": "en", "engine": "E", "locale": "en"}]
+
+
+def _write(path, data):
+	with open(path, "w") as f:
+		f.write(data)
+
+
+def test_fingerprint_tracks_resources(tmp_path):
+	voice = tmp_path / "voice.dat"
+	_write(voice, "one")
+	first = fingerprint([str(tmp_path)])
+	assert fingerprint([str(tmp_path)]) == first
+	_write(voice, "two!")
+	assert fingerprint([str(tmp_path)]) != first
+
+
+def test_fingerprint_ignores_path_order_and_duplicates(tmp_path):
+	a = tmp_path / "a"
+	b = tmp_path / "b"
+	a.mkdir()
+	b.mkdir()
+	assert fingerprint([str(a), str(b)]) == fingerprint([str(b), str(a), str(b)])
+
+
+def test_fingerprint_of_missing_path(tmp_path):
+	missing = str(tmp_path / "missing")
+	assert fingerprint([missing]) != fingerprint([str(tmp_path)])
+
+
+def test_round_trip(tmp_path):
+	path = str(tmp_path / "catalog.json")
+	cache = VoiceCatalogCache(path)
+	cache.put("E", "fp", VOICES)
+	cache.save()
+	loaded = VoiceCatalogCache(path)
+	loaded.load()
+	assert loaded.get("E", "fp") == VOICES
+	assert loaded.get("E", "other") is None
+	assert loaded.get("F", "fp") is None
+
+
+def test_save_only_when_changed(tmp_path):
+	path = str(tmp_path / "catalog.json")
+	cache = VoiceCatalogCache(path)
+	cache.save()
+	assert not os.path.exists(path)
+	cache.put("E", "fp", VOICES)
+	cache.save()
+	os.remove(path)
+	cache.put("E", "fp", VOICES)
+	cache.save()
+	assert not os.path.exists(path)
+
+
+def test_ignores_other_versions_and_garbage(tmp_path):
+	path = str(tmp_path / "catalog.json")
+	_write(path, '{"version": %d, "engines": {"E": {"fingerprint": "fp", "voices": []}}}' % (CATALOG_CACHE_VERSION + 1))
+	cache = VoiceCatalogCache(path)
+	cache.load()
+	assert cache.get("E", "fp") is None
+	_write(path, "not json")
+	cache.load()
+	assert cache.get("E", "fp") is None
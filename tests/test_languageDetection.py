@@ -0,0 +1,110 @@
+import gzip
+import itertools
+import json
+import os
+
+import pytest
+
+import config
+import synthDriverHandler
+from generics.speechSymbols.models import SpeechSymbol, SpeechSymbols
+from synthDrivers.WorldVoice import languageDetection
+from synthDrivers.WorldVoice._speechcommand import WVLangChangeCommand
+from synthDrivers.WorldVoice.languageDetection import blockData, blocks
+
+# Output of the character by character detector the class table replaced,
+# recorded over mixed scripts, speech symbols and settings.
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "data", "languageDetection.json.gz")
+
+with gzip.open(GOLDEN_FILE, "rt", encoding="utf-8") as f:
+	GOLDEN = json.load(f)
+
+
+def _settings(case):
+	return (case["languages"], case["symbols"], case["ignoreNumbers"], case["ignorePunctuation"], case["defaultLanguage"])
+
+
+def _decode(items):
+	return [WVLangChangeCommand(item["lang"]) if isinstance(item, dict) else item for item in items]
+
+
+def _encode(items):
+	return [{"lang": item.lang} if isinstance(item, WVLangChangeCommand) else item for item in items]
+
+
+def _symbols():
+	symbols = SpeechSymbols()
+	for identifier, replacement, language, mode in GOLDEN["symbols"]:
+		symbols.symbols[identifier] = SpeechSymbol(identifier, replacement, language, mode)
+	return symbols
+
+
+@pytest.mark.parametrize(
+	"settings, cases",
+	[(settings, list(cases)) for settings, cases in itertools.groupby(GOLDEN["cases"], _settings)],
+	ids=lambda value: "-".join(map(str, value)) if isinstance(value, tuple) else "",
+)
+def test_matches_previous_detector(monkeypatch, settings, cases):
+	languages, symbols, ignoreNumbers, ignorePunctuation, defaultLanguage = settings
+	conf = config.conf["WorldVoice"]["autoLanguageSwitching"]
+	conf["ignoreNumbersInLanguageDetection"] = ignoreNumbers
+	conf["ignorePunctuationInLanguageDetection"] = ignorePunctuation
+	languageDetection.invalidate_detector_config()
+	monkeypatch.setattr(synthDriverHandler.getSynth(), "language", defaultLanguage)
+	detector = languageDetection.LanguageDetector(GOLDEN["languageSets"][languages], _symbols() if symbols else None)
+	for case in cases:
+		sequence = _decode(case["sequence"])
+		assert _encode(detector.add_detected_language_commands(sequence)) == case["speech"]
+		text = "".join(item for item in sequence if isinstance(item, str))
+		assert [list(run) for run in detector.process_for_spelling(text)] == case["spelling"]
+	languageDetection.invalidate_detector_config()
+
+
+def test_detectors_share_class_table():
+	first = languageDetection.LanguageDetector(["en", "ru"], _symbols())
+	second = languageDetection.LanguageDetector(["en", "fr"])
+	assert first._classTable is second._classTable is blocks.class_table()
+
+
+def test_class_table_file_round_trips(monkeypatch, tmp_path):
+	table = blockData.build_class_table()
+	path = tmp_path / "classes.bin"
+	path.write_bytes(blockData.pack_class_table(table))
+	monkeypatch.setattr(blocks, "_CLASS_FILE", str(path))
+	assert blocks._read_class_table() == table
+	assert len(table) == 0x110000
+
+
+def test_symbol_phrases_take_precedence_over_characters():
+	symbols = SpeechSymbols()
+	for identifier, replacement, language, mode in (("=", "equals", None, 0), ("=>", "arrow", "fr", 1), ("@", "at", "ru", 1)):
+		symbols.symbols[identifier] = SpeechSymbol(identifier, replacement, language, mode)
+	detector = languageDetection.LanguageDetector(["en", "fr", "ru"], symbols)
+	assert _encode(detector.add_detected_language_commands(["a = b => c@d"])) == [
+		"a equals b ", {"lang": "fr"}, "arrow", " ", {"lang": "en"}, "c", {"lang": "ru"}, "at", {"lang": "en"}, "d",
+	]
+
+
+def test_block_ranges_are_sorted_and_block_aligned():
+	previousLast = -1
+	for first, last, name in blockData.BLOCK_RANGES:
+		assert previousLast < first <= last
+		assert first % (1 << blockData.BLOCK_RSHIFT) == 0
+		assert (last + 1) % (1 << blockData.BLOCK_RSHIFT) == 0
+		previousLast = last
+
+
+def test_block_table_file_round_trips(monkeypatch, tmp_path):
+	path = tmp_path / "blocks.bin"
+	path.write_bytes(blockData.build_block_table())
+	monkeypatch.setattr(blocks, "_TABLE_FILE", str(path))
+	pageIndex, pages, names = blocks._load_table()
+	monkeypatch.setattr(blocks, "_TABLE_FILE", str(tmp_path / "missing.bin"))
+	fallback = blocks._load_table()
+	assert (pageIndex.tolist(), bytes(pages), names) == (fallback[0].tolist(), bytes(fallback[1]), fallback[2])
+	expected = {}
+	for first, last, name in blockData.BLOCK_RANGES:
+		for block in range(first >> blockData.BLOCK_RSHIFT, (last >> blockData.BLOCK_RSHIFT) + 1):
+			expected[block] = name
+	for block in range(blockData.UNICODE_BLOCK_COUNT):
+		assert blocks.block_name(block << blockData.BLOCK_RSHIFT) == expected.get(block)
@@ -0,0 +1,117 @@
+import itertools
+import types
+
+import pytest
+
+import config
+import synthDriverHandler
+from speech.commands import BreakCommand, IndexCommand, LangChangeCommand
+from synthDrivers.WorldVoice.pipeline import STAGED_PIPELINE, compile_pipeline
+from synthDrivers.WorldVoice.pipeline.settings import invalidate_pipeline_settings
+
+
+SEQUENCES = [
+	["abc 123 def"],
+	["1,234,567 and 3.14159", "12:30", "-5 +7"],
+	["a", "b", IndexCommand(1), "c"],
+	["42", "43", IndexCommand(2), "44.5", BreakCommand(300), "45"],
+	["Version 1.2.3a is out.", "At 10. Then 2!", "x=3;y=4"],
+	["no numbers here", "  ", "", "  padded  "],
+	["中文 测试 123 中文", "你好 世界"],
+	["hello 12", LangChangeCommand("fr"), "bonjour 34", LangChangeCommand(None), "bye 56"],
+	[LangChangeCommand("zh"), "数字 7 8", LangChangeCommand("de"), "Zahl 9", IndexCommand(3)],
+	["1", IndexCommand(4), "2", LangChangeCommand("en"), "3", BreakCommand(50), "x .5 .75 y"],
+	["#1 @2 $3.50 %4", "A1B2", "5th 6kg"],
+]
+
+NUMBER_LANGUAGES = ["default", "en", "zh"]
+
+
+class FakeVoiceManager:
+	def __init__(self):
+		self.voices = {lang: object() for lang in ("en", "fr", "zh")}
+		self.defaultVoiceInstance = self.voices["en"]
+
+	def getVoiceInstanceForLanguage(self, language):
+		return self.voices.get(language)
+
+
+def _symbols(number_language):
+	symbol = types.SimpleNamespace
+	return types.SimpleNamespace(symbols={
+		"1": symbol(language=number_language, replacement="one"),
+		"2": symbol(language="Windows", replacement="two"),
+		"3": symbol(language="xx", replacement="three"),
+	})
+
+
+def _worldVoiceSynth(cni, nummod, item, number, chinesespace, numlan="default"):
+	return types.SimpleNamespace(
+		name="WorldVoice",
+		language="en",
+		_numlan=numlan,
+		speechSymbols=_symbols(numlan),
+		_voiceManager=FakeVoiceManager(),
+		cni=cni,
+		nummod=nummod,
+		globalwaitfactor=20,
+		numberwaitfactor=number,
+		itemwaitfactor=item,
+		sayallwaitfactor=0,
+		chinesespacewaitfactor=chinesespace,
+	)
+
+
+def _otherSynth(cni, nummod, item, number, chinesespace):
+	pipeline = config.conf["WorldVoice"]["pipeline"]
+	pipeline["scope"] = "all"
+	pipeline["ignore_comma_between_number"] = cni
+	pipeline["number_mode"] = nummod
+	pipeline["number_wait_factor"] = number
+	pipeline["item_wait_factor"] = item
+	pipeline["chinesespace_wait_factor"] = chinesespace
+	return types.SimpleNamespace(name="espeak", language="en")
+
+
+def _comparable(sequence):
+	return [command if isinstance(command, str) else repr(command) for command in sequence]
+
+
+def _staged(sequence):
+	for stage in STAGED_PIPELINE:
+		sequence = stage(sequence)
+	return list(sequence)
+
+
+def _assertEquivalent(monkeypatch, synth):
+	monkeypatch.setattr(synthDriverHandler, "_synth", synth)
+	invalidate_pipeline_settings()
+	compiled = compile_pipeline()
+	for sequence in SEQUENCES:
+		assert _comparable(compiled(list(sequence))) == _comparable(_staged(list(sequence))), sequence
+
+
+SETTINGS = list(itertools.product(
+	(False, True),
+	("value", "number"),
+	(0, 10),
+	(0, 10),
+	(0, 10),
+))
+
+
+@pytest.mark.parametrize("numlan", NUMBER_LANGUAGES)
+@pytest.mark.parametrize("cni,nummod,item,number,chinesespace", SETTINGS)
+def test_compiled_matches_stages_on_worldvoice(monkeypatch, cni, nummod, item, number, chinesespace, numlan):
+	_assertEquivalent(monkeypatch, _worldVoiceSynth(cni, nummod, item, number, chinesespace, numlan))
+
+
+@pytest.mark.parametrize("cni,nummod,item,number,chinesespace", SETTINGS)
+def test_compiled_matches_stages_on_other_synth(monkeypatch, cni, nummod, item, number, chinesespace):
+	_assertEquivalent(monkeypatch, _otherSynth(cni, nummod, item, number, chinesespace))
+
+
+def test_compiled_matches_stages_outside_worldvoice_scope(monkeypatch):
+	synth = _otherSynth(True, "number", 10, 10, 10)
+	config.conf["WorldVoice"]["pipeline"]["scope"] = "WorldVoice"
+	_assertEquivalent(monkeypatch, synth)
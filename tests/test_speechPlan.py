@@ -0,0 +1,167 @@
+import time
+import types
+
+import pytest
+
+import synthDriverHandler
+from speech.commands import BreakCommand, IndexCommand, LangChangeCommand, PitchCommand
+from synthDrivers.WorldVoice import SynthDriver, SPEECH_PLAN_CACHE_COST, SPEECH_PLAN_CACHE_SIZE, _SpeechPlanKey
+from synthDrivers.WorldVoice.cache import LRUCache
+from synthDrivers.WorldVoice.driver import Voice
+from synthDrivers.WorldVoice.engine import READY_ENGINE_CLASS
+from synthDrivers.WorldVoice.pipeline.settings import invalidate_pipeline_settings
+
+
+class FakeVoice(Voice):
+	engine = "Fake"
+	nativeBreaks = False
+
+	def __init__(self, name, language, spoken):
+		self.name = name
+		self.language = language
+		self._spoken = spoken
+
+	def speak(self, chunks):
+		self._spoken.append((self.name, list(chunks)))
+
+	def breaks(self, seconds):
+		self._spoken.append((self.name, seconds))
+
+
+class FakeVoiceManager:
+	def __init__(self):
+		self.spoken = []
+		self.voices = {
+			"en": FakeVoice("en", "en", self.spoken),
+			"fr": FakeVoice("fr", "fr", self.spoken),
+		}
+		self.defaultVoiceInstance = self.voices["en"]
+		self.enginesReady = True
+
+	def getVoiceInstanceForLanguage(self, language):
+		return self.voices.get(language)
+
+	def useVoice(self, voiceInstance):
+		pass
+
+
+@pytest.fixture
+def driver(monkeypatch):
+	monkeypatch.setitem(READY_ENGINE_CLASS, "Fake", FakeVoice)
+	driver = object.__new__(SynthDriver)
+	voiceManager = FakeVoiceManager()
+	driver.__dict__.update(
+		order=0,
+		_uwv=False,
+		_voiceManager=voiceManager,
+		_speechPlans=LRUCache(maxsize=SPEECH_PLAN_CACHE_SIZE, maxcost=SPEECH_PLAN_CACHE_COST),
+		_firstChunkTimes={},
+	)
+	monkeypatch.setattr(synthDriverHandler, "_synth", types.SimpleNamespace(
+		name="WorldVoice",
+		language="en",
+		_voiceManager=voiceManager,
+	))
+	invalidate_pipeline_settings()
+	return driver
+
+
+def planKey(sequence):
+	planKey = _SpeechPlanKey()
+	for command in sequence:
+		planKey.add(command)
+	return planKey.key(), planKey.indexes
+
+
+def test_key_leaves_out_index_values():
+	key1, indexes1 = planKey(["a", IndexCommand(1), "b", IndexCommand(2)])
+	key2, indexes2 = planKey(["a", IndexCommand(7), "b", IndexCommand(8)])
+	assert key1 == key2
+	assert [i.index for i in indexes1] == [1, 2]
+	assert [i.index for i in indexes2] == [7, 8]
+
+
+def test_key_follows_command_fields():
+	assert planKey(["a", LangChangeCommand("fr")])[0] == planKey(["a", LangChangeCommand("fr")])[0]
+	assert planKey(["a", LangChangeCommand("fr")])[0] != planKey(["a", LangChangeCommand("de")])[0]
+	assert planKey([BreakCommand(100)])[0] != planKey([BreakCommand(200)])[0]
+	assert planKey([PitchCommand(offset=10)])[0] != planKey([PitchCommand(offset=20)])[0]
+
+
+def test_key_follows_command_class():
+	class OtherCommand(LangChangeCommand):
+		pass
+
+	assert planKey([LangChangeCommand("fr")])[0] != planKey([OtherCommand("fr")])[0]
+
+
+def test_key_follows_pipeline_settings():
+	key = planKey(["a"])[0]
+	invalidate_pipeline_settings()
+	assert planKey(["a"])[0] != key
+
+
+def test_no_key_for_unhashable_fields():
+	command = LangChangeCommand("fr")
+	command.extra = ["unhashable"]
+	assert planKey(["a", command])[0] is None
+
+
+def test_plan_replays_with_new_indexes(driver):
+	driver.speak(["hello", IndexCommand(1), LangChangeCommand("fr"), "bonjour", IndexCommand(2)])
+	spoken = driver._voiceManager.spoken
+	first = list(spoken)
+	spoken.clear()
+	driver.speak(["hello", IndexCommand(3), LangChangeCommand("fr"), "bonjour", IndexCommand(4)])
+	assert driver._speechPlans.hits == 1
+	assert [name for name, _ in spoken] == [name for name, _ in first] == ["en", "fr"]
+	assert [c.index for _, chunks in spoken for c in chunks if isinstance(c, IndexCommand)] == [3, 4]
+
+
+def test_plan_not_cached_while_engines_start(driver):
+	driver._voiceManager.enginesReady = False
+	driver.speak(["hello"])
+	assert len(driver._speechPlans) == 0
+	driver._voiceManager.enginesReady = True
+	driver.speak(["hello"])
+	assert len(driver._speechPlans) == 1
+
+
+def test_streams_iterable_input(driver):
+	"""The first chunk is queued before the rest of a lazily produced utterance is read."""
+	spoken = driver._voiceManager.spoken
+	consumedAtFirstChunk = []
+	consumed = 0
+
+	def utterance():
+		nonlocal consumed
+		for i in range(50):
+			consumed += 1
+			yield "text %d" % i
+			yield LangChangeCommand("fr" if i % 2 == 0 else "en")
+			if spoken and not consumedAtFirstChunk:
+				consumedAtFirstChunk.append(consumed)
+
+	driver.speak(utterance())
+	assert len(spoken) == 50
+	assert consumedAtFirstChunk and consumedAtFirstChunk[0] < 5
+	# Keyed while streaming, so the same utterance as a list replays the plan.
+	driver.speak([c for i in range(50) for c in ("text %d" % i, LangChangeCommand("fr" if i % 2 == 0 else "en"))])
+	assert driver._speechPlans.hits == 1
+
+
+def test_first_chunk_latency(driver):
+	utterance = []
+	for i in range(200):
+		utterance += ["sentence %d" % i, IndexCommand(i), LangChangeCommand("fr" if i % 2 == 0 else "en")]
+	start = time.perf_counter()
+	driver.speak(list(utterance))
+	elapsed = time.perf_counter() - start
+	driver.speak(list(utterance))
+	stats = driver.latency_stats()
+	# The first of 200 steps goes out well before the utterance is resolved.
+	assert stats["streamed"]["max_ms"] < elapsed * 1000
+	assert stats["streamed"]["count"] == 1
+	assert stats["cached"]["count"] == 1
+	for source in ("streamed", "cached"):
+		assert 0 <= stats[source]["mean_ms"] <= stats[source]["max_ms"]
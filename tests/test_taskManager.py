@@ -0,0 +1,256 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from synthDriverHandler import getSynth, synthDoneSpeaking
+from synthDrivers.WorldVoice import taskManager
+from synthDrivers.WorldVoice.taskManager import TaskManager
+
+
+class FakeVoice(object):
+
+	def __init__(self, engine, core=None):
+		self.engine = engine
+		self.core = core if core is not None else object()
+		self.restarts = 0
+
+	def stop(self):
+		pass
+
+	def pause(self):
+		pass
+
+	def resume(self):
+		pass
+
+	def restartEngine(self):
+		self.restarts += 1
+
+
+def _doneSpeaking():
+	synthDoneSpeaking.notify(synth=getSynth())
+
+
+def speaker(log, name, seconds=0.0):
+	"""A speak function that finishes after seconds, like an engine would."""
+	def speak():
+		log.append(name)
+		if seconds:
+			threading.Timer(seconds, _doneSpeaking).start()
+		else:
+			_doneSpeaking()
+	return speak
+
+
+@pytest.fixture
+def manager():
+	manager = TaskManager()
+	yield manager
+	manager.shutdown()
+
+
+def test_plays_prerendered_chunk(manager):
+	log = []
+	rendered = threading.Event()
+
+	def render(token):
+		rendered.set()
+		return speaker(log, "played")
+
+	manager.add_speak_task(FakeVoice("A"), speaker(log, "a", 0.2))
+	manager.add_speak_task(FakeVoice("B"), speaker(log, "b"), render=render).result(5)
+	assert rendered.is_set()
+	assert log == ["a", "played"]
+	assert manager.gap_stats()["prerendered"] == 1
+
+
+def test_waits_for_render_in_progress(manager):
+	log = []
+
+	def render(token):
+		time.sleep(0.2)
+		return speaker(log, "played")
+
+	manager.add_speak_task(FakeVoice("A"), speaker(log, "a", 0.05))
+	manager.add_speak_task(FakeVoice("B"), speaker(log, "b"), render=render).result(5)
+	assert log == ["a", "played"]
+	assert manager.gap_stats()["prerender_missed"] == 0
+
+
+def test_synthesizes_live_when_render_is_late(manager, monkeypatch):
+	monkeypatch.setattr(taskManager, "LOOKAHEAD_WAIT_SECONDS", 0.05)
+	log = []
+	cancelled = threading.Event()
+
+	def render(token):
+		token.wait(5)
+		cancelled.set()
+		return None
+
+	manager.add_speak_task(FakeVoice("A"), speaker(log, "a", 0.05))
+	manager.add_speak_task(FakeVoice("B"), speaker(log, "b"), render=render).result(5)
+	assert cancelled.is_set()
+	assert log == ["a", "b"]
+	assert manager.gap_stats()["prerender_missed"] == 1
+
+
+def test_handover_gap_between_queued_chunks(manager):
+	log = []
+	voice = FakeVoice("A")
+	futures = [manager.add_speak_task(voice, speaker(log, i)) for i in range(50)]
+	futures[-1].result(5)
+	stats = manager.gap_stats()
+	assert log == list(range(50))
+	assert stats["count"] >= 40
+	# The hand-over is a queue get and a few attribute writes.
+	assert stats["mean_ms"] < 5
+
+
+def test_runs_tasks_in_order(manager):
+	log = []
+	voice = FakeVoice("A")
+	manager.add_speak_task(voice, speaker(log, "a", 0.05))
+	manager.add_break_task(voice, 0.01)
+	manager.add_task(voice, lambda: log.append("b"))
+	manager.add_speak_task(voice, speaker(log, "c")).result(5)
+	assert log == ["a", "b", "c"]
+
+
+def test_cancel_drops_queued_tasks(manager):
+	log = []
+	voice = FakeVoice("A")
+	started = threading.Event()
+
+	def speak():
+		started.set()
+		log.append("current")
+
+	current = manager.add_speak_task(voice, speak)
+	stale = [manager.add_speak_task(voice, speaker(log, i)) for i in range(3)]
+	started.wait(5)
+	queued = manager._q.qsize()
+	manager.cancel()
+	# Cancel only bumps the generation, the worker skips what it dequeues after.
+	assert manager._q.qsize() == queued
+	manager.add_speak_task(voice, speaker(log, "next")).result(5)
+	assert current.cancelled()
+	assert all(future.cancelled() for future in stale)
+	assert log == ["current", "next"]
+
+
+def test_break_after_speech_becomes_its_pause(manager):
+	log = []
+	voice = FakeVoice("A")
+	started = threading.Event()
+	release = threading.Event()
+
+	def speak():
+		started.set()
+		release.wait(5)
+		_doneSpeaking()
+
+	manager.add_speak_task(voice, speak)
+	started.wait(5)
+	first = manager.add_speak_task(voice, speaker(log, "a"))
+	assert manager.add_break_task(voice, 0.2) is first
+	release.set()
+	begin = time.perf_counter()
+	first.result(5)
+	assert time.perf_counter() - begin >= 0.2
+
+
+def test_cancel_cuts_pause_short(manager):
+	log = []
+	voice = FakeVoice("A")
+	started = threading.Event()
+	release = threading.Event()
+
+	def speak():
+		started.set()
+		release.wait(5)
+		_doneSpeaking()
+
+	manager.add_speak_task(voice, speak)
+	started.wait(5)
+	first = manager.add_speak_task(voice, speaker(log, "a"))
+	manager.add_break_task(voice, 5)
+	release.set()
+	while log != ["a"]:
+		time.sleep(0.01)
+	begin = time.perf_counter()
+	manager.cancel()
+	with pytest.raises(CancelledError):
+		first.result(5)
+	assert time.perf_counter() - begin < 1
+
+
+def test_watchdog_is_generous_until_rate_is_measured(manager):
+	voice = FakeVoice("A")
+	task = taskManager._Task(voice, None, True, None, size=100)
+	unmeasured = manager._deadline(task)
+	assert unmeasured >= 100 * taskManager.WATCHDOG_UNMEASURED_SECONDS_PER_CHAR
+	sample = taskManager._Task(voice, None, True, None, size=20)
+	for _ in range(taskManager.WATCHDOG_MIN_SAMPLES - 1):
+		manager._record_rate(sample, 1.0)
+	assert manager._deadline(task) == unmeasured
+	manager._record_rate(sample, 1.0)
+	assert manager._deadline(task) == pytest.approx(taskManager.WATCHDOG_MIN_SECONDS + 100 * 0.05 * taskManager.WATCHDOG_FACTOR)
+
+
+def test_restarts_hung_engine_on_main_thread(manager, monkeypatch):
+	monkeypatch.setattr(taskManager, "WATCHDOG_MIN_SECONDS", 0.05)
+	monkeypatch.setattr(taskManager, "WATCHDOG_UNMEASURED_SECONDS_PER_CHAR", 0.0)
+	queued = []
+	monkeypatch.setattr(taskManager.queueHandler, "queueFunction", lambda queue, func: queued.append(func))
+	log = []
+	voice = FakeVoice("A")
+	hung = manager.add_speak_task(voice, lambda: log.append("hung"), size=10)
+	after = manager.add_speak_task(voice, speaker(log, "after"))
+	while not queued:
+		time.sleep(0.01)
+	# The worker holds the next chunk until the main thread has restarted the engine.
+	time.sleep(0.1)
+	assert log == ["hung"] and voice.restarts == 0
+	queued[0]()
+	after.result(5)
+	assert voice.restarts == 1
+	assert log == ["hung", "after"]
+	with pytest.raises(TimeoutError):
+		hung.result(0)
+	assert manager.engine_stats()["restarts"] == {"A": 1}
+
+
+def test_resumed_speech_gets_full_deadline(manager, monkeypatch):
+	monkeypatch.setattr(taskManager, "WATCHDOG_MIN_SECONDS", 0.3)
+	monkeypatch.setattr(taskManager, "WATCHDOG_UNMEASURED_SECONDS_PER_CHAR", 0.0)
+	queued = []
+	monkeypatch.setattr(taskManager.queueHandler, "queueFunction", lambda queue, func: queued.append((time.perf_counter(), func)))
+	voice = FakeVoice("A")
+	started = threading.Event()
+	hung = manager.add_speak_task(voice, started.set, size=10)
+	started.wait(5)
+	time.sleep(0.2)
+	manager.pause(True)
+	time.sleep(0.05)
+	manager.pause(False)
+	resumed = time.perf_counter()
+	while not queued:
+		time.sleep(0.01)
+	assert queued[0][0] - resumed >= 0.3
+	queued[0][1]()
+	with pytest.raises(TimeoutError):
+		hung.result(5)
+
+
+def test_rate_change_is_measured_again(manager):
+	voice = FakeVoice("A")
+	voice.rate = 80
+	task = taskManager._Task(voice, None, True, None, size=100)
+	unmeasured = manager._deadline(task)
+	for _ in range(taskManager.WATCHDOG_MIN_SAMPLES):
+		manager._record_rate(task, 1.0)
+	assert manager._deadline(task) < unmeasured
+	voice.rate = 20
+	assert manager._deadline(task) == unmeasured
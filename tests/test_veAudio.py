@@ -0,0 +1,84 @@
+import threading
+from ctypes import Structure, addressof, c_uint, c_void_p, memmove, string_at
+
+from synthDrivers.WorldVoice.driver import veAudio
+
+
+class FakeMark(Structure):
+	_fields_ = [("eMrkType", c_uint)]
+
+
+class FakePlayer(object):
+
+	def __init__(self):
+		self.fed = []
+
+	def feed(self, data, size=None, onDone=None):
+		self.fed.append(bytes(data) if size is None else string_at(data, size))
+		if onDone:
+			onDone()
+
+	def idle(self):
+		self.fed.append("idle")
+
+
+class FakeSonicLib(object):
+	"""Hands out samples chunk by chunk, checking the buffer comes as a pointer."""
+
+	def __init__(self, samples):
+		self.samples = samples
+		self.buffers = []
+
+	def sonicReadShortFromStream(self, stream, buffer, maxSamples):
+		assert isinstance(buffer, c_void_p)
+		self.buffers.append(buffer.value)
+		read = min(maxSamples, len(self.samples) // 2)
+		chunk, self.samples = self.samples[:read * 2], self.samples[read * 2:]
+		memmove(buffer, chunk, len(chunk))
+		return read
+
+
+class Buffers(veAudio.VEBuffers):
+	markInfo = FakeMark
+	engineName = "Fake"
+
+
+def _withSonic(buffers, samples):
+	buffers._sonicLib = FakeSonicLib(samples)
+	buffers.sonicStream = type("Stream", (), {"stream": None})()
+	buffers._sonicEnabled = True
+	return buffers._sonicLib
+
+
+def test_sonic_output_is_read_at_the_feed_offset():
+	player = FakePlayer()
+	buffers = Buffers(player, threading.Event())
+	buffers._feedLen = 10
+	sonic = _withSonic(buffers, b"\x01\x02" * 4)
+	buffers._readSonic()
+	assert sonic.buffers[0] == addressof(buffers._feedBuf) + 10
+	assert buffers._feedLen == 18
+	assert bytes(buffers._feedBuf[10:18]) == b"\x01\x02" * 4
+
+
+def test_full_feed_buffer_is_played_before_reading_on():
+	player = FakePlayer()
+	buffers = Buffers(player, threading.Event())
+	buffers._feedLen = veAudio.pcmBufMax
+	_withSonic(buffers, b"\x03\x04")
+	buffers._readSonic()
+	assert len(player.fed) == 1 and len(player.fed[0]) == veAudio.pcmBufMax
+	assert buffers._feedLen == 2
+
+
+def test_capture_plays_back_with_its_indexes():
+	capture = veAudio.PCMCapture()
+	capture.feed(b"ab")
+	capture.mark(1)
+	capture.feed(b"cd")
+	capture.close()
+	player = FakePlayer()
+	reached = []
+	veAudio.PlayRendered(player, threading.Event(), capture.segments, reached.append)()
+	assert player.fed == [b"ab", b"cd", "idle"]
+	assert reached == [1, None]
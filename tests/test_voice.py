@@ -0,0 +1,61 @@
+import pytest
+
+import synthDrivers.WorldVoice  # noqa: F401
+from synthDrivers.WorldVoice import driver
+from synthDrivers.WorldVoice.driver import Voice, pendingCommits
+
+
+class FakeVoice(Voice):
+	engine = "Fake"
+	core = None
+
+
+@pytest.fixture
+def voices(monkeypatch):
+	monkeypatch.setattr(driver, "sharedParameters", driver.SharedParameters())
+	monkeypatch.setattr(driver.core, "callLater", lambda delay, callable, *args: None)
+	main = FakeVoice("main", "Fake:main", None)
+	other = FakeVoice("other", "Fake:other", None)
+	yield main, other
+	pendingCommits._voices.clear()
+	pendingCommits._scheduled = False
+
+
+def test_reading_a_parameter_writes_nothing(voices):
+	main, other = voices
+	main.rate = 80
+	driver.sharedParameters.publish(main)
+	assert other.rate == 80
+	# Only reported: the voice takes it on when it is used.
+	assert other._rate == 50
+	assert other.commit_rate == 50
+	assert other.name not in pendingCommits._voices
+
+
+def test_active_takes_on_shared_parameters(voices):
+	main, other = voices
+	main.rate = 80
+	driver.sharedParameters.publish(main)
+	other.active()
+	assert other._rate == 80
+	assert other.commit_rate == 80
+
+
+def test_flush_takes_on_shared_parameters(voices):
+	main, other = voices
+	other.rate = 60
+	other.commit()
+	main.rate = 80
+	driver.sharedParameters.publish(main)
+	pendingCommits.flush()
+	assert other._rate == 80
+	assert other._persisted["rate"] == 80
+
+
+def test_setting_a_parameter_keeps_it(voices):
+	main, other = voices
+	main.rate = 80
+	driver.sharedParameters.publish(main)
+	other.pitch = 30
+	other.active()
+	assert (other.rate, other.pitch) == (80, 30)
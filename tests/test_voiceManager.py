@@ -0,0 +1,213 @@
+import threading
+import time
+import types
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+import config
+from synthDrivers.WorldVoice import voiceManager
+from synthDrivers.WorldVoice.voiceManager import VoiceManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+	"""A manager with a started "Fast" engine and a "Slow" one still starting in the background."""
+	manager = object.__new__(VoiceManager)
+	manager._engineReady = {"Slow": Future()}
+	manager._pendingDefaultVoiceName = None
+	manager._voiceInfos = {"Fast:a": None, "Slow:b": None}
+	manager.catalog = types.SimpleNamespace(byName={
+		"Fast:a": types.SimpleNamespace(engine="Fast"),
+		"Slow:b": types.SimpleNamespace(engine="Slow"),
+	})
+	manager.catalogChanged = voiceManager.extensionPoints.Action()
+	manager._defaultVoiceInstance = types.SimpleNamespace(name="Fast:a")
+	manager.getVoiceInstance = lambda name: types.SimpleNamespace(name=name)
+	manager.onKeepEngineConsistent = manager.onKeepMainLocaleVoiceConsistent = lambda: None
+	manager._languageVoices = {}
+	return manager
+
+
+def test_voice_of_starting_engine_falls_back_at_once(manager):
+	begin = time.perf_counter()
+	assert manager.waitForVoice("Fast:a")
+	assert not manager.waitForVoice("Slow:b")
+	assert time.perf_counter() - begin < voiceManager.ENGINE_READY_WAIT + 0.5
+	manager._engineReady["Slow"].set_result(True)
+	assert manager.waitForVoice("Slow:b")
+
+
+def test_voice_of_starting_engine_is_not_built(manager, monkeypatch):
+	class SlowVoice(object):
+		engine = "Slow"
+		core = None
+
+		def __init__(self, **kwargs):
+			raise AssertionError("built without a core")
+
+	monkeypatch.setattr(voiceManager, "READY_ENGINE_CLASS", {"Slow": SlowVoice})
+	manager.catalog.byName["Slow:b"].id = "b"
+	manager._instanceCache = {}
+	assert manager._createVoiceInstance("Slow:b") is manager._defaultVoiceInstance
+	assert "Slow:b" not in manager._instanceCache
+
+
+def test_default_voice_switches_once_engine_is_up(manager):
+	changes = []
+	manager.catalogChanged.register(lambda: changes.append(True))
+	manager.defaultVoiceName = "Slow:b"
+	assert manager.defaultVoiceName == "Fast:a"
+	assert manager._pendingDefaultVoiceName == "Slow:b"
+	manager._engineReady["Slow"].set_result(True)
+	manager._applyPendingDefaultVoice("Slow:b")
+	assert manager.defaultVoiceName == "Slow:b"
+	assert manager._pendingDefaultVoiceName is None
+	assert changes == [True]
+
+
+def test_later_choice_replaces_pending_default_voice(manager):
+	manager.defaultVoiceName = "Slow:b"
+	manager.defaultVoiceName = "Fast:a"
+	manager._engineReady["Slow"].set_result(True)
+	manager._applyPendingDefaultVoice("Slow:b")
+	assert manager.defaultVoiceName == "Fast:a"
+
+
+class CoreVoice(object):
+	"""A voice whose dedicated core takes until built is set to build."""
+	engine = "Core"
+	core = "shared"
+	supportsDedicatedCore = True
+	initOnMainThread = False
+
+	def __init__(self, name):
+		self.name = name
+		self.built = threading.Event()
+		self.buildThread = None
+
+	@property
+	def hasDedicatedCore(self):
+		return "core" in self.__dict__
+
+	def newDedicatedCore(self):
+		self.buildThread = threading.current_thread()
+		self.built.wait(5)
+		return "own " + self.name
+
+	def openDedicatedCore(self, core=None):
+		self.core = core
+
+
+class Worker(object):
+	"""Holds added tasks until the test runs them, as the speech worker would between chunks."""
+
+	def __init__(self):
+		self.tasks = []
+
+	def add_task(self, voiceInstance, fn):
+		future = Future()
+		self.tasks.append((fn, future))
+		return future
+
+	def run(self):
+		tasks, self.tasks = self.tasks, []
+		for fn, future in tasks:
+			future.set_result(fn())
+
+
+@pytest.fixture
+def coreManager():
+	manager = object.__new__(VoiceManager)
+	manager._enginePool = ThreadPoolExecutor(max_workers=1)
+	manager._lastVoiceOfEngine = {}
+	manager._lastVoiceOfCore = {}
+	manager._coreSwitches = defaultdict(int)
+	manager._dedicatedCores = defaultdict(list)
+	manager._pendingCores = {}
+	manager._coreSwaps = {}
+	manager.taskManager = Worker()
+	manager.switchesSaved = 0
+	manager._markResident = lambda voiceInstance: None
+	config.conf["WorldVoice"]["dedicatedCores"]["Core"] = 1
+	yield manager
+	manager._enginePool.shutdown()
+
+
+def _switch(manager, a, b, times):
+	for _ in range(times):
+		manager.useVoice(a)
+		manager.useVoice(b)
+
+
+def test_dedicated_core_is_built_off_speech(coreManager):
+	a, b = CoreVoice("a"), CoreVoice("b")
+	_switch(coreManager, a, b, voiceManager.DEDICATED_CORE_SWITCHES)
+	# Speech goes on with the shared core while the dedicated one is built.
+	assert a in coreManager._pendingCores
+	_switch(coreManager, a, b, 2)
+	assert a.core == "shared"
+	a.built.set()
+	coreManager._pendingCores[a].result(5)
+	assert a.buildThread is not threading.current_thread()
+	coreManager.useVoice(a)
+	# Chunks queued before still speak on the shared core.
+	assert a.core == "shared"
+	coreManager.useVoice(b)
+	coreManager.useVoice(a)
+	assert len(coreManager.taskManager.tasks) == 1
+	coreManager.taskManager.run()
+	assert a.core == "own a"
+	assert not coreManager._pendingCores
+	assert coreManager.dedicatedCoreStats()["cores"] == {"Core": ["a"]}
+	# The limit of one is taken, b stays on the shared core.
+	_switch(coreManager, b, a, 3)
+	assert b.core == "shared"
+	assert coreManager.switchesSaved > 0
+
+
+def test_failed_dedicated_core_frees_its_slot(coreManager):
+	a, b = CoreVoice("a"), CoreVoice("b")
+
+	def fail():
+		raise RuntimeError("no core")
+
+	a.newDedicatedCore = fail
+	_switch(coreManager, a, b, voiceManager.DEDICATED_CORE_SWITCHES)
+	coreManager._pendingCores[a].exception(5)
+	coreManager.useVoice(b)
+	coreManager.useVoice(a)
+	assert a.core == "shared"
+	assert coreManager._dedicatedCores["Core"] == []
+	assert a not in coreManager._pendingCores
+
+
+def test_catalog_change_is_announced_on_main_thread(manager, monkeypatch):
+	queued = []
+	monkeypatch.setattr(voiceManager.queueHandler, "queueFunction", lambda queue, func, *args: queued.append(func))
+	changes = []
+	manager.catalogChanged.register(lambda: changes.append(True))
+	manager._catalogLock = threading.Lock()
+	manager._engineVoices = {}
+	manager._setVoiceDatas = lambda: None
+	assert manager._updateEngineVoices(types.SimpleNamespace(engine="Slow"), ["b"])
+	assert changes == []
+	queued[0]()
+	assert changes == [True]
+
+
+def test_cancelled_core_swap_is_queued_again(coreManager):
+	a, b = CoreVoice("a"), CoreVoice("b")
+	a.built.set()
+	_switch(coreManager, a, b, voiceManager.DEDICATED_CORE_SWITCHES)
+	coreManager._pendingCores[a].result(5)
+	coreManager.useVoice(a)
+	(fn, swap), = coreManager.taskManager.tasks
+	coreManager.taskManager.tasks = []
+	swap.cancel()
+	assert a.core == "shared" and a in coreManager._pendingCores
+	coreManager.useVoice(b)
+	coreManager.useVoice(a)
+	coreManager.taskManager.run()
+	assert a.core == "own a"